@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+Batch extraction and NER analysis over a corpus of PDFs and text files.
+
+Inputs are directories (searched recursively for .pdf and .txt files) or
+glob patterns. Each document is processed in a worker process that loads
+the spaCy model once and reuses it for every document it handles. Per
+document outputs go to the output directory, and a merged corpus summary
+is written to corpus_summary.json. The mergeable counts behind it go to
+corpus_counts.json, so runs on separate machines can be combined with
+streaming_summary.py. With --cooccurrence, plant x technique co-occurrence
+matrices are also merged into corpus_cooccurrence.npz (see cooccurrence.py).
+
+With --shard i/N only the inputs hashed to shard i are processed, and the
+shard writes its counts and a checksummed manifest instead of the corpus
+files; `python sharding.py merge` combines the N shards into the same
+corpus_summary.json a single run would write.
+
+Documents whose outputs are newer than their input are skipped, so an
+interrupted run can simply be restarted. Outputs produced with a different
+lexicon (see lexicon.py) are redone.
+
+Usage:
+    python batch_runner.py guides/ more_guides/*.pdf --output-dir results --workers 4
+    python batch_runner.py guides/ --output-dir results --shard 2/4
+"""
+
+import glob
+import hashlib
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from columnar_output import load_columnar
+from lexicon import disable_lexicon_cache
+from ner_analyzer import GardeningNERAnalyser, OUTPUT_SUFFIXES, save_results
+from page_cache import PageCache, DEFAULT_CACHE_DIR
+from pdf_extractor import iter_page_text, save_text_to_file
+from sharding import parse_shard, select_shard, write_shard
+from spacy_profiles import PIPELINE_PROFILES, DEFAULT_PROFILE
+from stage_cache import DEFAULT_STAGE_CACHE_DIR
+from streaming_summary import SummaryAggregator, save_counts
+from term_matcher import get_default_matcher
+
+INPUT_EXTENSIONS = ('.pdf', '.txt')
+CORPUS_SUMMARY_FILE = 'corpus_summary.json'
+CORPUS_COUNTS_FILE = 'corpus_counts.json'
+CORPUS_COOCCURRENCE_FILE = 'corpus_cooccurrence.npz'
+
+# Analyser owned by the current worker process, created once by _init_worker
+_analyser = None
+
+
+def collect_inputs(paths):
+    """
+    Expand directories and glob patterns into a sorted list of input files.
+
+    Paths are normalised, so a file reached through two inputs is listed
+    once. Text files produced by a previous extraction (*_extracted.txt)
+    are skipped when the matching PDF is also an input.
+
+    Args:
+        paths (list): Directories, files or glob patterns
+
+    Returns:
+        list: Paths of .pdf and .txt files
+    """
+    found = set()
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                found.update(os.path.normpath(os.path.join(root, name)) for name in files
+                         if name.lower().endswith(INPUT_EXTENSIONS))
+        else:
+            found.update(os.path.normpath(p) for p in glob.glob(path) if p.lower().endswith(INPUT_EXTENSIONS))
+
+    pdf_bases = {os.path.splitext(p)[0] for p in found if p.lower().endswith('.pdf')}
+    return sorted(p for p in found
+                  if not (p.endswith('_extracted.txt') and p[:-len('_extracted.txt')] in pdf_bases))
+
+
+def _output_base(input_path):
+    """Return the default name analysis outputs of an input are based on."""
+    base_name = os.path.splitext(os.path.basename(input_path))[0]
+    return f"{base_name}_extracted" if input_path.lower().endswith('.pdf') else base_name
+
+
+def output_names(inputs):
+    """
+    Give every input a distinct output base name.
+
+    Outputs are named after the input's file name. Inputs whose names
+    would clash (e.g. guides/a/notes.txt and guides/b/notes.txt) get a
+    short hash of their path appended, so no document overwrites
+    another's outputs. Names depend only on the whole input list, so
+    every shard of a run agrees on them.
+
+    Args:
+        inputs (list): Input files from collect_inputs
+
+    Returns:
+        dict: Input path -> base name for document_outputs
+    """
+    bases = {path: _output_base(path) for path in inputs}
+    # Compared case-insensitively, for case-insensitive file systems
+    counts = Counter(base.lower() for base in bases.values())
+    names = {}
+    for path, base in bases.items():
+        if counts[base.lower()] > 1:
+            digest = hashlib.sha256(path.replace(os.sep, '/').encode('utf-8')).hexdigest()[:8]
+            base = f"{base}_{digest}"
+        names[path] = base
+    return names
+
+
+def document_outputs(input_path, output_dir, output_format, base_name=None):
+    """
+    Return the (text path, analysis path) a document's outputs are written to.
+
+    Args:
+        input_path (str): Input PDF or text file
+        output_dir (str): Output directory
+        output_format (str): 'json' or 'columnar'
+        base_name (str, optional): Output base name from output_names;
+            defaults to one derived from the file name alone
+
+    Returns:
+        tuple: (path of extracted text, path of analysis results)
+    """
+    base_name = base_name or _output_base(input_path)
+    if input_path.lower().endswith('.pdf'):
+        text_path = os.path.join(output_dir, f"{base_name}.txt")
+    else:
+        text_path = input_path
+    return text_path, os.path.join(output_dir, base_name + OUTPUT_SUFFIXES[output_format])
+
+
+def is_up_to_date(input_path, output_path):
+    """Return True if output_path exists and is newer than input_path."""
+    try:
+        return os.path.getmtime(output_path) >= os.path.getmtime(input_path)
+    except OSError:
+        return False
+
+
+def load_results(path):
+    """Load results written in either output format."""
+    if path.endswith(OUTPUT_SUFFIXES['columnar']):
+        return load_columnar(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _init_worker(analyser_kwargs):
+    """Create the worker's analyser; the spaCy model is loaded on its first document."""
+    global _analyser
+    _analyser = GardeningNERAnalyser(**analyser_kwargs)
+
+
+def _saved_cooccurrence(input_path, output_dir, results, analyser_kwargs, base_name=None):
+    """Count co-occurrences for a skipped document from its saved results, if requested."""
+    if analyser_kwargs.get('cooccurrence_unit') is None:
+        return None
+    from cooccurrence import CooccurrenceMatrix
+
+    text_path, _ = document_outputs(input_path, output_dir, 'json', base_name)
+    with open(text_path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    matrix = CooccurrenceMatrix(analyser_kwargs['cooccurrence_unit'], analyser_kwargs.get('cooccurrence_window', 20))
+    return matrix.add_results(text, results)
+
+
+def process_document(input_path, output_dir, output_format, page_cache_dir=None, base_name=None):
+    """
+    Extract (for PDFs) and analyse one document, writing its outputs.
+
+    Runs inside a worker initialised with _init_worker.
+
+    Args:
+        input_path (str): Input PDF or text file
+        output_dir (str): Output directory
+        output_format (str): 'json' or 'columnar'
+        page_cache_dir (str, optional): Page cache directory for PDF extraction
+        base_name (str, optional): Output base name from output_names
+
+    Returns:
+        dict: 'path', 'bytes', 'status' and, on success, 'counts' (a SummaryAggregator)
+            and 'cooccurrence' (a CooccurrenceMatrix, or None)
+    """
+    text_path, output_path = document_outputs(input_path, output_dir, output_format, base_name)
+    status = {'path': input_path, 'bytes': os.path.getsize(input_path)}
+    try:
+        if text_path != input_path and not is_up_to_date(input_path, text_path):
+            cache = PageCache(page_cache_dir) if page_cache_dir else None
+            if not save_text_to_file(iter_page_text(input_path, cache=cache), text_path):
+                status['status'] = 'failed'
+                return status
+
+        with open(text_path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        results = _analyser.extract_gardening_entities(text)
+        cooccurrence = _analyser.count_cooccurrences(text, results)
+        save_results(results, output_path, output_format)
+    except Exception as e:
+        print(f"❌ Error processing '{input_path}': {e}")
+        status['status'] = 'failed'
+        return status
+
+    status['status'] = 'analysed'
+    status['counts'] = SummaryAggregator.from_results(results)
+    status['cooccurrence'] = cooccurrence
+    return status
+
+
+def run_batch(inputs, output_dir, workers=1, output_format='json', analyser_kwargs=None,
+              page_cache_dir=None, force=False, capacity=None, shard=None):
+    """
+    Process a corpus and write per-document outputs and a corpus summary.
+
+    Documents are merged in input order whatever order the workers finish
+    in, so the summary is the same for any number of workers or shards.
+
+    Args:
+        inputs (list): Input files from collect_inputs
+        output_dir (str): Output directory
+        workers (int): Number of worker processes
+        output_format (str): 'json' or 'columnar'
+        analyser_kwargs (dict, optional): Keyword arguments for GardeningNERAnalyser
+        page_cache_dir (str, optional): Page cache directory for PDF extraction
+        force (bool): Re-process documents even if their outputs are up to date
+        capacity (int, optional): Bound each corpus top-k counter to this many items
+        shard (tuple, optional): (i, N) from sharding.parse_shard; only process
+            shard i of inputs and write shard files instead of the corpus files
+
+    Returns:
+        dict: Corpus summary (of the shard's documents, for a shard)
+    """
+    analyser_kwargs = analyser_kwargs or {}
+    inputs = list(dict.fromkeys(inputs))
+    # Named before sharding, so every shard gives a document the same name
+    names = output_names(inputs)
+    if shard is not None:
+        selected = select_shard(inputs, shard)
+        print(f"Shard {shard[0]}/{shard[1]}: {len(selected)} of {len(inputs)} documents")
+        inputs = selected
+    os.makedirs(output_dir, exist_ok=True)
+    start_time = time.perf_counter()
+
+    todo = []
+    statuses = []
+    # Results built with another version of the lexicon or other analyser settings are redone
+    lexicon_hash = get_default_matcher().hash
+    settings_hash = GardeningNERAnalyser(**analyser_kwargs).settings_hash
+    stale = 0
+    for input_path in inputs:
+        _, output_path = document_outputs(input_path, output_dir, output_format, names[input_path])
+        if not force and is_up_to_date(input_path, output_path):
+            status = {'path': input_path, 'bytes': 0, 'status': 'skipped'}
+            try:
+                results = load_results(output_path)
+                if results.get('lexicon_hash') != lexicon_hash or results.get('settings_hash') != settings_hash:
+                    todo.append(input_path)
+                    stale += 1
+                    continue
+                status['counts'] = SummaryAggregator.from_results(results)
+                status['cooccurrence'] = _saved_cooccurrence(input_path, output_dir, results, analyser_kwargs,
+                                                            names[input_path])
+            except Exception as e:
+                print(f"⚠️  Could not read '{output_path}', re-processing: {e}")
+                todo.append(input_path)
+                continue
+            statuses.append(status)
+        else:
+            todo.append(input_path)
+
+    print(f"Processing {len(todo)} of {len(inputs)} documents ({len(inputs) - len(todo)} up to date"
+          + (f", {stale} analysed with another lexicon or settings)" if stale else ")"))
+
+    args = [(path, output_dir, output_format, page_cache_dir, names[path]) for path in todo]
+    if workers <= 1:
+        _init_worker(analyser_kwargs)
+        results = (process_document(*a) for a in args)
+        for status in results:
+            statuses.append(status)
+            print(f"   {status['status']}: {status['path']}")
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(analyser_kwargs,)) as executor:
+            futures = [executor.submit(process_document, *a) for a in args]
+            for future in futures:
+                status = future.result()
+                statuses.append(status)
+                print(f"   {status['status']}: {status['path']}")
+
+    order = {path: index for index, path in enumerate(inputs)}
+    statuses.sort(key=lambda status: order[status['path']])
+
+    aggregator = SummaryAggregator(capacity)
+    for status in statuses:
+        if 'counts' in status:
+            aggregator.merge(status['counts'])
+    summary = aggregator.summary(documents=True)
+
+    matrices = [status['cooccurrence'] for status in statuses if status.get('cooccurrence') is not None]
+    corpus_matrix = None
+    if matrices:
+        corpus_matrix = matrices[0]
+        for matrix in matrices[1:]:
+            corpus_matrix.merge(matrix)
+
+    if shard is None:
+        saved_to = os.path.join(output_dir, CORPUS_SUMMARY_FILE)
+        with open(saved_to, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        save_counts(aggregator, os.path.join(output_dir, CORPUS_COUNTS_FILE))
+        if corpus_matrix is not None:
+            corpus_matrix.save(os.path.join(output_dir, CORPUS_COOCCURRENCE_FILE))
+    else:
+        for status in statuses:
+            status['outputs'] = [path for path in document_outputs(status['path'], output_dir, output_format,
+                                                                 names[status['path']])
+                                 if path != status['path']]
+        saved_to = write_shard(output_dir, shard, statuses, capacity, corpus_matrix)
+
+    elapsed = time.perf_counter() - start_time
+    processed = [s for s in statuses if s['status'] == 'analysed']
+    failed = [s for s in statuses if s['status'] == 'failed']
+    megabytes = sum(s['bytes'] for s in processed) / (1024 * 1024)
+    print("\n" + "="*50)
+    print("📚 BATCH SUMMARY")
+    print("="*50)
+    print(f"Documents analysed: {len(processed)}")
+    print(f"Documents skipped (up to date): {len(statuses) - len(processed) - len(failed)}")
+    print(f"Documents failed: {len(failed)}")
+    print(f"Elapsed: {elapsed:.2f}s")
+    if elapsed > 0:
+        print(f"Throughput: {len(processed) / elapsed:.2f} docs/s, {megabytes / elapsed:.2f} MB/s")
+    if shard is None:
+        print(f"Corpus summary saved to: {saved_to}")
+    else:
+        print(f"Shard manifest saved to: {saved_to}")
+        print(f"Merge all {shard[1]} shards with: python sharding.py merge {output_dir}")
+    if matrices and shard is None:
+        print(f"Corpus co-occurrence matrix saved to: {os.path.join(output_dir, CORPUS_COOCCURRENCE_FILE)}")
+    print("="*50)
+
+    return summary
+
+
+def main():
+    """Main function to run batch extraction and analysis."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Extract and analyse a corpus of gardening guides.")
+    parser.add_argument("inputs", nargs="+", help="Directories, files or glob patterns of PDFs/text files")
+    parser.add_argument("--output-dir", default="batch_output", help="Output directory (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Number of worker processes (default: number of CPUs)")
+    parser.add_argument("--format", choices=list(OUTPUT_SUFFIXES), default="json",
+                        help="Per-document output format (default: json)")
+    parser.add_argument("--profile", choices=list(PIPELINE_PROFILES), default=DEFAULT_PROFILE,
+                        help="spaCy pipeline profile (default: %(default)s)")
+    parser.add_argument("--no-ner", action="store_true",
+                        help="Only match the gardening lexicon; skip spaCy entirely")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Disable the page, stage result and lexicon caches")
+    parser.add_argument("--force", action="store_true",
+                        help="Re-process documents even if their outputs are up to date")
+    parser.add_argument("--capacity", type=int, default=None,
+                        help="Bound each corpus top-k counter to this many items (approximate counts)")
+    parser.add_argument("--cooccurrence", choices=["page", "sentence", "window"], default=None,
+                        help="Also merge plant x technique co-occurrence counts into corpus_cooccurrence.npz")
+    parser.add_argument("--cooccurrence-window", type=int, default=20,
+                        help="Window size in words for --cooccurrence window (default: 20)")
+    parser.add_argument("--shard", type=parse_shard, default=None, metavar="I/N",
+                        help="Only process shard I of N (1-based); merge the shards with sharding.py merge")
+    args = parser.parse_args()
+    if args.no_cache:
+        disable_lexicon_cache()
+
+    inputs = collect_inputs(args.inputs)
+    if not inputs:
+        print("No .pdf or .txt files found.")
+        return
+
+    analyser_kwargs = {
+        'profile': args.profile,
+        'use_ner': not args.no_ner,
+        'cache_dir': None if args.no_cache else DEFAULT_STAGE_CACHE_DIR,
+        'cooccurrence_unit': args.cooccurrence,
+        'cooccurrence_window': args.cooccurrence_window
+    }
+    run_batch(inputs, args.output_dir, workers=args.workers, output_format=args.format,
+              analyser_kwargs=analyser_kwargs, page_cache_dir=None if args.no_cache else DEFAULT_CACHE_DIR,
+              force=args.force, capacity=args.capacity, shard=args.shard)
+
+
+if __name__ == "__main__":
+    main()
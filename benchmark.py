@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the extraction and analysis stages.
+
+Each stage is timed separately on the sample book tiled to several sizes
+(1x, 10x and 100x by default) and on a synthetic PDF generated from the
+same text:
+
+- pdf_extraction: pdf_extractor.extract_text_from_pdf
+- nlp: spaCy NER (ner_analyzer.GardeningNERAnalyser), skipped if no model is installed
+- the _extract_* methods and _create_summary of ner_analyzer.GardeningNERAnalyser
+- the term extraction and _create_summary of ner_analyzer_refactored
+- json_dump: serialising the results as indented JSON
+
+Timings are the best of several repeats; peak memory is measured in a
+separate run with tracemalloc. Results can be saved as a baseline and a
+later run compared against it, failing when a stage regresses past a
+threshold. Slowdowns smaller than --min-seconds are ignored, since tiny
+stages jitter by more than any sensible relative threshold.
+
+Usage:
+    python benchmark.py --save-baseline benchmark_baseline.json
+    python benchmark.py --compare benchmark_baseline.json --threshold 0.25 --min-seconds 0.01
+"""
+
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import ner_analyzer
+import ner_analyzer_refactored
+from gardening_terms import PLANT_CATEGORIES, GARDENING_TERMS, GARDENING_TECHNIQUES
+from match_table import json_default
+
+SAMPLE_TEXT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                'indolent_kitchen_gardening_extracted.txt')
+DEFAULT_SCALES = [1, 10, 100]
+DEFAULT_PDF_PAGES = 200
+DEFAULT_MIN_SECONDS = 0.005
+
+# Characters of text placed on each page of the synthetic PDF
+_PDF_PAGE_CHARS = 2500
+
+
+def load_sample_text(scale):
+    """Return the sample book tiled `scale` times."""
+    with open(SAMPLE_TEXT_FILE, 'r', encoding='utf-8') as f:
+        return f.read() * scale
+
+
+def make_synthetic_pdf(path, pages, text):
+    """
+    Write a PDF with `pages` pages of text taken from `text`.
+
+    Args:
+        path (str): Output PDF path
+        pages (int): Number of pages
+        text (str): Source text, repeated as needed
+    """
+    import fitz
+
+    doc = fitz.open()
+    for page_num in range(pages):
+        start = (page_num * _PDF_PAGE_CHARS) % max(len(text) - _PDF_PAGE_CHARS, 1)
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(36, 36, 576, 806), text[start:start + _PDF_PAGE_CHARS], fontsize=7)
+    doc.save(path)
+    doc.close()
+
+
+def measure(func, repeats):
+    """
+    Time a callable and measure its peak Python memory.
+
+    Args:
+        func (callable): Stage to run
+        repeats (int): Number of timed runs; the fastest is reported
+
+    Returns:
+        tuple: (best seconds, peak bytes, result of the last call)
+    """
+    best = None
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def _nlp_available(analyser):
+    try:
+        analyser.nlp
+    except RuntimeError as e:
+        print(f"⚠️  Skipping spaCy stages: {e}")
+        return False
+    return True
+
+
+def text_stages(text, include_nlp=True):
+    """
+    Return the (name, callable) stages to time for one text.
+
+    Args:
+        text (str): Text to analyse
+        include_nlp (bool): Include spaCy NER
+
+    Returns:
+        list: (stage name, zero-argument callable) pairs
+    """
+    analyser = ner_analyzer.GardeningNERAnalyser(use_ner=include_nlp)
+    refactored = ner_analyzer_refactored.GardeningNERAnalyser()
+    state = {}
+
+    def run_nlp():
+        state['entities'] = analyser._extract_standard_entities(text)
+        return state['entities']
+
+    def run_terms():
+        state['terms'] = analyser._extract_gardening_terms(text)
+        return state['terms']
+
+    def run_plants():
+        state['plants'] = analyser._extract_plant_names(text)
+        return state['plants']
+
+    def run_techniques():
+        state['techniques'] = analyser._extract_gardening_techniques(text)
+        return state['techniques']
+
+    def run_summary():
+        entities = state.get('entities') or {label: [] for label in ner_analyzer.ENTITY_LABELS}
+        state['summary'] = analyser._create_summary(entities, state['terms'], state['plants'], state['techniques'])
+        return state['summary']
+
+    def run_json_dump():
+        results = {
+            'standard_entities': state.get('entities') or {},
+            'gardening_terms': state['terms'],
+            'plant_names': state['plants'],
+            'gardening_techniques': state['techniques'],
+            'summary': state['summary']
+        }
+        buffer = io.StringIO()
+        json.dump(results, buffer, indent=2, ensure_ascii=False, default=json_default)
+        return buffer.tell()
+
+    def run_refactored_terms():
+        state['r_terms'] = ner_analyzer_refactored.extract_terms(text, GARDENING_TERMS, 'gardening_term')
+        state['r_plants'] = ner_analyzer_refactored.extract_terms_by_category(text, PLANT_CATEGORIES)
+        state['r_techniques'] = ner_analyzer_refactored.extract_terms(text, GARDENING_TECHNIQUES,
+                                                                      'gardening_technique')
+        return state['r_terms']
+
+    def run_refactored_entities():
+        return refactored.extract_gardening_entities(text)
+
+    def run_refactored_summary():
+        return refactored._create_summary(state['r_terms'], state['r_plants'], state['r_techniques'])
+
+    stages = []
+    if include_nlp and _nlp_available(analyser):
+        stages.append(('ner_analyzer.nlp', run_nlp))
+    stages += [
+        ('ner_analyzer._extract_gardening_terms', run_terms),
+        ('ner_analyzer._extract_plant_names', run_plants),
+        ('ner_analyzer._extract_gardening_techniques', run_techniques),
+        ('ner_analyzer._create_summary', run_summary),
+        ('ner_analyzer.json_dump', run_json_dump),
+        ('ner_analyzer_refactored.extract_terms', run_refactored_terms),
+        ('ner_analyzer_refactored.extract_gardening_entities', run_refactored_entities),
+        ('ner_analyzer_refactored._create_summary', run_refactored_summary)
+    ]
+    return stages
+
+
+def run_benchmarks(scales=DEFAULT_SCALES, pdf_pages=DEFAULT_PDF_PAGES, repeats=3, include_nlp=True):
+    """
+    Run every stage at every scale.
+
+    Args:
+        scales (list): Tiling factors for the sample text
+        pdf_pages (int): Pages in the synthetic PDF (0 to skip PDF extraction)
+        repeats (int): Timed runs per stage
+        include_nlp (bool): Include spaCy NER
+
+    Returns:
+        dict: Benchmark key -> {'seconds', 'peak_bytes', 'input_bytes', 'mb_per_s'}
+    """
+    results = {}
+
+    def record(key, seconds, peak, input_bytes):
+        results[key] = {
+            'seconds': seconds,
+            'peak_bytes': peak,
+            'input_bytes': input_bytes,
+            'mb_per_s': input_bytes / (1024 * 1024) / seconds if seconds > 0 else None
+        }
+        print(f"   {key:<60} {seconds * 1000:10.1f} ms {peak / (1024 * 1024):8.1f} MB peak")
+
+    if pdf_pages:
+        from pdf_extractor import extract_text_from_pdf
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pdf_path = os.path.join(tmp_dir, 'synthetic.pdf')
+            make_synthetic_pdf(pdf_path, pdf_pages, load_sample_text(1))
+            print(f"\nSynthetic PDF: {pdf_pages} pages")
+            seconds, peak, _ = measure(lambda: extract_text_from_pdf(pdf_path), repeats)
+            record(f"pdf_extraction[{pdf_pages}p]", seconds, peak, os.path.getsize(pdf_path))
+
+    for scale in scales:
+        text = load_sample_text(scale)
+        input_bytes = len(text.encode('utf-8'))
+        print(f"\nSample text x{scale}: {input_bytes / (1024 * 1024):.2f} MB")
+        for name, func in text_stages(text, include_nlp=include_nlp):
+            seconds, peak, _ = measure(func, repeats)
+            record(f"{name}[x{scale}]", seconds, peak, input_bytes)
+
+    return results
+
+
+def compare_to_baseline(results, baseline, threshold, min_seconds=DEFAULT_MIN_SECONDS):
+    """
+    Find stages that got slower than the baseline by more than threshold.
+
+    Args:
+        results (dict): Current results from run_benchmarks
+        baseline (dict): Saved results
+        threshold (float): Allowed relative slowdown, e.g. 0.2 for 20%
+        min_seconds (float): Ignore slowdowns of fewer seconds than this
+
+    Returns:
+        list: (key, baseline seconds, current seconds) for each regression
+    """
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if (previous and current['seconds'] > previous['seconds'] * (1 + threshold)
+                and current['seconds'] - previous['seconds'] >= min_seconds):
+            regressions.append((key, previous['seconds'], current['seconds']))
+    return regressions
+
+
+def main():
+    """Main function to run the benchmark suite."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark extraction and analysis stages.")
+    parser.add_argument("--scales", default=",".join(str(s) for s in DEFAULT_SCALES),
+                        help="Comma-separated tiling factors for the sample text (default: %(default)s)")
+    parser.add_argument("--pdf-pages", type=int, default=DEFAULT_PDF_PAGES,
+                        help="Pages in the synthetic PDF, 0 to skip (default: %(default)s)")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per stage (default: %(default)s)")
+    parser.add_argument("--no-ner", action="store_true", help="Skip the spaCy NER stage")
+    parser.add_argument("--save-baseline", metavar="PATH", help="Save results as a baseline JSON file")
+    parser.add_argument("--compare", metavar="PATH", help="Compare results to a baseline JSON file")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed relative slowdown before a stage fails (default: %(default)s)")
+    parser.add_argument("--min-seconds", type=float, default=DEFAULT_MIN_SECONDS,
+                        help="Ignore slowdowns smaller than this many seconds (default: %(default)s)")
+    args = parser.parse_args()
+
+    scales = [int(s) for s in args.scales.split(',') if s]
+    results = run_benchmarks(scales, args.pdf_pages, args.repeats, include_nlp=not args.no_ner)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline saved to: {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline, args.threshold, args.min_seconds)
+        if regressions:
+            print(f"\n❌ {len(regressions)} stage(s) regressed by more than {args.threshold:.0%}:")
+            for key, before, after in regressions:
+                print(f"   {key}: {before * 1000:.1f} ms -> {after * 1000:.1f} ms")
+            sys.exit(1)
+        print(f"\n✅ No stage regressed by more than {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
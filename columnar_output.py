@@ -0,0 +1,195 @@
+"""
+Compact columnar encoding of analysis results.
+
+The indented JSON output stores every hit as a dict that repeats its
+'label' or 'category' string. The columnar format instead writes one
+NDJSON line per hit list, holding parallel 'start'/'end' integer arrays and
+ids into interned tables of hit texts and categories:
+
+    {"format": "gardening-ner-columnar", "version": 1, "summary": {...}, "pipeline": {...}}
+    {"section": "standard_entities", "label": "PERSON", "texts": [...], "text_ids": [...], "start": [...], "end": [...]}
+    {"section": "plant_names", "categories": [...], "category_ids": [...], "texts": [...], ...}
+
+Lines are written one at a time, so no pretty-printed string of the whole
+result is ever built. load_columnar() returns a read-only view with the
+same shape as the dict results; hit dicts are only built when accessed.
+"""
+
+import json
+from collections.abc import Mapping, Sequence
+
+from match_table import MatchTable
+
+FORMAT_NAME = 'gardening-ner-columnar'
+FORMAT_VERSION = 1
+
+TERM_SECTIONS = ['gardening_terms', 'plant_names', 'gardening_techniques']
+
+
+def _intern(values):
+    """Return (table of unique values in first-seen order, list of ids into it)."""
+    table = {}
+    ids = [table.setdefault(value, len(table)) for value in values]
+    return list(table), ids
+
+
+def _encode_hits(hits, field):
+    """Encode hits (a MatchTable or list of dicts) as columns, interning texts and, if field is given, that field."""
+    if isinstance(hits, MatchTable):
+        texts, text_ids = _intern(hits.texts())
+        columns = {'texts': texts, 'text_ids': text_ids, 'start': hits.starts.tolist(), 'end': hits.ends.tolist()}
+        if field:
+            columns['categories'] = list(hits.values)
+            columns['category_ids'] = hits.value_ids.tolist()
+        return columns
+
+    texts, text_ids = _intern([hit['text'] for hit in hits])
+    columns = {
+        'texts': texts,
+        'text_ids': text_ids,
+        'start': [hit['start'] for hit in hits],
+        'end': [hit['end'] for hit in hits]
+    }
+    if field:
+        values, value_ids = _intern([hit[field] for hit in hits])
+        columns['categories'] = values
+        columns['category_ids'] = value_ids
+    return columns
+
+
+def _write_line(f, record):
+    f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+    f.write('\n')
+
+
+def write_columnar(results, output_path):
+    """
+    Write analysis results in the columnar NDJSON format.
+
+    Args:
+        results (dict): Results from GardeningNERAnalyser.extract_gardening_entities
+        output_path (str): Path of the .ndjson file to write
+    """
+    with open(output_path, 'w', encoding='utf-8') as f:
+        header = {'format': FORMAT_NAME, 'version': FORMAT_VERSION}
+        header.update({key: value for key, value in results.items()
+                       if key != 'standard_entities' and key not in TERM_SECTIONS})
+        _write_line(f, header)
+
+        for label, hits in results.get('standard_entities', {}).items():
+            record = {'section': 'standard_entities', 'label': label}
+            record.update(_encode_hits(hits, None))
+            _write_line(f, record)
+
+        for section in TERM_SECTIONS:
+            if section in results:
+                record = {'section': section}
+                record.update(_encode_hits(results[section], 'category'))
+                _write_line(f, record)
+
+
+class HitColumns(Sequence):
+    """Read-only sequence of hit dicts backed by columns; dicts are built on access."""
+
+    def __init__(self, record, field, constant=None):
+        self._record = record
+        self._field = field
+        self._constant = constant
+
+    def __len__(self):
+        return len(self._record['start'])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        record = self._record
+        if self._constant is not None:
+            value = self._constant
+        else:
+            value = record['categories'][record['category_ids'][index]]
+        return {
+            'text': record['texts'][record['text_ids'][index]],
+            'start': record['start'][index],
+            'end': record['end'][index],
+            self._field: value
+        }
+
+    @property
+    def starts(self):
+        """Start offsets as a list, without building hit dicts."""
+        return self._record['start']
+
+    @property
+    def ends(self):
+        """End offsets as a list, without building hit dicts."""
+        return self._record['end']
+
+    def texts(self):
+        """Iterate over hit texts without building hit dicts."""
+        table = self._record['texts']
+        return (table[i] for i in self._record['text_ids'])
+
+    def to_list(self):
+        """Materialise the hits as a list of dicts (the standard JSON form)."""
+        return list(self)
+
+
+class ColumnarResults(Mapping):
+    """Read-only, dict-like view of columnar results with the same keys as the JSON output."""
+
+    def __init__(self, header, entity_records, term_records):
+        self._data = {key: value for key, value in header.items() if key not in ('format', 'version')}
+        self._data['standard_entities'] = {
+            label: HitColumns(record, 'label', constant=label) for label, record in entity_records.items()
+        }
+        for section, record in term_records.items():
+            self._data[section] = HitColumns(record, 'category')
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def to_dict(self):
+        """Materialise the full results in the standard JSON form."""
+        results = dict(self._data)
+        results['standard_entities'] = {
+            label: hits.to_list() for label, hits in self._data['standard_entities'].items()
+        }
+        for section in TERM_SECTIONS:
+            if section in results:
+                results[section] = results[section].to_list()
+        return results
+
+
+def load_columnar(path):
+    """
+    Load results written by write_columnar.
+
+    Args:
+        path (str): Path of the .ndjson file
+
+    Returns:
+        ColumnarResults: Dict-like view of the results
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        header = json.loads(f.readline())
+        if header.get('format') != FORMAT_NAME:
+            raise ValueError(f"'{path}' is not a {FORMAT_NAME} file")
+        if header.get('version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported {FORMAT_NAME} version: {header.get('version')}")
+
+        entity_records = {}
+        term_records = {}
+        for line in f:
+            record = json.loads(line)
+            if record['section'] == 'standard_entities':
+                entity_records[record['label']] = record
+            else:
+                term_records[record['section']] = record
+
+    return ColumnarResults(header, entity_records, term_records)
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Plant x technique co-occurrence counts and PMI rankings.
+
+A CooccurrenceMatrix counts how often each plant is mentioned near each
+technique, from the plant_names and gardening_techniques hits of
+extract_gardening_entities. Hits are near each other when they fall in the
+same unit:
+
+    page      the same '--- Page N ---' page
+    sentence  the same sentence (split at . ! ? and blank lines)
+    window    within N words of each other
+
+Every (plant hit, technique hit) pair in a unit counts once. Plant and
+technique texts are normalised like the term index ('Tomato' and
+'tomatoes' are one row). Counting is vectorised with NumPy: technique hits
+are sorted by unit, each plant hit's range of technique hits is found with
+searchsorted, and the counts in that range are read from cumulative
+per-technique sums, so no hit pair is visited in Python.
+
+Matrices from different documents merge by adding counts, so corpus tables
+are built from per-document ones. They are saved as .npz files with sorted
+labels, so a merged matrix saves the same whatever the merge order.
+
+Usage:
+    python cooccurrence.py build guide_cooccurrence.npz guides/*_extracted.txt --unit sentence
+    python cooccurrence.py merge corpus_cooccurrence.npz node1.npz node2.npz
+    python cooccurrence.py top corpus_cooccurrence.npz --min-count 5
+"""
+
+import json
+import re
+
+import numpy as np
+
+from match_table import hit_starts, hit_texts
+from term_matcher import WORD_RE, get_default_matcher
+from text_chunks import PAGE_MARKER_RE
+
+MATRIX_FORMAT = 'gardening-cooccurrence'
+MATRIX_VERSION = 1
+
+UNITS = ('page', 'sentence', 'window')
+DEFAULT_UNIT = 'page'
+DEFAULT_WINDOW = 20
+DEFAULT_MIN_COUNT = 3
+
+# End of a sentence: terminal punctuation (and closing quotes or brackets), or a blank line
+SENTENCE_END_RE = re.compile(r'[.!?]+["\')\]]*(?=\s)|\n[ \t]*\n')
+
+# Plant hits handled per block, bounding the (block x techniques) array
+BLOCK_SIZE = 4096
+
+
+def unit_keys(text, starts, unit, window=DEFAULT_WINDOW):
+    """
+    Return the unit of each hit as an integer key, and the radius hits may be apart.
+
+    Args:
+        text (str): Analysed text
+        starts (sequence): Hit start offsets
+        unit (str): 'page', 'sentence' or 'window'
+        window (int): Window size in words, for the 'window' unit
+
+    Returns:
+        tuple: (int64 array of keys, radius). Two hits co-occur when their
+            keys differ by at most the radius.
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    if unit == 'page':
+        boundaries = [m.start() for m in PAGE_MARKER_RE.finditer(text)]
+    elif unit == 'sentence':
+        boundaries = sorted({m.end() for m in SENTENCE_END_RE.finditer(text)} |
+                            {m.start() for m in PAGE_MARKER_RE.finditer(text)})
+    elif unit == 'window':
+        word_starts = np.fromiter((m.start() for m in WORD_RE.finditer(text)), dtype=np.int64)
+        return np.searchsorted(word_starts, starts, side='right') - 1, window
+    else:
+        raise ValueError(f"Unknown co-occurrence unit '{unit}'. Choose from: {', '.join(UNITS)}")
+    return np.searchsorted(np.asarray(boundaries, dtype=np.int64), starts, side='right'), 0
+
+
+def pair_counts(row_keys, row_ids, col_keys, col_ids, shape, radius=0):
+    """
+    Count pairs of row and column hits whose keys are at most radius apart.
+
+    Args:
+        row_keys (array): Unit key of each row hit
+        row_ids (array): Row index of each row hit
+        col_keys (array): Unit key of each column hit
+        col_ids (array): Column index of each column hit
+        shape (tuple): (rows, columns) of the result
+        radius (int): Largest key difference that counts as co-occurring
+
+    Returns:
+        numpy.ndarray: int64 count matrix
+    """
+    counts = np.zeros(shape, dtype=np.int64)
+    if len(row_keys) == 0 or len(col_keys) == 0:
+        return counts
+
+    order = np.argsort(col_keys, kind='stable')
+    col_keys = np.asarray(col_keys)[order]
+    # cumulative[k, c]: column c hits among the first k sorted column hits
+    cumulative = np.zeros((len(col_keys) + 1, shape[1]), dtype=np.int32)
+    cumulative[np.arange(1, len(col_keys) + 1), np.asarray(col_ids)[order]] = 1
+    np.cumsum(cumulative, axis=0, out=cumulative)
+
+    row_keys = np.asarray(row_keys)
+    row_ids = np.asarray(row_ids)
+    for block in range(0, len(row_keys), BLOCK_SIZE):
+        keys = row_keys[block:block + BLOCK_SIZE]
+        low = np.searchsorted(col_keys, keys - radius, side='left')
+        high = np.searchsorted(col_keys, keys + radius, side='right')
+        np.add.at(counts, row_ids[block:block + BLOCK_SIZE], cumulative[high] - cumulative[low])
+    return counts
+
+
+def _intern(texts, normalise):
+    """Return (labels, int64 label ids) for hit texts."""
+    index = {}
+    ids = np.fromiter((index.setdefault(normalise(text), len(index)) for text in texts), dtype=np.int64)
+    return list(index), ids
+
+
+class CooccurrenceMatrix:
+    """Mergeable plant x technique co-occurrence counts."""
+
+    def __init__(self, unit=DEFAULT_UNIT, window=DEFAULT_WINDOW):
+        """
+        Args:
+            unit (str): 'page', 'sentence' or 'window'
+            window (int): Window size in words, for the 'window' unit
+        """
+        if unit not in UNITS:
+            raise ValueError(f"Unknown co-occurrence unit '{unit}'. Choose from: {', '.join(UNITS)}")
+        self.unit = unit
+        self.window = window if unit == 'window' else None
+        self.documents = 0
+        self.plants = []
+        self.techniques = []
+        self.counts = np.zeros((0, 0), dtype=np.int64)
+        self._plant_index = {}
+        self._technique_index = {}
+
+    def add_results(self, text, results):
+        """
+        Count the plant and technique hits of one analysed document.
+
+        Args:
+            text (str): The analysed text
+            results (dict): Results from extract_gardening_entities (or a columnar view)
+
+        Returns:
+            CooccurrenceMatrix: self
+        """
+        normalise = get_default_matcher().normalise
+        plants, plant_ids = _intern(hit_texts(results['plant_names']), normalise)
+        techniques, technique_ids = _intern(hit_texts(results['gardening_techniques']), normalise)
+        plant_keys, radius = unit_keys(text, hit_starts(results['plant_names']), self.unit, self.window)
+        technique_keys, _ = unit_keys(text, hit_starts(results['gardening_techniques']), self.unit, self.window)
+
+        counts = pair_counts(plant_keys, plant_ids, technique_keys, technique_ids,
+                             (len(plants), len(techniques)), radius)
+        self._add(plants, techniques, counts)
+        self.documents += 1
+        return self
+
+    def merge(self, other):
+        """
+        Merge another matrix into this one.
+
+        Args:
+            other (CooccurrenceMatrix): Matrix over different documents, with the same unit
+
+        Returns:
+            CooccurrenceMatrix: self
+        """
+        if (other.unit, other.window) != (self.unit, self.window):
+            raise ValueError(f"Can't merge {other.describe()} co-occurrence counts into {self.describe()} counts")
+        self._add(other.plants, other.techniques, other.counts)
+        self.documents += other.documents
+        return self
+
+    def _add(self, plants, techniques, counts):
+        """Add a count matrix with its own row and column labels."""
+        rows = np.array([self._label_id(self.plants, self._plant_index, plant) for plant in plants], dtype=np.int64)
+        cols = np.array([self._label_id(self.techniques, self._technique_index, technique)
+                         for technique in techniques], dtype=np.int64)
+        if self.counts.shape != (len(self.plants), len(self.techniques)):
+            grown = np.zeros((len(self.plants), len(self.techniques)), dtype=np.int64)
+            grown[:self.counts.shape[0], :self.counts.shape[1]] = self.counts
+            self.counts = grown
+        if counts.size:
+            self.counts[np.ix_(rows, cols)] += counts
+
+    @staticmethod
+    def _label_id(labels, index, label):
+        label_id = index.get(label)
+        if label_id is None:
+            label_id = index[label] = len(labels)
+            labels.append(label)
+        return label_id
+
+    def describe(self):
+        """Return the unit as a short description, e.g. 'page' or '20-word window'."""
+        return f"{self.window}-word window" if self.unit == 'window' else self.unit
+
+    def pmi_pairs(self, min_count=DEFAULT_MIN_COUNT, top=None):
+        """
+        Rank plant-technique pairs by pointwise mutual information.
+
+        PMI is log2(p(plant, technique) / (p(plant) p(technique))) over all
+        counted pairs. Rare pairs get extreme PMI, so pairs counted fewer
+        than min_count times are left out.
+
+        Args:
+            min_count (int): Smallest pair count to rank
+            top (int, optional): Return only this many pairs
+
+        Returns:
+            list: {'plant', 'technique', 'count', 'pmi'} dicts, highest PMI first
+        """
+        total = self.counts.sum()
+        if total == 0:
+            return []
+        rows, cols = np.nonzero(self.counts >= max(min_count, 1))
+        counts = self.counts[rows, cols]
+        expected = self.counts.sum(axis=1)[rows] * self.counts.sum(axis=0)[cols] / total
+        pmi = np.log2(counts / expected)
+        # Highest PMI first, then the most frequent pair
+        order = np.lexsort((-counts, -pmi))[:top]
+        return [{'plant': self.plants[rows[i]], 'technique': self.techniques[cols[i]],
+                 'count': int(counts[i]), 'pmi': round(float(pmi[i]), 4)} for i in order]
+
+    def save(self, path):
+        """
+        Write the matrix to an .npz file.
+
+        Rows and columns are saved in label order, so the file doesn't depend
+        on the order the documents (or shards) were merged in.
+        """
+        meta = {'format': MATRIX_FORMAT, 'version': MATRIX_VERSION, 'unit': self.unit,
+                'window': self.window, 'documents': self.documents}
+        rows = sorted(range(len(self.plants)), key=self.plants.__getitem__)
+        cols = sorted(range(len(self.techniques)), key=self.techniques.__getitem__)
+        with open(path, 'wb') as f:
+            np.savez_compressed(f, meta=np.array(json.dumps(meta)),
+                                counts=self.counts[np.ix_(np.array(rows, dtype=np.int64),
+                                                          np.array(cols, dtype=np.int64))],
+                                plants=np.array([self.plants[i] for i in rows], dtype=str),
+                                techniques=np.array([self.techniques[i] for i in cols], dtype=str))
+
+    @classmethod
+    def load(cls, path):
+        """Read a matrix written by save()."""
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            if meta.get('format') != MATRIX_FORMAT:
+                raise ValueError(f"Not a {MATRIX_FORMAT} file: {path}")
+            if meta.get('version') != MATRIX_VERSION:
+                raise ValueError(f"Unsupported {MATRIX_FORMAT} version: {meta.get('version')}")
+            matrix = cls(meta['unit'], meta['window'] or DEFAULT_WINDOW)
+            matrix._add([str(p) for p in data['plants']], [str(t) for t in data['techniques']],
+                        data['counts'].astype(np.int64))
+        matrix.documents = meta['documents']
+        return matrix
+
+
+def print_pairs(matrix, min_count=DEFAULT_MIN_COUNT, top=30):
+    """Print the top PMI-ranked pairs of a matrix."""
+    pairs = matrix.pmi_pairs(min_count, top)
+    print(f"Plant x technique co-occurrence ({matrix.describe()}, {matrix.documents} documents, "
+          f"pairs counted at least {min_count} times):")
+    for pair in pairs:
+        print(f"   {pair['plant']} + {pair['technique']}: {pair['count']} (PMI {pair['pmi']:.2f})")
+    if not pairs:
+        print("   (none)")
+
+
+def main():
+    """Main function to build, merge and rank co-occurrence matrices."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Plant x technique co-occurrence counts and PMI rankings.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="Count co-occurrences in extracted text files")
+    build.add_argument("matrix", help="Matrix file to write (.npz)")
+    build.add_argument("text_files", nargs="+", help="Extracted text files")
+    build.add_argument("--unit", choices=UNITS, default=DEFAULT_UNIT, help="Co-occurrence unit (default: %(default)s)")
+    build.add_argument("--window", type=int, default=DEFAULT_WINDOW,
+                       help="Window size in words for --unit window (default: %(default)s)")
+
+    merge = commands.add_parser("merge", help="Merge matrix files into a corpus matrix")
+    merge.add_argument("matrix", help="Matrix file to write (.npz)")
+    merge.add_argument("inputs", nargs="+", help="Matrix files to merge")
+
+    top = commands.add_parser("top", help="Print the PMI-ranked pairs of a matrix file")
+    top.add_argument("matrix", help="Matrix file (.npz)")
+
+    for command in (build, merge, top):
+        command.add_argument("--min-count", type=int, default=DEFAULT_MIN_COUNT,
+                             help="Smallest pair count to rank (default: %(default)s)")
+        command.add_argument("--top", type=int, default=30, help="Number of pairs to show (default: 30)")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        matcher = get_default_matcher()
+        matrix = CooccurrenceMatrix(args.unit, args.window)
+        for path in args.text_files:
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+            matrix.add_results(text, matcher.find_tables(text, ['plant_names', 'gardening_techniques']))
+    elif args.command == "merge":
+        matrix = CooccurrenceMatrix.load(args.inputs[0])
+        for path in args.inputs[1:]:
+            matrix.merge(CooccurrenceMatrix.load(path))
+    else:
+        matrix = CooccurrenceMatrix.load(args.matrix)
+
+    if args.command != "top":
+        matrix.save(args.matrix)
+        print(f"✅ Matrix saved to: {args.matrix} ({len(matrix.plants)} plants x {len(matrix.techniques)} techniques)")
+    print_pairs(matrix, args.min_count, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@ This script demonstrates how to use the fitz library to extract text from PDFs.
 
 import fitz
 import os
+from pdf_extractor import iter_pages
 
 def simple_extract_example(pdf_path):
     """
@@ -32,31 +33,28 @@ def simple_extract_example(pdf_path):
     # Close the document
     doc.close()
 
-def extract_all_pages(pdf_path):
+def extract_all_pages(pdf_path, workers=1):
     """
     Extract text from all pages of a PDF.
     
+    Pages are streamed to the output file as they are extracted, so the
+    whole text is never held in memory.
+    
     Args:
         pdf_path (str): Path to the PDF file
+        workers (int): Number of worker processes
+        
+    Returns:
+        str: Path of the saved text file
     """
-    doc = fitz.open(pdf_path)
-    
-    all_text = ""
-    for page_num in range(len(doc)):
-        page = doc.load_page(page_num)
-        page_text = page.get_text()
-        all_text += f"\n--- Page {page_num + 1} ---\n"
-        all_text += page_text
-    
-    doc.close()
-    
-    # Save to file
     output_file = f"{os.path.splitext(os.path.basename(pdf_path))[0]}_full_text.txt"
     with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(all_text)
+        for page_num, page_text in iter_pages(pdf_path, workers=workers):
+            f.write(f"\n--- Page {page_num + 1} ---\n")
+            f.write(page_text)
     
     print(f"Full text saved to: {output_file}")
-    return all_text
+    return output_file
 
 if __name__ == "__main__":
     # Example usage - replace with your actual PDF path
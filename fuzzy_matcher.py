@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+OCR-tolerant fuzzy matching of the gardening lexicon.
+
+Text extracted from scanned guides has misspellings and OCR errors
+('tomatoe', 'brocoli') that exact matching misses. FuzzyIndex finds lexicon
+terms within a small edit distance using a SymSpell-style deletion index:
+every lexicon variant is stored under all strings obtained by deleting up
+to max_distance characters, so a word's candidates are found by looking up
+its own deletions, and only those few candidates get a full
+Damerau-Levenshtein check. No word is compared against the whole lexicon.
+
+The index is built once per lexicon and distance and cached on disk
+(default ~/.cache/gardening_mvp/fuzzy), keyed by the lexicon's hash.
+
+Short words are too easily confused with ordinary English ('needs' is one
+edit from 'seeds', 'simmer' from 'summer'), so a match at distance d needs
+both the word and the lexicon term to be at least MIN_LENGTHS[d]
+characters long, and by default the first letter must match. The one
+exception is a word split by OCR: a run of words that joins into a term of
+at least MIN_SPLIT_LENGTH letters ('autum n') is matched at one edit per
+removed space.
+
+Only plausible OCR errors are reported. A single word is skipped when it is
+a regular inflection of the term it is close to ('vegetables', 'harvested')
+or a real word: one that occurs more than once in the text, or whose base
+form occurs in it ('showing' beside 'show', 'soaking' beside 'soak').
+
+Usage:
+    python fuzzy_matcher.py indolent_kitchen_gardening_extracted.txt --max-distance 2
+"""
+
+import hashlib
+import json
+import os
+import pickle
+from collections import Counter
+
+from page_cache import write_atomic
+from term_matcher import WORD_RE, expand_pattern, get_default_matcher
+
+# Bump when the index layout or matching rules change
+FUZZY_VERSION = 3
+
+DEFAULT_MAX_DISTANCE = 1
+DEFAULT_FUZZY_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'gardening_mvp', 'fuzzy')
+
+# Minimum length of both the word (or phrase) and the term for each edit distance
+MIN_LENGTHS = {1: 7, 2: 10}
+# Minimum length of a term matched by joining a word split by spaces
+MIN_SPLIT_LENGTH = 5
+# Regular suffixes stripped to find a word's base forms: suffix -> endings put back
+INFLECTIONS = {
+    'ies': ('y',),
+    'ied': ('y',),
+    'es': ('',),
+    's': ('',),
+    'ed': ('', 'e'),
+    'ing': ('', 'e'),
+}
+
+
+def edit_distance(a, b, limit):
+    """
+    Return the optimal string alignment (Damerau-Levenshtein) distance of two strings.
+
+    Args:
+        a (str): First string
+        b (str): Second string
+        limit (int): Stop early and return limit + 1 once the distance exceeds limit
+
+    Returns:
+        int: Edit distance, or limit + 1 if it is greater than limit
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous_previous, previous = previous, current
+    return previous[-1] if previous[-1] <= limit else limit + 1
+
+
+def _deletes(word, max_distance):
+    """Return every string made by deleting up to max_distance characters from word."""
+    results = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        results |= frontier
+    return results
+
+
+def base_forms(word):
+    """
+    Return the forms of a word with a regular inflection removed.
+
+    'plantings' gives 'planting', 'harvested' gives 'harvest' and 'harveste',
+    and a doubled final consonant is undone ('planning' gives 'plan').
+
+    Args:
+        word (str): Lowercase word
+
+    Returns:
+        set: Possible base forms, not including the word itself
+    """
+    forms = set()
+    for suffix, endings in INFLECTIONS.items():
+        stem = word[:-len(suffix)]
+        if not word.endswith(suffix) or len(stem) < 2:
+            continue
+        forms.update(stem + ending for ending in endings)
+        if suffix in ('ed', 'ing') and len(stem) > 2 and stem[-1] == stem[-2]:
+            forms.add(stem[:-1])
+    return forms
+
+
+def allowed_distance(length, max_distance):
+    """Return the largest edit distance allowed for a word of the given length."""
+    allowed = 0
+    for distance in range(1, max_distance + 1):
+        if length >= MIN_LENGTHS.get(distance, MIN_LENGTHS[max(MIN_LENGTHS)]):
+            allowed = distance
+    return allowed
+
+
+class FuzzyIndex:
+    """SymSpell-style deletion index over the lexicon variants."""
+
+    def __init__(self, matcher, max_distance=DEFAULT_MAX_DISTANCE):
+        """
+        Build the index.
+
+        Args:
+            matcher (TermMatcher): Lexicon to index
+            max_distance (int): Largest edit distance that will be matched
+        """
+        self.max_distance = max_distance
+        # Term id -> lexicon variant, its canonical form and its (key, category) groups
+        self.terms = []
+        self.canonical = []
+        self.targets = []
+        self.deletes = {}
+
+        term_ids = {}
+        for (key, category), patterns in zip(matcher.groups, matcher.patterns):
+            for fragment in patterns:
+                for variant in expand_pattern(fragment):
+                    term_id = term_ids.get(variant)
+                    if term_id is None:
+                        term_id = term_ids[variant] = len(self.terms)
+                        self.terms.append(variant)
+                        self.canonical.append(matcher.canonical[variant])
+                        self.targets.append([])
+                    if (key, category) not in self.targets[term_id]:
+                        self.targets[term_id].append((key, category))
+
+        for term_id, term in enumerate(self.terms):
+            for deleted in _deletes(term, allowed_distance(len(term), max_distance)):
+                self.deletes.setdefault(deleted, []).append(term_id)
+
+        # OCR can split a word in two, so phrases may have one more token than the longest term
+        self.max_tokens = max(term.count(' ') + 1 for term in self.terms) + 1
+        self.term_ids = term_ids
+        self.max_length = max(len(term) for term in self.terms) + max_distance
+        # First letter -> term lengths, to skip lookups that can't succeed
+        self.lengths = {}
+        for term in self.terms:
+            self.lengths.setdefault(term[0], set()).add(len(term))
+
+    def lookup(self, word, same_first_letter=True):
+        """
+        Find the closest lexicon terms to a word or phrase.
+
+        Args:
+            word (str): Lowercase word, or words joined by single spaces
+            same_first_letter (bool): Only accept terms with the same first letter
+
+        Returns:
+            tuple: (distance, list of term ids); (None, []) if nothing is close enough
+        """
+        if ' ' in word:
+            # A word split by OCR is matched whatever its length
+            joined = word.replace(' ', '')
+            term_id = self.term_ids.get(joined)
+            if (term_id is not None and len(joined) >= MIN_SPLIT_LENGTH
+                    and len(word) - len(joined) <= self.max_distance):
+                return len(word) - len(joined), [term_id]
+        limit = allowed_distance(len(word), self.max_distance)
+        if limit == 0:
+            term_id = self.term_ids.get(word)
+            return (None, []) if term_id is None else (0, [term_id])
+        if same_first_letter:
+            lengths = self.lengths.get(word[0], ())
+            if not any(len(word) + change in lengths for change in range(-limit, limit + 1)):
+                return None, []
+        best_distance = None
+        best = []
+        seen = set()
+        for deleted in _deletes(word, limit):
+            for term_id in self.deletes.get(deleted, ()):
+                if term_id in seen:
+                    continue
+                seen.add(term_id)
+                term = self.terms[term_id]
+                if same_first_letter and term[0] != word[0]:
+                    continue
+                distance = edit_distance(word, term, min(limit, allowed_distance(len(term), self.max_distance)))
+                if distance > limit:
+                    continue
+                if best_distance is None or distance < best_distance:
+                    best_distance, best = distance, [term_id]
+                elif distance == best_distance:
+                    best.append(term_id)
+        return best_distance, sorted(best)
+
+    def find(self, text, keys=None, same_first_letter=True, include_exact=False, skip_real_words=True):
+        """
+        Find fuzzy lexicon matches in text.
+
+        Phrases are matched over runs of alphabetic words separated by single
+        spaces (OCR often splits a word, e.g. 'autum n'). At each position the
+        closest match wins, and the longest run among equally close ones.
+        Matched words are not matched again. Variants of one term that are
+        equally close (e.g. 'tomatoes' and 'tomato' for 'tomatoe') give a
+        single hit.
+
+        A single word that is a regular inflection of its term, or a real
+        word judged by the rest of the text (see the module docstring), is
+        not matched unless skip_real_words is False.
+
+        Args:
+            text (str): Text to scan
+            keys (iterable, optional): Only report these result keys
+            same_first_letter (bool): Only accept terms with the same first letter
+            include_exact (bool): Also report exact matches (distance 0)
+            skip_real_words (bool): Skip inflections of the term and real words
+
+        Returns:
+            list: {'text', 'start', 'end', 'category', 'section', 'canonical', 'distance'} dicts
+        """
+        wanted = None if keys is None else set(keys)
+        tokens = [(m.start(), m.end(), m.group().lower()) for m in WORD_RE.finditer(text)]
+        if skip_real_words:
+            counts = Counter(token[2] for token in tokens)
+        lookups = {}
+        hits = []
+        i = 0
+        while i < len(tokens):
+            match = None
+            for count in range(1, self.max_tokens + 1):
+                window = tokens[i:i + count]
+                if len(window) < count or not window[-1][2].isalpha():
+                    break
+                if count > 1 and text[window[-2][1]:window[-1][0]] != ' ':
+                    break
+                phrase = ' '.join(token[2] for token in window)
+                if len(phrase) > self.max_length:
+                    break
+                if phrase not in lookups:
+                    lookups[phrase] = self.lookup(phrase, same_first_letter)
+                    if (skip_real_words and count == 1 and lookups[phrase][0]
+                            and self._is_real_word(phrase, lookups[phrase][1], counts)):
+                        lookups[phrase] = (None, [])
+                distance, term_ids = lookups[phrase]
+                if distance is not None and (match is None or distance <= match[1]):
+                    match = (count, distance, term_ids)
+            if match is None:
+                i += 1
+                continue
+
+            count, distance, term_ids = match
+            start, end = tokens[i][0], tokens[i + count - 1][1]
+            if distance > 0 or include_exact:
+                reported = set()
+                for term_id in term_ids:
+                    for key, category in self.targets[term_id]:
+                        target = (key, category, self.canonical[term_id])
+                        if (wanted is None or key in wanted) and target not in reported:
+                            reported.add(target)
+                            hits.append({
+                                'text': text[start:end],
+                                'start': start,
+                                'end': end,
+                                'category': category,
+                                'section': key,
+                                'canonical': self.canonical[term_id],
+                                'distance': distance
+                            })
+            i += count
+        return hits
+
+    def _is_real_word(self, word, term_ids, counts):
+        """Return whether a word close to the given terms inflects one of them or is a real word."""
+        forms = base_forms(word)
+        if any(self.terms[term_id] in forms for term_id in term_ids):
+            return True
+        return counts[word] > 1 or any(form in counts for form in forms)
+
+
+def _index_key(matcher, max_distance):
+    spec = [FUZZY_VERSION, max_distance, MIN_LENGTHS, [matcher.fingerprint(key) for key in matcher.keys]]
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def load_index(matcher=None, max_distance=DEFAULT_MAX_DISTANCE, cache_dir=DEFAULT_FUZZY_CACHE_DIR):
+    """
+    Return the fuzzy index for a lexicon, from the disk cache when possible.
+
+    Args:
+        matcher (TermMatcher, optional): Lexicon; defaults to gardening_terms.py
+        max_distance (int): Largest edit distance that will be matched
+        cache_dir (str, optional): Cache directory, or None to always rebuild
+
+    Returns:
+        FuzzyIndex: The index
+    """
+    matcher = matcher or get_default_matcher()
+    if not cache_dir:
+        return FuzzyIndex(matcher, max_distance)
+
+    path = os.path.join(cache_dir, _index_key(matcher, max_distance) + '.pickle')
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        pass
+
+    index = FuzzyIndex(matcher, max_distance)
+    write_atomic(path, pickle.dumps(index, protocol=pickle.HIGHEST_PROTOCOL))
+    return index
+
+
+def main():
+    """Main function to list fuzzy lexicon matches in a text file."""
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Find misspelt or OCR-damaged gardening terms in a text file.")
+    parser.add_argument("text_file", help="Extracted text file")
+    parser.add_argument("--max-distance", type=int, default=DEFAULT_MAX_DISTANCE, choices=[1, 2],
+                        help="Largest edit distance to match (default: %(default)s)")
+    parser.add_argument("--any-first-letter", action="store_true",
+                        help="Also match words whose first letter differs from the term's")
+    parser.add_argument("--real-words", action="store_true",
+                        help="Also match inflections of terms and words that occur elsewhere in the text")
+    parser.add_argument("--top", type=int, default=30, help="Number of distinct matches to show (default: 30)")
+    args = parser.parse_args()
+
+    with open(args.text_file, 'r', encoding='utf-8') as f:
+        text = f.read()
+
+    start = time.perf_counter()
+    index = load_index(max_distance=args.max_distance)
+    loaded = time.perf_counter()
+    hits = index.find(text, same_first_letter=not args.any_first_letter,
+                      skip_real_words=not args.real_words)
+    elapsed = time.perf_counter() - loaded
+
+    counts = Counter((hit['text'].lower(), hit['canonical'], hit['distance']) for hit in hits)
+    for (found, canonical, distance), count in counts.most_common(args.top):
+        print(f"{found} -> {canonical} (distance {distance}): {count}")
+    print(f"{len(hits)} fuzzy matches; index loaded in {(loaded - start) * 1000:.1f} ms, "
+          f"text scanned in {elapsed:.2f}s ({len(text) / max(elapsed, 1e-9) / 1e6:.2f} M chars/s)")
+
+
+if __name__ == "__main__":
+    main()
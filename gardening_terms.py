@@ -1,13 +1,13 @@
 PLANT_CATEGORIES = {
     'vegetable': [
         r'carrots?', r'beetroots?', r'broccolis?', r'cabbages?', r'cauliflowers?', r'lettuces?', r'spinach', r'silverbeet',
-        r'peas?', r'beans?', r'zucchinis?', r'pumpkins?', r'potatoes?', r'onions?', r'leeks?', r'radishes?', r'turnips?',
-        r'parsnips?', r'celery', r'spring onions?', r'garlic', r'tomatoes?', r'capsicums?', r'bell peppers?', r'chillies?', 
+        r'peas?', r'beans?', r'zucchinis?', r'pumpkins?', r'potato(es)?', r'onions?', r'leeks?', r'radish(es)?', r'turnips?',
+        r'parsnips?', r'celery', r'spring onions?', r'garlic', r'tomato(es)?', r'capsicums?', r'bell peppers?', r'chilli(es)?', 
         r'cucumbers?', r'squash', r'corn', r'kale', r'brussels sprouts?'
     ],
     'fruit': [
-        r'apples?', r'pears?', r'plums?', r'cherries?', r'peaches?', r'nectarines?', r'apricots?', r'quinces?', r'figs?',
-        r'strawberries?', r'raspberries?', r'blackberries?', r'blueberries?', r'grapes?', r'gooseberries?', r'currants?',
+        r'apples?', r'pears?', r'plums?', r'cherr(ies|y)', r'peach(es)?', r'nectarines?', r'apricots?', r'quinces?', r'figs?',
+        r'strawberr(ies|y)', r'raspberr(ies|y)', r'blackberr(ies|y)', r'blueberr(ies|y)', r'grapes?', r'gooseberr(ies|y)', r'currants?',
         r'lemons?', r'mandarins?', r'avocados?'
     ],
     'herb': [
@@ -0,0 +1,215 @@
+"""
+Spilling hits to disk and streaming them back out as the standard JSON.
+
+A HitSpill appends (text, start, end, value) rows to one temporary file per
+key (an entity label, or a lexicon section and group), so an analysis can
+run over a document piece by piece without keeping its hits in memory.
+write_json streams results to a file in exactly the layout
+json.dump(results, f, indent=2, ensure_ascii=False) produces, taking hit
+lists as iterators (e.g. over a spill) instead of lists. write_results
+streams a whole analysis spilled this way into the usual results file.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from collections.abc import Iterator
+
+from match_table import json_default
+from streaming_summary import SummaryAggregator
+
+# Plain list items write_json dumps with one json.dumps call
+WRITE_BATCH = 1000
+
+
+class HitSpill:
+    """Hit rows in per-key temporary files, read back in the order they were appended."""
+
+    def __init__(self, directory=None):
+        """
+        Args:
+            directory (str, optional): Parent directory for the spill files;
+                defaults to the system temporary directory
+        """
+        self.path = tempfile.mkdtemp(prefix='gardening_spill_', dir=directory)
+        self._files = {}
+        self._counts = {}
+
+    def append(self, key, rows):
+        """
+        Append hit rows under a key.
+
+        Args:
+            key: Hashable key, e.g. a label or a (section, group) tuple
+            rows (iterable): (text, start, end, value) tuples, optionally
+                followed by extra fields
+        """
+        f = self._files.get(key)
+        if f is None:
+            f = self._files[key] = open(os.path.join(self.path, f"{len(self._files)}.ndjson"), 'w+',
+                                        encoding='utf-8')
+            self._counts[key] = 0
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False))
+            f.write('\n')
+            self._counts[key] += 1
+
+    def count(self, key):
+        """Return the number of rows stored under a key."""
+        return self._counts.get(key, 0)
+
+    def rows(self, key):
+        """Iterate over the rows stored under a key, as (text, start, end, value) tuples."""
+        f = self._files.get(key)
+        if f is None:
+            return
+        f.flush()
+        with open(f.name, 'r', encoding='utf-8') as reader:
+            for line in reader:
+                yield tuple(json.loads(line))
+
+    def hits(self, keys, field):
+        """
+        Iterate over hit dicts for several keys in turn.
+
+        Args:
+            keys (iterable): Keys, in output order
+            field (str): Name of the value field: 'category' or 'label'
+
+        Yields:
+            dict: {'text', 'start', 'end', field} hits
+        """
+        for key in keys:
+            for text, start, end, value, *_ in self.rows(key):
+                yield {'text': text, 'start': start, 'end': end, field: value}
+
+    def close(self):
+        """Delete the spill files."""
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+
+def _streams(value):
+    """Return True if a value has to be written by write_json rather than json.dumps."""
+    if isinstance(value, dict):
+        return any(map(_streams, value.values()))
+    return isinstance(value, Iterator) or callable(value)
+
+
+def write_json(results, f, level=0):
+    """
+    Write results as indented JSON, streaming any iterator values.
+
+    The output is byte-identical to json.dump(results, f, indent=2,
+    ensure_ascii=False) with the iterators replaced by lists. Callable
+    values are called when they are reached, so e.g. a summary counted
+    while the hit lists are written can come after them.
+
+    Args:
+        results (dict): Results; values may be iterators or callables
+        f (file): Text file to write to
+        level (int): Indentation level (for nested calls)
+    """
+    if callable(results):
+        results = results()
+    pad = '  ' * (level + 1)
+    if isinstance(results, dict) and results and any(map(_streams, results.values())):
+        f.write('{')
+        for i, (key, value) in enumerate(results.items()):
+            f.write(('\n' if i == 0 else ',\n') + pad + json.dumps(key, ensure_ascii=False) + ': ')
+            write_json(value, f, level + 1)
+        f.write('\n' + '  ' * level + '}')
+    elif isinstance(results, Iterator):
+        empty = True
+        batch = []
+
+        def flush():
+            # A dumped list is '[', then each item on a new line, then '\n]'
+            nonlocal empty
+            if batch:
+                text = json.dumps(batch, indent=2, ensure_ascii=False, default=json_default)
+                f.write(('[' if empty else ',') + text[1:-2].replace('\n', '\n' + '  ' * level))
+                batch.clear()
+                empty = False
+
+        for item in results:
+            if _streams(item):
+                flush()
+                f.write(('[\n' if empty else ',\n') + pad)
+                write_json(item, f, level + 1)
+                empty = False
+            else:
+                # Plain items, e.g. hit dicts, are dumped in batches
+                batch.append(item)
+                if len(batch) >= WRITE_BATCH:
+                    flush()
+        flush()
+        f.write('[]' if empty else '\n' + '  ' * level + ']')
+    else:
+        # Strings are escaped, so every newline here is layout and can be re-indented
+        text = json.dumps(results, indent=2, ensure_ascii=False, default=json_default)
+        f.write(text.replace('\n', '\n' + '  ' * level))
+
+
+def write_results(spill, output_path, ranks, pipeline, extra=None):
+    """
+    Stream spilled hits into a results file, counting the summary on the way.
+
+    Entities are spilled under their label and lexicon hits under
+    (section, group rank); rows may carry a fifth field, the normalised
+    text that was matched, which the summary counts instead. The file
+    matches ner_analyzer.save_results for the same hits.
+
+    Args:
+        spill (HitSpill): The spilled hits
+        output_path (str): Results file to write
+        ranks (dict): (section, category) -> rank of the group in TermMatcher.groups
+        pipeline (dict): Pipeline description, or None without NER
+        extra (dict, optional): Further result keys written after 'pipeline'
+
+    Returns:
+        dict: Summary
+    """
+    from ner_analyzer import ENTITY_LABELS, LEXICON_STAGES
+
+    aggregator = SummaryAggregator()
+    adders = {
+        'gardening_terms': aggregator.add_gardening_terms,
+        'plant_names': aggregator.add_plant_names,
+        'gardening_techniques': aggregator.add_techniques
+    }
+
+    def counted(keys, field, add):
+        for key in keys:
+            for row in spill.rows(key):
+                # Normalised runs count the text that was analysed
+                add((row[4] if len(row) > 4 else row[0],))
+                yield {'text': row[0], 'start': row[1], 'end': row[2], field: row[3]}
+
+    results = {
+        'standard_entities': {
+            label: counted([label], 'label', lambda texts, label=label: aggregator.add_entities(label, texts))
+            for label in ENTITY_LABELS
+        }
+    }
+    groups = sorted(ranks.items(), key=lambda item: item[1])
+    for section in LEXICON_STAGES:
+        keys = [(section, rank) for (key, _), rank in groups if key == section]
+        results[section] = counted(keys, 'category', adders[section])
+    results['summary'] = aggregator.summary
+    results['pipeline'] = pipeline
+    results.update(extra or {})
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        write_json(results, f)
+    return aggregator.summary()
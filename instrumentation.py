@@ -0,0 +1,194 @@
+"""
+Per-stage timing and counter instrumentation for the analysers.
+
+An Instrumentation object hands out stage timers:
+
+    with instrumentation.stage('lexicon', chars=len(text)) as stage:
+        matches = matcher.find_all(text)
+        stage.add(hits=sum(len(v) for v in matches.values()))
+
+When instrumentation is disabled, stage() returns a shared no-op timer,
+so the calls can stay in place in production at practically no cost.
+Enabled, each stage records wall time, character/token/hit counts, the
+process's peak RSS and, optionally, the tracemalloc peak and a cProfile
+profile. A callback can be attached to export each stage's metrics.
+"""
+
+import time
+
+# Metrics that keep their largest value rather than being summed across calls
+PEAK_METRICS = ('max_rss_bytes', 'tracemalloc_peak_bytes')
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+def max_rss_bytes():
+    """Return the peak resident set size of this process in bytes, or None."""
+    if resource is None:
+        return None
+    import sys
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+class _NullStage:
+    """Stage timer used when instrumentation is disabled; does nothing."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def add(self, **counts):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class StageTimer:
+    """Times one run of a stage and collects its counters."""
+
+    def __init__(self, instrumentation, name, chars=None):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.counts = {}
+        if chars is not None:
+            self.counts['chars'] = chars
+        self.seconds = None
+        self.tracemalloc_peak = None
+        self.max_rss = None
+        self._start = None
+
+    def add(self, **counts):
+        """Add to this stage's counters, e.g. add(tokens=120, hits=4)."""
+        for key, value in counts.items():
+            self.counts[key] = self.counts.get(key, 0) + value
+
+    def __enter__(self):
+        inst = self.instrumentation
+        if inst.trace_memory:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        if inst.profiler is not None:
+            inst.profiler.enable()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.seconds = time.perf_counter() - self._start
+        inst = self.instrumentation
+        if inst.profiler is not None:
+            inst.profiler.disable()
+        if inst.trace_memory:
+            import tracemalloc
+            self.tracemalloc_peak = tracemalloc.get_traced_memory()[1]
+        self.max_rss = max_rss_bytes()
+        inst._record(self)
+        return False
+
+
+class Instrumentation:
+    """
+    Collects per-stage metrics for an analyser.
+
+    Metrics for repeated runs of the same stage (e.g. one per document) are
+    accumulated under the stage name. They are also collected separately
+    since the last begin_scope() call, so each document's results can
+    report its own stages.
+    """
+
+    def __init__(self, enabled=False, trace_memory=False, callback=None, cprofile=False):
+        """
+        Args:
+            enabled (bool): Record metrics. When False every stage is a no-op.
+            trace_memory (bool): Also record the tracemalloc peak per stage
+                (slows the analysis down noticeably)
+            callback (callable, optional): Called as callback(name, metrics)
+                after each stage with that run's own metrics ('calls' is 1),
+                e.g. to export metrics
+            cprofile (bool): Run stages under cProfile; see dump_profile()
+        """
+        self.enabled = enabled
+        self.trace_memory = enabled and trace_memory
+        self.callback = callback
+        self.profiler = None
+        if enabled and cprofile:
+            import cProfile
+            self.profiler = cProfile.Profile()
+        self.stages = {}
+        self.scope_stages = {}
+
+    def begin_scope(self):
+        """Start collecting the metrics reported by report(scoped=True) afresh, e.g. for a new document."""
+        self.scope_stages = {}
+
+    def stage(self, name, chars=None):
+        """
+        Return a context manager timing one run of a stage.
+
+        Args:
+            name (str): Stage name
+            chars (int, optional): Number of characters the stage processes
+
+        Returns:
+            Context manager whose add(**counts) method records counters
+        """
+        if not self.enabled:
+            return _NULL_STAGE
+        return StageTimer(self, name, chars)
+
+    def _record(self, timer):
+        run = {'calls': 1, 'seconds': timer.seconds}
+        run.update(timer.counts)
+        if timer.max_rss is not None:
+            run['max_rss_bytes'] = timer.max_rss
+        if timer.tracemalloc_peak is not None:
+            run['tracemalloc_peak_bytes'] = timer.tracemalloc_peak
+        for stages in (self.scope_stages, self.stages):
+            metrics = stages.setdefault(timer.name, {'calls': 0, 'seconds': 0.0})
+            for key, value in run.items():
+                if key in PEAK_METRICS:
+                    metrics[key] = max(metrics.get(key, 0), value)
+                else:
+                    metrics[key] = metrics.get(key, 0) + value
+        if self.callback is not None:
+            self.callback(timer.name, run)
+
+    def report(self, scoped=False):
+        """
+        Return the collected metrics.
+
+        Args:
+            scoped (bool): Only the metrics recorded since begin_scope()
+
+        Returns:
+            dict: Stage name -> metrics ('calls', 'seconds', counters and memory)
+        """
+        stages = self.scope_stages if scoped else self.stages
+        return {name: dict(metrics) for name, metrics in stages.items()}
+
+    def print_table(self):
+        """Print a table of the collected stage metrics."""
+        print("\n" + "="*82)
+        print("⏱️  STAGE TIMINGS")
+        print("="*82)
+        print(f"{'Stage':<22}{'Calls':>6}{'Time (ms)':>12}{'Chars':>12}{'Tokens':>10}{'Hits':>8}{'Peak RSS MB':>12}")
+        for name, metrics in self.stages.items():
+            rss = metrics.get('max_rss_bytes')
+            print(f"{name:<22}{metrics['calls']:>6}{metrics['seconds'] * 1000:>12.1f}"
+                  f"{metrics.get('chars', ''):>12}{metrics.get('tokens', ''):>10}{metrics.get('hits', ''):>8}"
+                  f"{'' if rss is None else f'{rss / (1024 * 1024):.1f}':>12}")
+        print("="*82)
+
+    def dump_profile(self, path):
+        """Write the cProfile statistics gathered across stages to path."""
+        if self.profiler is not None:
+            self.profiler.dump_stats(path)
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+The compiled gardening lexicon: loaded once, validated and cached on disk.
+
+gardening_terms.py is the source of the term lists. It is read as data
+(its assignments are parsed, never imported or executed), validated, and
+compiled into a TermMatcher. The validated term groups are saved as a
+versioned JSON artifact (default ~/.cache/gardening_mvp/lexicon, or
+$GARDENING_LEXICON_CACHE; set it empty to disable) keyed by the SHA-256 of
+the source file, so later processes skip parsing and validating the source
+and only rebuild the trie. The artifact is plain data, never unpickled, and
+is only used if the source digest and lexicon hash recorded in it match. If
+the cache directory can't be written the lexicon is simply compiled.
+
+Every analysis result carries the lexicon's hash under 'lexicon_hash', the
+same hash the stage cache and fuzzy index are keyed on, so results produced
+with an older lexicon can be recognised and recomputed (batch_runner.py
+does so). Long-running processes use a LexiconReloader to pick up edits to
+the source file without restarting (see ner_server.py).
+
+Usage:
+    python lexicon.py              # validate, build the artifact and time loading it
+    python lexicon.py --check      # only validate the source
+"""
+
+import ast
+import json
+import os
+
+from page_cache import file_hash, write_atomic
+from term_matcher import MATCHER_VERSION, TermMatcher, expand_pattern
+
+# Bump when the artifact layout changes
+LEXICON_VERSION = 1
+LEXICON_FORMAT = 'gardening-lexicon'
+
+DEFAULT_LEXICON_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gardening_terms.py')
+DEFAULT_LEXICON_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'gardening_mvp', 'lexicon')
+# Environment variable overriding the artifact directory; empty disables artifacts
+LEXICON_CACHE_ENV = 'GARDENING_LEXICON_CACHE'
+
+# Term lists read from the source: name -> whether it maps categories to lists
+TERM_LISTS = {
+    'GARDENING_TERMS': False,
+    'PLANT_CATEGORIES': True,
+    'GARDENING_TECHNIQUES': False
+}
+
+# The process-wide lexicon behind term_matcher.get_default_matcher
+_default = None
+
+
+def read_term_lists(source):
+    """
+    Read the term lists from a lexicon source file without executing it.
+
+    Args:
+        source (str): Python file assigning the TERM_LISTS names to literals
+
+    Returns:
+        dict: Name -> list of patterns, or category -> list for PLANT_CATEGORIES
+
+    Raises:
+        ValueError: If the file can't be parsed or a list is missing or not a literal
+    """
+    with open(source, 'r', encoding='utf-8') as f:
+        try:
+            tree = ast.parse(f.read(), filename=source)
+        except SyntaxError as e:
+            raise ValueError(f"Could not parse lexicon source {source}: {e}") from None
+
+    term_lists = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            name = node.targets[0].id
+            if name in TERM_LISTS:
+                try:
+                    term_lists[name] = ast.literal_eval(node.value)
+                except ValueError:
+                    raise ValueError(f"{name} in {source} must be a literal") from None
+    missing = [name for name in TERM_LISTS if name not in term_lists]
+    if missing:
+        raise ValueError(f"Lexicon source {source} does not define {', '.join(missing)}")
+    return term_lists
+
+
+def build_groups(term_lists):
+    """
+    Return the TermMatcher groups for term lists, in result order.
+
+    Args:
+        term_lists (dict): Output of read_term_lists
+
+    Returns:
+        tuple: (key, category, tuple_of_patterns) tuples
+    """
+    groups = [('gardening_terms', 'gardening_term', tuple(term_lists['GARDENING_TERMS']))]
+    for category, patterns in term_lists['PLANT_CATEGORIES'].items():
+        groups.append(('plant_names', category, tuple(patterns)))
+    groups.append(('gardening_techniques', 'gardening_technique', tuple(term_lists['GARDENING_TECHNIQUES'])))
+    return tuple(groups)
+
+
+def validate_term_lists(term_lists):
+    """
+    Check term lists for mistakes the matcher would silently accept or fail on.
+
+    Args:
+        term_lists (dict): Output of read_term_lists
+
+    Returns:
+        list: Problems found, as messages; empty if the lists are valid
+    """
+    problems = []
+    for name, by_category in TERM_LISTS.items():
+        value = term_lists[name]
+        if by_category:
+            if not isinstance(value, dict) or not value:
+                problems.append(f"{name} must be a non-empty dict of category -> list of patterns")
+                continue
+            lists = [(f"{name}[{category!r}]", patterns) for category, patterns in value.items()]
+        else:
+            lists = [(name, value)]
+
+        for where, patterns in lists:
+            if not isinstance(patterns, (list, tuple)) or not patterns:
+                problems.append(f"{where} must be a non-empty list of patterns")
+                continue
+            # Lowercase variant -> the pattern that produced it first
+            seen = {}
+            for pattern in patterns:
+                if not isinstance(pattern, str):
+                    problems.append(f"{where}: {pattern!r} is not a string")
+                    continue
+                try:
+                    variants = expand_pattern(pattern)
+                except ValueError as e:
+                    problems.append(f"{where}: {e}")
+                    continue
+                for variant in variants:
+                    if variant in seen:
+                        problems.append(f"{where}: {pattern!r} repeats {variant!r} from {seen[variant]!r}")
+                    else:
+                        seen[variant] = pattern
+    return problems
+
+
+class Lexicon:
+    """A validated, compiled lexicon and the source it was built from."""
+
+    def __init__(self, matcher, source, source_digest):
+        """
+        Args:
+            matcher (TermMatcher): Compiled matcher
+            source (str): Path of the source file
+            source_digest (str): SHA-256 of the source file the matcher was built from
+        """
+        self.matcher = matcher
+        self.source = source
+        self.source_digest = source_digest
+
+    @property
+    def hash(self):
+        """Hash of the lexicon's content, as reported in analysis results."""
+        return self.matcher.hash
+
+    def describe(self):
+        """Return a summary of the lexicon."""
+        return {
+            'source': self.source,
+            'hash': self.hash,
+            'groups': len(self.matcher.groups),
+            'patterns': sum(len(patterns) for patterns in self.matcher.patterns),
+            'variants': len(self.matcher.canonical)
+        }
+
+
+def compile_lexicon(source=DEFAULT_LEXICON_SOURCE):
+    """
+    Read, validate and compile a lexicon source file.
+
+    Args:
+        source (str): Lexicon source file
+
+    Returns:
+        Lexicon: The compiled lexicon
+
+    Raises:
+        ValueError: If the source is invalid; the message lists every problem
+    """
+    digest = file_hash(source)
+    term_lists = read_term_lists(source)
+    problems = validate_term_lists(term_lists)
+    if problems:
+        raise ValueError(f"Invalid lexicon {source}:\n  " + "\n  ".join(problems))
+    return Lexicon(TermMatcher(build_groups(term_lists)), source, digest)
+
+
+def _artifact_path(cache_dir, digest):
+    return os.path.join(cache_dir, f"{digest}.v{LEXICON_VERSION}.{MATCHER_VERSION}.json")
+
+
+def lexicon_cache_dir():
+    """Return the artifact directory: $GARDENING_LEXICON_CACHE if set (None if empty), else the default."""
+    return os.environ.get(LEXICON_CACHE_ENV, DEFAULT_LEXICON_CACHE_DIR) or None
+
+
+def disable_lexicon_cache():
+    """Always compile the lexicon, in this process and the worker processes it starts."""
+    os.environ[LEXICON_CACHE_ENV] = ''
+
+
+def _read_artifact(path, digest):
+    """Return the matcher saved in an artifact, or None if it is missing, stale or doesn't check out."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            artifact = json.load(f)
+        if (artifact.get('format') != LEXICON_FORMAT or artifact.get('version') != LEXICON_VERSION
+                or artifact.get('matcher_version') != MATCHER_VERSION or artifact.get('source_digest') != digest):
+            return None
+        matcher = TermMatcher([(key, category, tuple(patterns)) for key, category, patterns in artifact['groups']])
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+    # The rebuilt matcher must be the one the artifact was written for
+    return matcher if matcher.hash == artifact.get('hash') else None
+
+
+def load_lexicon(source=DEFAULT_LEXICON_SOURCE, cache_dir=DEFAULT_LEXICON_CACHE_DIR):
+    """
+    Return the compiled lexicon for a source file, from its artifact when possible.
+
+    Args:
+        source (str): Lexicon source file
+        cache_dir (str, optional): Artifact directory, or None to always compile
+
+    Returns:
+        Lexicon: The lexicon
+
+    Raises:
+        ValueError: If the source has to be compiled and is invalid
+    """
+    if not cache_dir:
+        return compile_lexicon(source)
+
+    digest = file_hash(source)
+    matcher = _read_artifact(_artifact_path(cache_dir, digest), digest)
+    if matcher is not None:
+        return Lexicon(matcher, source, digest)
+
+    lexicon = compile_lexicon(source)
+    matcher = lexicon.matcher
+    artifact = {
+        'format': LEXICON_FORMAT,
+        'version': LEXICON_VERSION,
+        'matcher_version': MATCHER_VERSION,
+        'source_digest': lexicon.source_digest,
+        'hash': matcher.hash,
+        'groups': [[key, category, patterns] for (key, category), patterns in zip(matcher.groups, matcher.patterns)]
+    }
+    try:
+        write_atomic(_artifact_path(cache_dir, lexicon.source_digest),
+                     json.dumps(artifact, ensure_ascii=False).encode('utf-8'))
+    except OSError as e:
+        print(f"⚠️  Could not save the lexicon artifact in {cache_dir}: {e}")
+    return lexicon
+
+
+def default_lexicon():
+    """Return the process-wide lexicon, loading it from gardening_terms.py on first use."""
+    global _default
+    if _default is None:
+        _default = load_lexicon(cache_dir=lexicon_cache_dir())
+    return _default
+
+
+def set_default_lexicon(lexicon):
+    """Replace the process-wide lexicon, e.g. after a reload."""
+    global _default
+    _default = lexicon
+
+
+class LexiconReloader:
+    """Reloads a lexicon when its source file changes."""
+
+    def __init__(self, lexicon, cache_dir=DEFAULT_LEXICON_CACHE_DIR):
+        """
+        Args:
+            lexicon (Lexicon): The lexicon in use
+            cache_dir (str, optional): Artifact directory for reloaded lexicons
+        """
+        self.lexicon = lexicon
+        self.cache_dir = cache_dir
+        self.reloads = 0
+        self.error = None
+        self._stat = self._source_stat()
+
+    def _source_stat(self):
+        try:
+            stat = os.stat(self.lexicon.source)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def check(self):
+        """
+        Reload the lexicon if its source file has changed.
+
+        Costs one stat call when nothing changed. An invalid source is
+        reported in `error` and the current lexicon is kept.
+
+        Returns:
+            Lexicon: The new lexicon, or None if it is unchanged
+        """
+        stat = self._source_stat()
+        if stat is None or stat == self._stat:
+            return None
+        self._stat = stat
+        try:
+            lexicon = load_lexicon(self.lexicon.source, self.cache_dir)
+        except (OSError, ValueError) as e:
+            self.error = str(e)
+            print(f"⚠️  Keeping the current lexicon: {e}")
+            return None
+        self.error = None
+        if lexicon.source_digest == self.lexicon.source_digest:
+            return None
+        self.lexicon = lexicon
+        self.reloads += 1
+        return lexicon
+
+
+def main():
+    """Main function to validate and build the lexicon artifact."""
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Validate the gardening lexicon and build its artifact.")
+    parser.add_argument("--source", default=DEFAULT_LEXICON_SOURCE, help="Lexicon source (default: gardening_terms.py)")
+    parser.add_argument("--cache-dir", default=lexicon_cache_dir(),
+                        help="Artifact directory (default: $GARDENING_LEXICON_CACHE or %(default)s)")
+    parser.add_argument("--check", action="store_true", help="Only validate the source")
+    args = parser.parse_args()
+
+    try:
+        start = time.perf_counter()
+        lexicon = compile_lexicon(args.source)
+        compiled = time.perf_counter() - start
+    except ValueError as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
+
+    info = lexicon.describe()
+    print(f"✅ {info['source']}: {info['groups']} groups, {info['patterns']} patterns, {info['variants']} variants")
+    print(f"Lexicon hash: {info['hash']}")
+    if args.check or not args.cache_dir:
+        return
+
+    load_lexicon(args.source, args.cache_dir)
+    start = time.perf_counter()
+    load_lexicon(args.source, args.cache_dir)
+    loaded = time.perf_counter() - start
+    print(f"Artifact: {_artifact_path(args.cache_dir, lexicon.source_digest)}")
+    print(f"Compiled in {compiled * 1000:.1f} ms; artifact loaded in {loaded * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
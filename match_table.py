@@ -0,0 +1,164 @@
+"""
+Compact, array-backed storage for matches in a source text.
+
+A MatchTable holds parallel int32 columns for start offset, end offset and
+an id into an interned table of categories (or entity labels). Match texts
+are not stored at all: they are sliced from the source text when asked for.
+Compared with a dict and a fresh string per match this uses a few bytes
+per hit, which matters on large books with hundreds of thousands of hits.
+
+The table is a read-only sequence of the usual hit dicts
+({'text', 'start', 'end', 'category'|'label'}), built one at a time on
+access, so existing code that iterates hits keeps working. Code that only
+needs texts, offsets or counts should use texts(), rows(), filter() and
+the count methods, which never build dicts.
+"""
+
+from array import array
+from collections import Counter
+from collections.abc import Sequence
+
+
+class MatchTable(Sequence):
+    """Matches in one source text as int32 columns with interned categories."""
+
+    def __init__(self, source, field='category'):
+        """
+        Args:
+            source (str): Text the offsets refer to
+            field (str): Name of the value field in hit dicts: 'category' or 'label'
+        """
+        self.source = source
+        self.field = field
+        self.starts = array('i')
+        self.ends = array('i')
+        self.value_ids = array('i')
+        self.values = []
+        self._value_index = {}
+
+    def append(self, start, end, value):
+        """Add a match of source[start:end] with the given category or label."""
+        value_id = self._value_index.get(value)
+        if value_id is None:
+            value_id = self._value_index[value] = len(self.values)
+            self.values.append(value)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.value_ids.append(value_id)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        start = self.starts[index]
+        end = self.ends[index]
+        return {
+            'text': self.source[start:end],
+            'start': start,
+            'end': end,
+            self.field: self.values[self.value_ids[index]]
+        }
+
+    def text(self, index):
+        """Return the text of one match."""
+        return self.source[self.starts[index]:self.ends[index]]
+
+    def texts(self):
+        """Iterate over match texts without building hit dicts."""
+        source = self.source
+        return (source[start:end] for start, end in zip(self.starts, self.ends))
+
+    def rows(self):
+        """Iterate over (text, start, end, category) tuples without building hit dicts."""
+        source = self.source
+        values = self.values
+        for start, end, value_id in zip(self.starts, self.ends, self.value_ids):
+            yield source[start:end], start, end, values[value_id]
+
+    def filter(self, values=None, start=None, end=None):
+        """
+        Return the matches with a given category or label and/or within a span.
+
+        Args:
+            values (iterable, optional): Categories (or labels) to keep
+            start (int, optional): Keep matches starting at or after this offset
+            end (int, optional): Keep matches ending at or before this offset
+
+        Returns:
+            MatchTable: New table over the same source
+        """
+        wanted = None if values is None else {self._value_index[v] for v in values if v in self._value_index}
+        table = MatchTable(self.source, self.field)
+        for match_start, match_end, value_id in zip(self.starts, self.ends, self.value_ids):
+            if wanted is not None and value_id not in wanted:
+                continue
+            if (start is not None and match_start < start) or (end is not None and match_end > end):
+                continue
+            table.append(match_start, match_end, self.values[value_id])
+        return table
+
+    def text_counts(self, lower=False):
+        """Count matches by text (lowercased if lower is True)."""
+        if lower:
+            return Counter(text.lower() for text in self.texts())
+        return Counter(self.texts())
+
+    def value_counts(self):
+        """Count matches by category or label."""
+        counts = Counter(self.value_ids)
+        return Counter({self.values[value_id]: count for value_id, count in counts.items()})
+
+    def to_list(self):
+        """Materialise the matches as a list of dicts (the standard JSON form)."""
+        return list(self)
+
+    def to_columns(self):
+        """Return the columns as JSON-serialisable lists (texts are not included)."""
+        return {
+            'start': self.starts.tolist(),
+            'end': self.ends.tolist(),
+            'values': list(self.values),
+            'value_ids': self.value_ids.tolist()
+        }
+
+    @classmethod
+    def from_columns(cls, source, columns, field='category'):
+        """Rebuild a table from to_columns() output and its source text."""
+        table = cls(source, field)
+        table.starts = array('i', columns['start'])
+        table.ends = array('i', columns['end'])
+        table.value_ids = array('i', columns['value_ids'])
+        table.values = list(columns['values'])
+        table._value_index = {value: i for i, value in enumerate(table.values)}
+        return table
+
+    @classmethod
+    def from_dicts(cls, source, hits, field='category'):
+        """Build a table from hit dicts whose offsets refer to source."""
+        table = cls(source, field)
+        for hit in hits:
+            table.append(hit['start'], hit['end'], hit[field])
+        return table
+
+
+def hit_texts(hits):
+    """Iterate over the texts of hits given as a MatchTable, columnar view or list of dicts."""
+    if hasattr(hits, 'texts'):
+        return hits.texts()
+    return (hit['text'] for hit in hits)
+
+
+def hit_starts(hits):
+    """Return the start offsets of hits given as a MatchTable, columnar view or list of dicts."""
+    if isinstance(hits, MatchTable):
+        return hits.starts
+    return [hit['start'] for hit in hits]
+
+
+def json_default(obj):
+    """json.dump default hook that writes MatchTables as lists of hit dicts."""
+    if isinstance(obj, MatchTable):
+        return obj.to_list()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
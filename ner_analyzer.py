@@ -1,25 +1,229 @@
-import spacy
-import re
-from collections import Counter
+import hashlib
 import json
+from term_matcher import get_default_matcher
+from text_chunks import iter_chunks, DEFAULT_CHUNK_CHARS
+from spacy_profiles import (PIPELINE_PROFILES, DEFAULT_PROFILE, get_profile, load_pipeline, describe_pipeline,
+                            pipeline_fingerprint)
+from columnar_output import write_columnar
+from match_table import MatchTable, json_default
+from streaming_summary import SummaryAggregator, save_counts
+from spacy_lexicon import LEXICON_MODES, LEXICON_COMPONENT, add_lexicon_component, collect_spans, build_tables
+from fuzzy_matcher import load_index, DEFAULT_FUZZY_CACHE_DIR, FUZZY_VERSION
+from text_normaliser import TextNormaliser
+from sharding import parse_shard, select_shard
+from instrumentation import Instrumentation
+from lexicon import disable_lexicon_cache
+from stage_cache import StageCache, DEFAULT_STAGE_CACHE_DIR, text_hash, stage_key
+
+# spaCy entity labels reported in the output
+ENTITY_LABELS = [
+    'PERSON',
+    'ORG',
+    'GPE',  # Countries, cities, etc.
+    'DATE',
+    'TIME',
+    'QUANTITY',
+    'CARDINAL',  # Numbers
+    'ORDINAL',
+    'PRODUCT',
+    'EVENT',
+    'WORK_OF_ART',
+    'LAW',
+    'LANGUAGE',
+    'FAC',  # Buildings, airports, etc.
+    'LOC',  # Non-GPE locations
+    'MONEY',
+    'PERCENT'
+]
+
+LEXICON_STAGES = ['gardening_terms', 'plant_names', 'gardening_techniques']
+
+OUTPUT_SUFFIXES = {
+    'json': '_ner_analysis.json',
+    'columnar': '_ner_analysis.ndjson'
+}
+
+COUNTS_SUFFIX = '_ner_counts.json'
+COOCCURRENCE_SUFFIX = '_cooccurrence.npz'
+
+# PMI-ranked plant x technique pairs reported in the results
+TOP_COOCCURRENCES = 20
+
+# The max_length spaCy gives every pipeline unless it is changed
+SPACY_MAX_LENGTH = 1000000
+
+def output_path_for(text_file_path, output_format='json'):
+    """
+    Return the analysis output path for a text file.
+    
+    Args:
+        text_file_path (str): Path to the analysed text file
+        output_format (str): 'json' or 'columnar'
+        
+    Returns:
+        str: Output path next to the text file
+    """
+    return text_file_path.replace('.txt', OUTPUT_SUFFIXES[output_format])
+
+def _load_table(text, cached, field):
+    """Rebuild a MatchTable from a cached stage result (columns, or hit dicts from older caches)."""
+    if isinstance(cached, list):
+        return MatchTable.from_dicts(text, cached, field)
+    return MatchTable.from_columns(text, cached, field)
+
+def save_results(results, output_file, output_format='json'):
+    """
+    Write analysis results to a file.
+    
+    Args:
+        results (dict): Results from GardeningNERAnalyser.extract_gardening_entities
+        output_file (str): Path to write
+        output_format (str): 'json' for indented JSON, or 'columnar' for the
+            compact NDJSON format (see columnar_output.py)
+    """
+    if output_format == 'columnar':
+        write_columnar(results, output_file)
+    else:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False, default=json_default)
 
 class GardeningNERAnalyser:
     """
     Named Entity Recognition analyser for gardening guides using spaCy.
     """
     
-    def __init__(self):
-        """Initialise the NER analyser with spaCy model."""
-        try:
-            # Load English language model
-            self.nlp = spacy.load("en_core_web_sm")
-            print("✅ spaCy model loaded successfully")
-        except OSError:
-            print("⚠️  spaCy model not found. Installing...")
-            import subprocess
-            subprocess.run(["python", "-m", "spacy", "download", "en_core_web_sm"])
-            self.nlp = spacy.load("en_core_web_sm")
-            print("✅ spaCy model installed and loaded")
+    def __init__(self, profile=DEFAULT_PROFILE, model=None, n_process=1, chunk_chars=None, batch_size=4,
+                 use_ner=True, cache_dir=None, instrumentation=None, lexicon_mode='trie',
+                 fuzzy_distance=None, cooccurrence_unit=None, cooccurrence_window=20, normalise=False):
+        """
+        Initialise the NER analyser.
+        
+        The spaCy model is loaded lazily, the first time standard entities
+        are extracted.
+        
+        Args:
+            profile (str): spaCy pipeline profile: 'fast' (NER only), 'default'
+                or 'accurate' (larger model)
+            model (str, optional): spaCy model name overriding the profile's model
+            n_process (int): Number of processes used to run spaCy over chunks
+            chunk_chars (int, optional): Split text into chunks of at most this
+                many characters (at page or paragraph boundaries) before NER.
+                Chunking is also used automatically when there is more than one
+                process or the text exceeds the model's max_length.
+            batch_size (int): Number of chunks per nlp.pipe batch
+            use_ner (bool): Extract spaCy's standard entities. When False only
+                the gardening lexicon is matched and spaCy is never loaded.
+            cache_dir (str, optional): Directory for the per-stage result cache.
+                When set, each stage's output is cached by text hash and stage
+                fingerprint, and only stale stages are recomputed.
+            instrumentation (Instrumentation, optional): Collects per-stage
+                timings and counters. Disabled (and free) by default.
+            lexicon_mode (str): How the gardening lexicon is matched: 'trie'
+                scans the raw text (see term_matcher.py); 'lower' and 'lemma'
+                match spaCy tokens on their lowercase form or lemma inside the
+                NER pass, sharing its tokenisation (see spacy_lexicon.py)
+            fuzzy_distance (int, optional): Also report lexicon terms misspelt
+                by up to this many edits (1 or 2) under 'fuzzy_matches'
+                (see fuzzy_matcher.py)
+            cooccurrence_unit (str, optional): Count plant x technique
+                co-occurrences per 'page', 'sentence' or 'window' and report
+                PMI-ranked pairs under 'cooccurrence' (see cooccurrence.py)
+            cooccurrence_window (int): Window size in words for the 'window' unit
+            normalise (bool): Analyse a cleaned copy of the text (joined lines
+                and hyphenated words, no page separators or running headers;
+                see text_normaliser.py). Hits are still reported at their
+                offsets in the original text.
+        """
+        self.n_process = n_process
+        self.chunk_chars = chunk_chars
+        self.batch_size = batch_size
+        
+        # Compiled lexicon matcher, shared between analyser instances
+        self.matcher = get_default_matcher()
+        
+        settings = get_profile(profile)  # fail early on an unknown profile
+        if lexicon_mode not in LEXICON_MODES:
+            raise ValueError(f"Unknown lexicon mode '{lexicon_mode}'. Choose from: {', '.join(LEXICON_MODES)}")
+        if lexicon_mode != 'trie' and not use_ner:
+            raise ValueError(f"Lexicon mode '{lexicon_mode}' runs inside spaCy and can't be used without NER")
+        if lexicon_mode == 'lemma' and 'lemmatizer' in settings['exclude']:
+            raise ValueError(f"Lexicon mode 'lemma' needs the lemmatizer, which profile '{profile}' excludes")
+        if fuzzy_distance not in (None, 1, 2):
+            raise ValueError(f"Fuzzy distance must be 1 or 2, not {fuzzy_distance}")
+        self.lexicon_mode = lexicon_mode
+        self.fuzzy_distance = fuzzy_distance
+        self.cooccurrence_unit = cooccurrence_unit
+        self.cooccurrence_window = cooccurrence_window
+        self.normalise = normalise
+        self._fuzzy_index = None
+        self.profile = profile
+        self.model = model
+        self.use_ner = use_ner
+        self._nlp = None
+        self._settings_hash = None
+        self.stage_cache = StageCache(cache_dir) if cache_dir else None
+        self.instrumentation = instrumentation or Instrumentation()
+    
+    @property
+    def nlp(self):
+        """spaCy pipeline for the chosen profile, loaded on first use."""
+        if self._nlp is None:
+            self._nlp = load_pipeline(self.profile, self.model)
+            if self.lexicon_mode != 'trie':
+                add_lexicon_component(self._nlp, self.lexicon_mode)
+            print(f"✅ spaCy model loaded successfully (profile: {self.profile})")
+        return self._nlp
+    
+    @property
+    def settings_hash(self):
+        """
+        Hash of the settings that decide what the results contain, saved as 'settings_hash'.
+        
+        Covers NER and the pipeline it would load (profile, model and their
+        versions), the lexicon mode, normalisation, fuzzy matching and
+        co-occurrence counting, so saved results can be checked against the
+        settings of a new run without loading spaCy.
+        """
+        if self._settings_hash is None:
+            pipeline = None
+            if self.use_ner:
+                pipeline = pipeline_fingerprint(self.profile, self.model) or {'profile': self.profile,
+                                                                              'model': self.model}
+            settings = {
+                'use_ner': self.use_ner,
+                'pipeline': pipeline,
+                'lexicon_mode': self.lexicon_mode,
+                'normalise': self.normalise,
+                'fuzzy_distance': self.fuzzy_distance,
+                'fuzzy_version': FUZZY_VERSION if self.fuzzy_distance else None,
+                'cooccurrence': [self.cooccurrence_unit, self.cooccurrence_window] if self.cooccurrence_unit else None
+            }
+            self._settings_hash = hashlib.sha256(json.dumps(settings, sort_keys=True).encode('utf-8')).hexdigest()
+        return self._settings_hash
+    
+    @property
+    def fuzzy_index(self):
+        """Fuzzy lexicon index, loaded (or built and cached) on first use."""
+        if self._fuzzy_index is None:
+            self._fuzzy_index = load_index(self.matcher, self.fuzzy_distance, DEFAULT_FUZZY_CACHE_DIR)
+        return self._fuzzy_index
+    
+    def set_lexicon(self, lexicon):
+        """
+        Switch to another compiled lexicon, e.g. after a hot reload.
+        
+        The fuzzy index is rebuilt on next use. In the 'lower' and 'lemma'
+        modes the spaCy lexicon component is rebuilt from the process-wide
+        lexicon, so that should be replaced first (lexicon.set_default_lexicon).
+        
+        Args:
+            lexicon (Lexicon): Lexicon from lexicon.load_lexicon
+        """
+        self.matcher = lexicon.matcher
+        self._fuzzy_index = None
+        if self.lexicon_mode != 'trie' and self._nlp is not None:
+            self._nlp.remove_pipe(LEXICON_COMPONENT)
+            add_lexicon_component(self._nlp, self.lexicon_mode)
     
     def extract_gardening_entities(self, text):
         """
@@ -29,186 +233,451 @@ class GardeningNERAnalyser:
             text (str): Text to analyse
             
         Returns:
-            dict: Dictionary containing different types of entities
-        """
-        # Process the text with spaCy
-        doc = self.nlp(text)
-        
-        # Extract standard named entities
-        entities = {
-            'PERSON': [],
-            'ORG': [],
-            'GPE': [],  # Countries, cities, etc.
-            'DATE': [],
-            'TIME': [],
-            'QUANTITY': [],
-            'CARDINAL': [],  # Numbers
-            'ORDINAL': [],
-            'PRODUCT': [],
-            'EVENT': [],
-            'WORK_OF_ART': [],
-            'LAW': [],
-            'LANGUAGE': [],
-            'FAC': [],  # Buildings, airports, etc.
-            'LOC': [],  # Non-GPE locations
-            'MONEY': [],
-            'PERCENT': []
-        }
+            dict: Dictionary containing different types of entities. Hit lists
+                are MatchTables, which read like lists of hit dicts but store
+                offsets in arrays (see match_table.py). With instrumentation
+                enabled, 'timings' holds the stages run for this text only.
+        """
+        self.instrumentation.begin_scope()
+        if not self.normalise:
+            return self._add_timings(self._extract(text))
+        clean, offsets, report = self._normalise_text(text)
+        return self._add_timings(self._to_original(self._extract(clean), text, offsets, report))
+    
+    def _extract(self, text):
+        """Run every stage over text (see extract_gardening_entities)."""
+        text_digest = text_hash(text) if self.stage_cache is not None else None
+        
+        # Extract standard named entities (and the lexicon, when it is matched by spaCy)
+        if self.lexicon_mode != 'trie':
+            entities, lexicon_matches, pipeline = self._spacy_stage(text, text_digest)
+            return self._build_results(text, entities, lexicon_matches, pipeline)
+        if self.use_ner:
+            entities, _, pipeline = self._spacy_stage(text, text_digest)
+        else:
+            entities, pipeline = {label: MatchTable(text, 'label') for label in ENTITY_LABELS}, None
         
-        # Extract entities by type
-        for ent in doc.ents:
-            if ent.label_ in entities:
-                entities[ent.label_].append({
-                    'text': ent.text,
-                    'start': ent.start_char,
-                    'end': ent.end_char,
-                    'label': ent.label_
-                })
+        # Extract gardening terms, plant names and techniques in a single pass
+        lexicon_matches = self._lexicon_stages(text, text_digest)
+        return self._build_results(text, entities, lexicon_matches, pipeline)
+    
+    def extract_gardening_entities_batch(self, texts):
+        """
+        Extract entities from several texts, running spaCy over them together.
+        
+        The texts are fed through one nlp.pipe call, which is much faster than
+        analysing many small texts one by one. The stage cache is not used.
+        
+        Args:
+            texts (list): Texts to analyse
+            
+        Returns:
+            list: Results for each text, as from extract_gardening_entities;
+                their 'timings' cover the whole batch
+        """
+        self.instrumentation.begin_scope()
+        if self.normalise:
+            normalised = [self._normalise_text(text) for text in texts]
+            results = self._extract_batch([clean for clean, _, _ in normalised])
+            results = [self._to_original(result, text, offsets, report)
+                       for result, text, (_, offsets, report) in zip(results, texts, normalised)]
+        else:
+            results = self._extract_batch(texts)
+        return [self._add_timings(result) for result in results]
+    
+    def _add_timings(self, results):
+        """Add the metrics of the stages run since the last begin_scope, if instrumentation is enabled."""
+        if self.instrumentation.enabled:
+            results['timings'] = self.instrumentation.report(scoped=True)
+        return results
+    
+    def _extract_batch(self, texts):
+        """Run every stage over several texts (see extract_gardening_entities_batch)."""
+        if self.use_ner:
+            passes = self._spacy_pass_batch(texts)
+            pipeline = describe_pipeline(self.nlp, self.profile)
+        else:
+            passes = [({label: MatchTable(text, 'label') for label in ENTITY_LABELS}, None) for text in texts]
+            pipeline = None
         
-        # Extract gardening-specific terms (custom patterns)
-        gardening_terms = self._extract_gardening_terms(text)
+        return [self._build_results(text, entities, lexicon_matches or self._match_lexicon(text), pipeline)
+                for text, (entities, lexicon_matches) in zip(texts, passes)]
+    
+    def _normalise_text(self, text):
+        """
+        Clean a text for analysis, recording it as the 'normalise' stage.
         
-        # Extract plant names (common gardening plants)
-        plant_names = self._extract_plant_names(text)
+        Returns:
+            tuple: (clean text, OffsetMap back to text, normalisation report)
+        """
+        with self.instrumentation.stage('normalise', chars=len(text)) as timer:
+            normaliser = TextNormaliser(vocabulary=self.matcher.canonical)
+            clean, offsets = normaliser.normalise(text)
+            timer.add(hits=normaliser.stats['lines_removed'] + normaliser.stats['words_joined'])
+        report = normaliser.report()
+        report.update(original_chars=len(text), normalised_chars=len(clean))
+        return clean, offsets, report
+    
+    def _to_original(self, results, text, offsets, report):
+        """Move results found in normalised text to their offsets in the original text."""
+        results['standard_entities'] = {label: offsets.remap_table(table, text)
+                                        for label, table in results['standard_entities'].items()}
+        for stage in LEXICON_STAGES:
+            results[stage] = offsets.remap_table(results[stage], text)
+        if 'fuzzy_matches' in results:
+            results['fuzzy_matches'] = offsets.remap_hits(results['fuzzy_matches'], text)
+        results['normalisation'] = report
+        return results
+    
+    def _build_results(self, text, entities, lexicon_matches, pipeline):
+        """Assemble the results dict, including the summary, from the stage outputs."""
+        gardening_terms = lexicon_matches['gardening_terms']
+        plant_names = lexicon_matches['plant_names']
+        gardening_techniques = lexicon_matches['gardening_techniques']
         
-        # Extract gardening techniques/actions
-        gardening_techniques = self._extract_gardening_techniques(text)
+        with self.instrumentation.stage('summary'):
+            summary = self._create_summary(entities, gardening_terms, plant_names, gardening_techniques)
         
-        return {
+        results = {
             'standard_entities': entities,
             'gardening_terms': gardening_terms,
             'plant_names': plant_names,
             'gardening_techniques': gardening_techniques,
-            'summary': self._create_summary(entities, gardening_terms, plant_names, gardening_techniques)
+            'summary': summary,
+            'pipeline': pipeline,
+            'lexicon_hash': self.matcher.hash,
+            'settings_hash': self.settings_hash
         }
+        if self.fuzzy_distance:
+            results['fuzzy_matches'] = self._match_fuzzy(text)
+        return results
+    
+    def _spacy_stage(self, text, text_digest):
+        """
+        Return spaCy's standard entities, from the stage cache when possible.
+        
+        When the lexicon is matched inside spaCy, its hits come from the same
+        pass and are cached with the entities. The cache key combines the text
+        hash with the model name, version, profile and the chunk size the
+        text is actually split at (None when it is parsed whole; plus the
+        lexicon mode and lexicon hashes).
+        
+        Returns:
+            tuple: (entities by label, lexicon matches or None, pipeline description)
+        """
+        fingerprint = pipeline_fingerprint(self.profile, self.model) if self.stage_cache is not None else None
+        if fingerprint is None:
+            entities, lexicon_matches = self._spacy_pass_batch([text])[0]
+            return entities, lexicon_matches, describe_pipeline(self.nlp, self.profile)
+        
+        stage = 'standard_entities'
+        if self.lexicon_mode != 'trie':
+            stage = 'spacy_pass'
+            fingerprint['lexicon_mode'] = self.lexicon_mode
+            fingerprint['lexicon'] = [self.matcher.fingerprint(key) for key in LEXICON_STAGES]
+        fingerprint['chunk_chars'] = self._chunk_chars(text)
+        key = stage_key(stage, text_digest, fingerprint)
+        cached = self.stage_cache.get(key)
+        if cached is None:
+            entities, lexicon_matches = self._spacy_pass_batch([text])[0]
+            pipeline = describe_pipeline(self.nlp, self.profile)
+            cached = {
+                'entities': {label: table.to_columns() for label, table in entities.items()},
+                'pipeline': pipeline
+            }
+            if lexicon_matches is not None:
+                cached['lexicon'] = {stage: table.to_columns() for stage, table in lexicon_matches.items()}
+            # Stored under the chunking the loaded model actually used
+            fingerprint['chunk_chars'] = self._chunk_chars(text)
+            self.stage_cache.put(stage_key(stage, text_digest, fingerprint), cached)
+            return entities, lexicon_matches, pipeline
+        entities = {label: _load_table(text, hits, 'label') for label, hits in cached['entities'].items()}
+        lexicon_matches = None
+        if 'lexicon' in cached:
+            lexicon_matches = {stage: _load_table(text, hits, 'category') for stage, hits in cached['lexicon'].items()}
+        return entities, lexicon_matches, cached['pipeline']
+    
+    def _lexicon_stages(self, text, text_digest):
+        """
+        Return gardening terms, plant names and techniques, recomputing only stale stages.
+        
+        Each stage is cached under the text hash and the hash of the lexicon
+        groups that produce it.
+        
+        Returns:
+            dict: Stage name -> MatchTable
+        """
+        if self.stage_cache is None:
+            return self._match_lexicon(text)
+        
+        keys = {stage: stage_key(stage, text_digest, self.matcher.fingerprint(stage)) for stage in LEXICON_STAGES}
+        results = {}
+        for stage, key in keys.items():
+            cached = self.stage_cache.get(key)
+            if cached is not None:
+                results[stage] = _load_table(text, cached, 'category')
+        
+        stale = [stage for stage in LEXICON_STAGES if stage not in results]
+        if stale:
+            fresh = self._match_lexicon(text, stale)
+            for stage in stale:
+                self.stage_cache.put(keys[stage], fresh[stage].to_columns())
+                results[stage] = fresh[stage]
+        return results
+    
+    def _match_lexicon(self, text, keys=None):
+        """Run the single-pass lexicon matcher, recording it as the 'lexicon' stage."""
+        with self.instrumentation.stage('lexicon', chars=len(text)) as timer:
+            matches = self.matcher.find_tables(text, keys)
+            timer.add(hits=sum(len(hits) for hits in matches.values()))
+        return matches
+    
+    def _match_fuzzy(self, text):
+        """Find misspelt lexicon terms, recording it as the 'fuzzy' stage."""
+        with self.instrumentation.stage('fuzzy', chars=len(text)) as timer:
+            hits = self.fuzzy_index.find(text)
+            timer.add(hits=len(hits))
+        return hits
+    
+    def count_cooccurrences(self, text, results):
+        """
+        Count plant x technique co-occurrences and add the top pairs to results.
+        
+        Does nothing unless the analyser has a co-occurrence unit. The pairs
+        are added under 'cooccurrence'; the full matrix is returned so it can
+        be saved or merged into corpus counts.
+        
+        Args:
+            text (str): The analysed text
+            results (dict): Results from extract_gardening_entities for text
+            
+        Returns:
+            CooccurrenceMatrix: Counts for this text, or None
+        """
+        if self.cooccurrence_unit is None:
+            return None
+        from cooccurrence import CooccurrenceMatrix
+        
+        with self.instrumentation.stage('cooccurrence', chars=len(text)) as timer:
+            matrix = CooccurrenceMatrix(self.cooccurrence_unit, self.cooccurrence_window).add_results(text, results)
+            pairs = matrix.pmi_pairs(top=TOP_COOCCURRENCES)
+            timer.add(hits=int(matrix.counts.sum()))
+        results['cooccurrence'] = {'unit': matrix.describe(), 'pairs': pairs}
+        return matrix
+    
+    def _extract_standard_entities(self, text):
+        """
+        Extract spaCy's standard named entities, grouped by label.
+        
+        Args:
+            text (str): Text to analyse
+            
+        Returns:
+            dict: Label -> MatchTable of entities in text
+        """
+        return self._extract_standard_entities_batch([text])[0]
+    
+    def _extract_standard_entities_batch(self, texts):
+        """
+        Extract spaCy's standard named entities for several texts with one nlp.pipe call.
+        
+        Args:
+            texts (list): Texts to analyse
+            
+        Returns:
+            list: For each text, label -> MatchTable of entities in that text
+        """
+        return [entities for entities, _ in self._spacy_pass_batch(texts)]
+    
+    def _spacy_pass_batch(self, texts):
+        """
+        Run spaCy over several texts with one nlp.pipe call.
+        
+        Args:
+            texts (list): Texts to analyse
+            
+        Returns:
+            list: For each text, (label -> MatchTable of entities, lexicon
+                matches or None). Lexicon matches are only produced by the
+                'lower' and 'lemma' lexicon modes.
+        """
+        results = [{label: MatchTable(text, 'label') for label in ENTITY_LABELS} for text in texts]
+        spans = None
+        if self.lexicon_mode != 'trie':
+            spans = [{stage: [] for stage in LEXICON_STAGES} for _ in texts]
+        chunks = ((chunk, (index, offset)) for index, text in enumerate(texts)
+                  for offset, chunk in self._chunks(text))
+        
+        # Extract entities by type, mapping chunk offsets back to the full text
+        with self.instrumentation.stage('nlp', chars=sum(len(text) for text in texts)) as timer:
+            docs = self.nlp.pipe(chunks, as_tuples=True, n_process=self.n_process,
+                                 batch_size=max(self.batch_size, len(texts)))
+            for doc, (index, offset) in docs:
+                timer.add(tokens=len(doc), hits=len(doc.ents))
+                entities = results[index]
+                for ent in doc.ents:
+                    if ent.label_ in entities:
+                        entities[ent.label_].append(ent.start_char + offset, ent.end_char + offset, ent.label_)
+                if spans is not None:
+                    collect_spans(doc, offset, spans[index])
+        
+        if spans is None:
+            return [(entities, None) for entities in results]
+        return [(entities, build_tables(text, text_spans))
+                for text, entities, text_spans in zip(texts, results, spans)]
+    
+    def _chunks(self, text):
+        """
+        Split text into the chunks spaCy is run over.
+        
+        Large texts are split at page separators or paragraph breaks so they
+        can be processed with nlp.pipe, optionally across several processes.
+        
+        Args:
+            text (str): Text to analyse
+            
+        Returns:
+            iterable: (character offset in text, chunk) pairs
+        """
+        self.nlp  # load the model, for its max_length
+        max_chars = self._chunk_chars(text)
+        return [(0, text)] if max_chars is None else iter_chunks(text, max_chars)
+    
+    def _chunk_chars(self, text):
+        """
+        Return the chunk size text is split at for spaCy, or None if it is parsed whole.
+        
+        Until the model is loaded, its max_length is taken to be spaCy's
+        default, so a cached result can be looked up without loading it.
+        """
+        max_length = self._nlp.max_length if self._nlp is not None else SPACY_MAX_LENGTH
+        if self.chunk_chars is None and self.n_process == 1 and len(text) <= max_length:
+            return None
+        return min(self.chunk_chars or DEFAULT_CHUNK_CHARS, max_length)
     
     def _extract_gardening_terms(self, text):
         """Extract gardening-specific terminology."""
-        gardening_patterns = [
-            r'\b(soil|compost|fertilizer|mulch|seeds|seedlings|transplant|harvest|prune|water|irrigation|drainage)\b',
-            r'\b(garden|plot|bed|row|container|pot|greenhouse|shed|tool|shovel|rake|hoe|trowel)\b',
-            r'\b(organic|pesticide|herbicide|fungicide|pest|disease|blight|mildew|rot)\b',
-            r'\b(sunlight|shade|full sun|partial shade|hardiness zone|climate|season|spring|summer|autumn|winter)\b',
-            r'\b(germination|pollination|photosynthesis|root|stem|leaf|flower|fruit|vegetable|herb)\b'
-        ]
-        
-        terms = []
-        for pattern in gardening_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                terms.append({
-                    'text': match.group(),
-                    'start': match.start(),
-                    'end': match.end(),
-                    'category': 'gardening_term'
-                })
-        
-        return terms
+        return self.matcher.find_tables(text, ['gardening_terms'])['gardening_terms']
     
     def _extract_plant_names(self, text):
-        """Extract plant names by category (vegetables, fruits, herbs, flowers, etc.), using regex for plurals."""
-        categories = {
-            'vegetable': [
-                r'carrots?', r'beetroots?', r'broccolis?', r'cabbages?', r'cauliflowers?', r'lettuces?', r'spinach', r'silverbeet',
-                r'peas?', r'beans?', r'zucchinis?', r'pumpkins?', r'potatoes?', r'onions?', r'leeks?', r'radishes?', r'turnips?',
-                r'parsnips?', r'celery', r'spring onions?', r'garlic', r'tomatoes?', r'capsicums?', r'bell peppers?', r'chillies?', 
-                r'cucumbers?', r'squash', r'corn', r'kale', r'brussels sprouts?'
-            ],
-            'fruit': [
-                r'apples?', r'pears?', r'plums?', r'cherries?', r'peaches?', r'nectarines?', r'apricots?', r'quinces?', r'figs?',
-                r'strawberries?', r'raspberries?', r'blackberries?', r'blueberries?', r'grapes?', r'gooseberries?', r'currants?',
-                r'lemons?', r'mandarins?', r'avocados?'
-            ],
-            'herb': [
-                r'parsley', r'coriander', r'basil', r'rosemary', r'thyme', r'oregano', r'mint', r'chives', r'sage', r'cilantro', r'dill'
-            ],
-            'flower': [
-                r'roses?', r'tulips?', r'daffodils?', r'marigolds?', r'sunflowers?'
-            ]
-        }
-
-        plants = []
-        for category, patterns in categories.items():
-            pattern = r'\b(' + '|'.join(patterns) + r')\b'
-            for match in re.finditer(pattern, text, re.IGNORECASE):
-                plants.append({
-                    'text': match.group(),
-                    'start': match.start(),
-                    'end': match.end(),
-                    'category': category
-                })
-        return plants
+        """Extract plant names by category (vegetables, fruits, herbs, flowers, etc.), including plurals."""
+        return self.matcher.find_tables(text, ['plant_names'])['plant_names']
     
     def _extract_gardening_techniques(self, text):
         """Extract gardening techniques and actions."""
-        technique_patterns = [
-            r'\b(planting|sowing|watering|fertilizing|pruning|harvesting|weeding|mulching|composting)\b',
-            r'\b(transplanting|thinning|pinching|deadheading|staking|trellising|crop rotation)\b',
-            r'\b(seed starting|germination|hardening off|direct sowing|indoor growing)\b',
-            r'\b(organic gardening|companion planting|succession planting|intercropping)\b'
-        ]
-        
-        techniques = []
-        for pattern in technique_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                techniques.append({
-                    'text': match.group(),
-                    'start': match.start(),
-                    'end': match.end(),
-                    'category': 'gardening_technique'
-                })
-        
-        return techniques
+        return self.matcher.find_tables(text, ['gardening_techniques'])['gardening_techniques']
     
     def _create_summary(self, entities, gardening_terms, plant_names, gardening_techniques):
         """Create a summary of the extracted entities."""
-        summary = {
-            'total_entities': sum(len(entities[label]) for label in entities),
-            'total_gardening_terms': len(gardening_terms),
-            'total_plant_names': len(plant_names),
-            'total_techniques': len(gardening_techniques),
-            'most_common_entities': {},
-            'most_common_plants': Counter([p['text'].lower() for p in plant_names]).most_common(10),
-            'most_common_techniques': Counter([t['text'].lower() for t in gardening_techniques]).most_common(10)
-        }
+        aggregator = SummaryAggregator()
+        aggregator.add_results({
+            'standard_entities': entities,
+            'gardening_terms': gardening_terms,
+            'plant_names': plant_names,
+            'gardening_techniques': gardening_techniques
+        }, document=False)
+        return aggregator.summary()
+    
+    def summarise_text(self, text, aggregator=None):
+        """
+        Summarise a text without keeping its hit lists.
         
-        # Count most common entities by type
-        for label in entities:
-            if entities[label]:
-                summary['most_common_entities'][label] = Counter([e['text'] for e in entities[label]]).most_common(5)
+        The text is processed in chunks (see text_chunks.py). Each chunk's hits
+        are added to the aggregator and then dropped, so memory does not grow
+        with the number of hits. Chunks are cut at page, paragraph or line
+        breaks, which lexicon terms never cross, so lexicon counts equal a
+        whole-text run. The exception is a line longer than the chunk size:
+        it is cut at a space, or mid-word if it has none (see
+        text_chunks._hard_split), and a term at the cut is missed. spaCy
+        entities are found per chunk, as with --chunk-chars.
         
-        return summary
+        Args:
+            text (str): Text to summarise
+            aggregator (SummaryAggregator, optional): Aggregator to add to, e.g.
+                one shared by many documents or with a bounded top-k capacity
+            
+        Returns:
+            SummaryAggregator: The aggregator, with the text counted as one document
+        """
+        aggregator = aggregator if aggregator is not None else SummaryAggregator()
+        if self.normalise:
+            text = self._normalise_text(text)[0]
+        max_chars = self.chunk_chars or DEFAULT_CHUNK_CHARS
+        if self.use_ner:
+            max_chars = min(max_chars, self.nlp.max_length)
+        chunks = (chunk for _, chunk in iter_chunks(text, max_chars))
+        if self.use_ner:
+            chunks = self.nlp.pipe(chunks, n_process=self.n_process, batch_size=self.batch_size)
+        
+        for chunk in chunks:
+            entities = {}
+            if self.use_ner:
+                doc, chunk = chunk, chunk.text
+                entities = {label: MatchTable(chunk, 'label') for label in ENTITY_LABELS}
+                for ent in doc.ents:
+                    if ent.label_ in entities:
+                        entities[ent.label_].append(ent.start_char, ent.end_char, ent.label_)
+            if self.lexicon_mode == 'trie':
+                hits = self._match_lexicon(chunk)
+            else:
+                spans = {stage: [] for stage in LEXICON_STAGES}
+                collect_spans(doc, 0, spans)
+                hits = build_tables(chunk, spans)
+            hits['standard_entities'] = entities
+            aggregator.add_results(hits, document=False)
+        
+        aggregator.documents += 1
+        return aggregator
     
-    def analyse_text_file(self, text_file_path):
+    def analyse_text_file(self, text_file_path, output_format='json'):
         """
         Analyse a text file and return NER results.
         
         Args:
             text_file_path (str): Path to the text file to analyse
+            output_format (str): 'json' for indented JSON, or 'columnar' for the
+                compact NDJSON format (see columnar_output.py)
             
         Returns:
             dict: Analysis results
         """
         try:
-            with open(text_file_path, 'r', encoding='utf-8') as f:
-                text = f.read()
+            with self.instrumentation.stage('read') as timer:
+                with open(text_file_path, 'r', encoding='utf-8') as f:
+                    text = f.read()
+                timer.add(chars=len(text))
             
             print(f"Analysing text file: {text_file_path}")
             print(f"Text length: {len(text)} characters")
             
             results = self.extract_gardening_entities(text)
+            if 'normalisation' in results:
+                print(f"Normalised text length: {results['normalisation']['normalised_chars']} characters")
+            matrix = self.count_cooccurrences(text, results)
+            # Saved timings cover the analysis; reading and writing the files are only in the printed table
+            self._add_timings(results)
             
             # Save results to JSON file
-            output_file = text_file_path.replace('.txt', '_ner_analysis.json')
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(results, f, indent=2, ensure_ascii=False)
+            output_file = output_path_for(text_file_path, output_format)
+            if matrix is not None:
+                matrix_file = text_file_path.replace('.txt', COOCCURRENCE_SUFFIX)
+                matrix.save(matrix_file)
+                print(f"✅ Co-occurrence matrix saved to: {matrix_file}")
+            with self.instrumentation.stage('write'):
+                save_results(results, output_file, output_format)
             
             print(f"✅ Analysis complete! Results saved to: {output_file}")
             
             # Print summary
             self._print_summary(results['summary'])
             
+            if self.stage_cache is not None:
+                self.stage_cache.trim()
+                print(f"Stage cache: {self.stage_cache.hits} hits, {self.stage_cache.misses} misses")
+            
+            if self.instrumentation.enabled:
+                self.instrumentation.print_table()
+            
             return results
             
         except FileNotFoundError:
@@ -218,6 +687,86 @@ class GardeningNERAnalyser:
             print(f"❌ Error analyzing file: {e}")
             return None
     
+    def analyse_large_text_file(self, text_file_path, max_memory):
+        """
+        Analyse a text file in windows sized to a memory budget.
+        
+        The file is memory-mapped and analysed a few chunks at a time, with
+        hits spilled to disk (see windowed_analysis.py). The results file is
+        the one analyse_text_file writes with the same chunk size.
+        
+        Args:
+            text_file_path (str): Path to the text file to analyse
+            max_memory (int): Memory budget for the process in bytes
+            
+        Returns:
+            dict: Run report from windowed_analysis.analyse_windowed, or None on error
+        """
+        from windowed_analysis import analyse_windowed
+        
+        try:
+            print(f"Analysing text file: {text_file_path}")
+            print(f"Memory budget: {max_memory / (1024 * 1024):.0f} MB")
+            report = analyse_windowed(self, text_file_path, output_path_for(text_file_path), max_memory)
+            
+            print(f"Text length: {report['chars']} characters")
+            print(f"Chunks of up to {report['chunk_chars']} characters, {report['window_chunks']} per window "
+                  f"({report['windows']} windows)")
+            print(f"✅ Analysis complete! Results saved to: {report['output']}")
+            self._print_summary(report['summary'])
+            if report['max_rss_bytes'] is not None:
+                print(f"Peak RSS: {report['max_rss_bytes'] / (1024 * 1024):.1f} MB "
+                      f"(budget {max_memory / (1024 * 1024):.0f} MB)")
+            
+            if self.instrumentation.enabled:
+                self.instrumentation.print_table()
+            
+            return report
+            
+        except FileNotFoundError:
+            print(f"❌ Error: File '{text_file_path}' not found.")
+            return None
+        except Exception as e:
+            print(f"❌ Error analyzing file: {e}")
+            return None
+    
+    def summarise_text_file(self, text_file_path, capacity=None):
+        """
+        Summarise a text file without keeping hit lists, and save the counts.
+        
+        The counts are written to <name>_ner_counts.json and can be merged
+        with other documents' counts by streaming_summary.py.
+        
+        Args:
+            text_file_path (str): Path to the text file to summarise
+            capacity (int, optional): Bound each counter to this many items
+                (approximate top-k)
+            
+        Returns:
+            dict: Summary, or None on error
+        """
+        try:
+            with open(text_file_path, 'r', encoding='utf-8') as f:
+                text = f.read()
+            
+            print(f"Summarising text file: {text_file_path}")
+            aggregator = self.summarise_text(text, SummaryAggregator(capacity))
+            
+            counts_file = text_file_path.replace('.txt', COUNTS_SUFFIX)
+            save_counts(aggregator, counts_file)
+            print(f"✅ Counts saved to: {counts_file}")
+            
+            summary = aggregator.summary()
+            self._print_summary(summary)
+            return summary
+            
+        except FileNotFoundError:
+            print(f"❌ Error: File '{text_file_path}' not found.")
+            return None
+        except Exception as e:
+            print(f"❌ Error analyzing file: {e}")
+            return None
+    
     def _print_summary(self, summary):
         """Print a formatted summary of the analysis."""
         print("\n" + "="*50)
@@ -242,20 +791,92 @@ class GardeningNERAnalyser:
 
 def main():
     """Main function to run NER analysis on extracted PDF text."""
-    import sys
+    import argparse
     
-    if len(sys.argv) < 2:
-        print("Usage: python ner_analyzer.py <extracted_text_file>")
-        print("Example: python ner_analyzer.py indolent_kitchen_gardening_extracted.txt")
-        return
+    parser = argparse.ArgumentParser(
+        description="Run NER analysis on extracted PDF text.",
+        epilog="Example: python ner_analyzer.py indolent_kitchen_gardening_extracted.txt"
+    )
+    parser.add_argument("text_file", nargs="+", help="Extracted text file to analyse (or several)")
+    parser.add_argument("--profile", choices=list(PIPELINE_PROFILES), default=DEFAULT_PROFILE,
+                        help="spaCy pipeline profile (default: %(default)s)")
+    parser.add_argument("--model", default=None,
+                        help="spaCy model name, overriding the profile's model")
+    parser.add_argument("--no-ner", action="store_true",
+                        help="Only match the gardening lexicon; skip spaCy entirely")
+    parser.add_argument("--cache-dir", default=DEFAULT_STAGE_CACHE_DIR,
+                        help="Directory for the per-stage result cache (default: %(default)s)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Recompute every stage and the lexicon instead of using the caches")
+    parser.add_argument("--format", choices=list(OUTPUT_SUFFIXES), default="json",
+                        help="Output format: indented JSON or compact columnar NDJSON (default: json)")
+    parser.add_argument("--timings", action="store_true",
+                        help="Record per-stage timings and counters and print them as a table")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="With --timings, also record the tracemalloc peak per stage")
+    parser.add_argument("--cprofile", metavar="PATH", default=None,
+                        help="Run the stages under cProfile and write the stats to PATH")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="Number of processes for spaCy NER (default: 1)")
+    parser.add_argument("--chunk-chars", type=int, default=None,
+                        help="Split text into chunks of at most this many characters for NER")
+    parser.add_argument("--batch-size", type=int, default=4,
+                        help="Chunks per nlp.pipe batch (default: 4)")
+    parser.add_argument("--lexicon-mode", choices=list(LEXICON_MODES), default="trie",
+                        help="Match the lexicon on the raw text (trie) or on spaCy tokens by lowercase form "
+                             "or lemma, sharing the NER tokenisation (default: trie)")
+    parser.add_argument("--summary-only", action="store_true",
+                        help="Only build the summary, streaming over chunks without keeping hits")
+    parser.add_argument("--capacity", type=int, default=None,
+                        help="With --summary-only, bound each top-k counter to this many items")
+    parser.add_argument("--cooccurrence", choices=["page", "sentence", "window"], default=None,
+                        help="Count plant x technique co-occurrences per page, sentence or word window, "
+                             "and save the matrix to <name>_cooccurrence.npz")
+    parser.add_argument("--cooccurrence-window", type=int, default=20,
+                        help="Window size in words for --cooccurrence window (default: 20)")
+    parser.add_argument("--normalise", action="store_true",
+                        help="Analyse cleaned text (joined lines and hyphenated words, no page separators or "
+                             "running headers); offsets still refer to the original text")
+    parser.add_argument("--fuzzy", type=int, choices=[1, 2], default=None, metavar="N",
+                        help="Also report lexicon terms misspelt by up to N edits (1 or 2) under fuzzy_matches")
+    parser.add_argument("--max-memory", type=int, default=None, metavar="MB",
+                        help="Analyse the memory-mapped file in windows sized to this budget, spilling hits to "
+                             "disk; results match a run with the same --chunk-chars (JSON output only)")
+    parser.add_argument("--shard", type=parse_shard, default=None, metavar="I/N",
+                        help="Only analyse the text files in shard I of N (see sharding.py)")
+    args = parser.parse_args()
+    if args.max_memory and args.format != 'json':
+        parser.error("--max-memory writes JSON output only")
+    if args.no_cache:
+        disable_lexicon_cache()
     
-    text_file = sys.argv[1]
+    text_files = select_shard(args.text_file, args.shard)
+    if args.shard is not None:
+        print(f"Shard {args.shard[0]}/{args.shard[1]}: {len(text_files)} of {len(args.text_file)} text files")
+    
+    instrumentation = Instrumentation(enabled=args.timings or bool(args.cprofile),
+                                      trace_memory=args.trace_memory, cprofile=bool(args.cprofile))
     
     # Initialise analyser
-    analyser = GardeningNERAnalyser()
+    analyser = GardeningNERAnalyser(profile=args.profile, model=args.model, n_process=args.processes, chunk_chars=args.chunk_chars,
+                                    batch_size=args.batch_size, use_ner=not args.no_ner,
+                                    cache_dir=None if args.no_cache else args.cache_dir,
+                                    instrumentation=instrumentation, lexicon_mode=args.lexicon_mode,
+                                    fuzzy_distance=args.fuzzy, cooccurrence_unit=args.cooccurrence,
+                                    cooccurrence_window=args.cooccurrence_window, normalise=args.normalise)
+    
+    # Analyse the text files
+    for text_file in text_files:
+        if args.summary_only:
+            analyser.summarise_text_file(text_file, capacity=args.capacity)
+        elif args.max_memory:
+            analyser.analyse_large_text_file(text_file, args.max_memory * 1024 * 1024)
+        else:
+            analyser.analyse_text_file(text_file, output_format=args.format)
     
-    # Analyse the text file
-    analyser.analyse_text_file(text_file)
+    if args.cprofile:
+        instrumentation.dump_profile(args.cprofile)
+        print(f"cProfile stats saved to: {args.cprofile}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
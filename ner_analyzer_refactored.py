@@ -1,47 +1,33 @@
-import spacy
-import re
 import json
 from collections import Counter
-from gardening_terms import PLANT_CATEGORIES, GARDENING_TERMS, GARDENING_TECHNIQUES
+from term_matcher import get_default_matcher, get_matcher
+from spacy_profiles import DEFAULT_PROFILE, load_pipeline
 
 def extract_terms_by_category(text, categories):
-    results = []
-    for category, patterns in categories.items():
-        pattern = r'\b(' + '|'.join(patterns) + r')\b'
-        for match in re.finditer(pattern, text, re.IGNORECASE):
-            results.append({
-                'text': match.group(),
-                'start': match.start(),
-                'end': match.end(),
-                'category': category
-            })
-    return results
+    groups = tuple(('terms', category, tuple(patterns)) for category, patterns in categories.items())
+    return get_matcher(groups).find_all(text)['terms']
 
 def extract_terms(text, patterns, category):
-    results = []
-    pattern = r'\b(' + '|'.join(patterns) + r')\b'
-    for match in re.finditer(pattern, text, re.IGNORECASE):
-        results.append({
-            'text': match.group(),
-            'start': match.start(),
-            'end': match.end(),
-            'category': category
-        })
-    return results
+    return get_matcher((('terms', category, tuple(patterns)),)).find_all(text)['terms']
 
 class GardeningNERAnalyser:
-    def __init__(self):
-        try:
-            self.nlp = spacy.load("en_core_web_sm")
-        except OSError:
-            import subprocess
-            subprocess.run(["python", "-m", "spacy", "download", "en_core_web_sm"])
-            self.nlp = spacy.load("en_core_web_sm")
+    def __init__(self, profile=DEFAULT_PROFILE, model=None):
+        # The lexicon-only analysis never needs spaCy, so the model is loaded on first use
+        self.profile = profile
+        self.model = model
+        self._nlp = None
+
+    @property
+    def nlp(self):
+        if self._nlp is None:
+            self._nlp = load_pipeline(self.profile, self.model)
+        return self._nlp
 
     def extract_gardening_entities(self, text):
-        gardening_terms = extract_terms(text, GARDENING_TERMS, 'gardening_term')
-        plant_names = extract_terms_by_category(text, PLANT_CATEGORIES)
-        gardening_techniques = extract_terms(text, GARDENING_TECHNIQUES, 'gardening_technique')
+        matches = get_default_matcher().find_all(text)
+        gardening_terms = matches['gardening_terms']
+        plant_names = matches['plant_names']
+        gardening_techniques = matches['gardening_techniques']
         return {
             'gardening_terms': gardening_terms,
             'plant_names': plant_names,
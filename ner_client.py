@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Thin client for ner_server.py.
+
+Usage:
+    python ner_client.py --text "Plant tomatoes in spring."
+    python ner_client.py --path guide_extracted.txt --socket /tmp/gardening_ner.sock
+    python ner_client.py --health
+"""
+
+import http.client
+import json
+import socket
+import sys
+
+# Shared with ner_server.py, which imports them from here so the client
+# doesn't have to import spaCy and the analyser
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection over a Unix domain socket."""
+
+    def __init__(self, socket_path, timeout=60):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def request(method, path, payload=None, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None, timeout=60):
+    """
+    Send one request to the analysis server.
+
+    Args:
+        method (str): 'GET' or 'POST'
+        path (str): '/analyse' or '/health'
+        payload (dict, optional): JSON body
+        host (str): Server host
+        port (int): Server port
+        socket_path (str, optional): Connect over this Unix socket instead of TCP
+        timeout (float): Socket timeout in seconds
+
+    Returns:
+        tuple: (HTTP status, decoded JSON response)
+    """
+    if socket_path:
+        conn = UnixHTTPConnection(socket_path, timeout=timeout)
+    else:
+        conn = http.client.HTTPConnection(host, port, timeout=timeout)
+    try:
+        body = None if payload is None else json.dumps(payload).encode('utf-8')
+        conn.request(method, path, body=body, headers={'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        return response.status, json.loads(response.read() or b'null')
+    finally:
+        conn.close()
+
+
+def analyse_text(text, **kwargs):
+    """Analyse a text on the server; returns (status, results)."""
+    return request('POST', '/analyse', {'text': text}, **kwargs)
+
+
+def analyse_path(path, **kwargs):
+    """Analyse a file readable by the server; returns (status, results)."""
+    return request('POST', '/analyse', {'path': path}, **kwargs)
+
+
+def main():
+    """Main function to send a request to the analysis server."""
+    import argparse
+    import os
+
+    parser = argparse.ArgumentParser(description="Client for the gardening NER analysis server.")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--text", help="Text to analyse")
+    target.add_argument("--path", help="Text file to analyse (read by the server)")
+    target.add_argument("--health", action="store_true", help="Show server health")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Server host (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Server port (default: %(default)s)")
+    parser.add_argument("--socket", default=None, help="Connect over a Unix socket instead of TCP")
+    args = parser.parse_args()
+
+    kwargs = {'host': args.host, 'port': args.port, 'socket_path': args.socket}
+    try:
+        if args.health:
+            status, response = request('GET', '/health', **kwargs)
+        elif args.text is not None:
+            status, response = analyse_text(args.text, **kwargs)
+        else:
+            status, response = analyse_path(os.path.abspath(args.path), **kwargs)
+    except OSError as e:
+        print(f"❌ Could not reach the analysis server: {e}")
+        sys.exit(1)
+
+    print(json.dumps(response, indent=2, ensure_ascii=False))
+    if status != 200:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Long-running analysis server that keeps the spaCy model warm.
+
+Serves a small HTTP/1.1 API on localhost TCP or a Unix socket:
+
+    POST /analyse   {"text": "..."} or {"path": "/path/to/file.txt"}
+    GET  /health    queue depth, request and batch counts, model state
+
+Concurrent requests are collected into micro-batches (up to --max-batch
+requests arriving within --batch-window milliseconds) and analysed with a
+single nlp.pipe call. When more than --max-queue requests are waiting,
+new ones are rejected with 503 so latency stays bounded. The lexicon is
+reloaded before the next batch whenever gardening_terms.py changes (see
+lexicon.py); /health reports the hash in use.
+
+Usage:
+    python ner_server.py --port 8765
+    python ner_server.py --socket /tmp/gardening_ner.sock --batch-window 5
+"""
+
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from lexicon import LexiconReloader, default_lexicon, lexicon_cache_dir, set_default_lexicon
+from match_table import json_default
+from ner_analyzer import GardeningNERAnalyser
+from ner_client import DEFAULT_HOST, DEFAULT_PORT
+from spacy_profiles import PIPELINE_PROFILES, DEFAULT_PROFILE
+
+DEFAULT_BATCH_WINDOW_MS = 10
+DEFAULT_MAX_BATCH = 32
+DEFAULT_MAX_QUEUE = 256
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+class RequestError(Exception):
+    """Error returned to the client with an HTTP status."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class AnalysisServer:
+    """Micro-batching analysis server around a single warm GardeningNERAnalyser."""
+
+    def __init__(self, analyser, batch_window=DEFAULT_BATCH_WINDOW_MS / 1000, max_batch=DEFAULT_MAX_BATCH,
+                 max_queue=DEFAULT_MAX_QUEUE, reload_lexicon=True):
+        """
+        Args:
+            analyser (GardeningNERAnalyser): Analyser whose model is kept loaded
+            batch_window (float): Seconds to wait for more requests after the first of a batch
+            max_batch (int): Maximum requests per batch
+            max_queue (int): Maximum waiting requests before new ones are rejected
+            reload_lexicon (bool): Reload the lexicon when its source file changes
+        """
+        self.analyser = analyser
+        self.reloader = LexiconReloader(default_lexicon(), lexicon_cache_dir()) if reload_lexicon else None
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.max_queue = max_queue
+        self.queue = None
+        # spaCy pipelines aren't thread-safe, so all analysis runs on one thread
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.started = time.time()
+        self.requests = 0
+        self.batches = 0
+        self.rejected = 0
+
+    def warm_up(self):
+        """Load the spaCy model (if NER is enabled) before accepting requests."""
+        if self.analyser.use_ner:
+            self.analyser.nlp
+
+    async def submit(self, item):
+        """
+        Queue one request for analysis and wait for its result.
+
+        Args:
+            item (dict): {'text': ...} or {'path': ...}
+
+        Returns:
+            dict: Analysis results
+        """
+        if self.queue.qsize() >= self.max_queue:
+            self.rejected += 1
+            raise RequestError(503, f"Queue full ({self.max_queue} requests waiting)")
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((item, future))
+        return await future
+
+    async def _collect_batch(self):
+        """Wait for a request, then gather more until the batch window closes or the batch is full."""
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.batch_window
+        while len(batch) < self.max_batch:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def _analyse_batch(self, items):
+        """
+        Read any file paths and analyse the batch; returns a result or exception per item.
+
+        If analysing the batch fails, its items are retried one at a time, so
+        a request that breaks the analyser only fails itself.
+        """
+        self._reload_lexicon()
+        outcomes = [None] * len(items)
+        texts = []
+        indexes = []
+        for index, item in enumerate(items):
+            try:
+                if 'text' in item:
+                    texts.append(item['text'])
+                else:
+                    with open(item['path'], 'r', encoding='utf-8') as f:
+                        texts.append(f.read())
+                indexes.append(index)
+            except (OSError, UnicodeDecodeError) as e:
+                outcomes[index] = RequestError(400, f"Could not read '{item['path']}': {e}")
+
+        if not texts:
+            return outcomes
+        try:
+            for index, results in zip(indexes, self.analyser.extract_gardening_entities_batch(texts)):
+                outcomes[index] = results
+        except Exception as e:
+            if len(texts) == 1:
+                outcomes[indexes[0]] = RequestError(500, f"Analysis failed: {e}")
+                return outcomes
+            for index, text in zip(indexes, texts):
+                try:
+                    outcomes[index] = self.analyser.extract_gardening_entities(text)
+                except Exception as e:
+                    outcomes[index] = RequestError(500, f"Analysis failed: {e}")
+        return outcomes
+
+    def _reload_lexicon(self):
+        """Switch to the new lexicon if its source has changed; runs on the analysis thread."""
+        if self.reloader is None:
+            return
+        lexicon = self.reloader.check()
+        if lexicon is not None:
+            set_default_lexicon(lexicon)
+            self.analyser.set_lexicon(lexicon)
+            print(f"🔄 Lexicon reloaded: {lexicon.hash[:12]}")
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect_batch()
+            items = [item for item, _ in batch]
+            try:
+                outcomes = await loop.run_in_executor(self.executor, self._analyse_batch, items)
+            except Exception as e:
+                outcomes = [RequestError(500, f"Analysis failed: {e}")] * len(batch)
+            self.batches += 1
+            for (_, future), outcome in zip(batch, outcomes):
+                if future.done():
+                    continue
+                if isinstance(outcome, Exception):
+                    future.set_exception(outcome)
+                else:
+                    future.set_result(outcome)
+
+    def health(self):
+        """Return the server's health and counters."""
+        return {
+            'status': 'ok',
+            'uptime_seconds': round(time.time() - self.started, 3),
+            'model_loaded': self.analyser._nlp is not None,
+            'use_ner': self.analyser.use_ner,
+            'lexicon_hash': self.analyser.matcher.hash,
+            'lexicon_reloads': self.reloader.reloads if self.reloader is not None else 0,
+            'lexicon_error': self.reloader.error if self.reloader is not None else None,
+            'queue_depth': self.queue.qsize() if self.queue is not None else 0,
+            'max_queue': self.max_queue,
+            'requests': self.requests,
+            'batches': self.batches,
+            'rejected': self.rejected
+        }
+
+    async def _handle_request(self, method, path, body):
+        if path == '/health':
+            if method != 'GET':
+                raise RequestError(405, "Use GET for /health")
+            return self.health()
+        if path == '/analyse':
+            if method != 'POST':
+                raise RequestError(405, "Use POST for /analyse")
+            try:
+                item = json.loads(body or b'{}')
+            except ValueError:
+                raise RequestError(400, "Request body must be JSON") from None
+            if not isinstance(item, dict) or not (isinstance(item.get('text'), str)
+                                                  or isinstance(item.get('path'), str)):
+                raise RequestError(400, "Request must have a 'text' or 'path' string")
+            self.requests += 1
+            return await self.submit(item)
+        raise RequestError(404, f"Unknown path: {path}")
+
+    async def handle_connection(self, reader, writer):
+        """Serve one HTTP request on a connection, then close it."""
+        status, payload = 200, None
+        try:
+            request_line = (await reader.readline()).decode('latin-1').split()
+            if len(request_line) < 2:
+                raise RequestError(400, "Malformed request line")
+            method, path = request_line[0].upper(), request_line[1].split('?', 1)[0]
+
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode('latin-1').strip()
+                if not line:
+                    break
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            length = int(headers.get('content-length') or 0)
+            if length > MAX_BODY_BYTES:
+                raise RequestError(413, f"Request body exceeds {MAX_BODY_BYTES} bytes")
+            body = await reader.readexactly(length) if length else b''
+            payload = await self._handle_request(method, path, body)
+        except RequestError as e:
+            status, payload = e.status, {'error': str(e)}
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+        except Exception as e:
+            status, payload = 500, {'error': str(e)}
+
+        data = json.dumps(payload, ensure_ascii=False, default=json_default).encode('utf-8')
+        writer.write(f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                     f"Content-Type: application/json\r\n"
+                     f"Content-Length: {len(data)}\r\n"
+                     f"Connection: close\r\n\r\n".encode('latin-1') + data)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None):
+        """
+        Run the server until cancelled.
+
+        Args:
+            host (str): Host to listen on when not using a Unix socket
+            port (int): TCP port
+            socket_path (str, optional): Listen on this Unix socket instead of TCP
+        """
+        self.queue = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self.warm_up)
+
+        if socket_path:
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+            server = await asyncio.start_unix_server(self.handle_connection, path=socket_path)
+            where = socket_path
+        else:
+            server = await asyncio.start_server(self.handle_connection, host=host, port=port)
+            where = f"http://{host}:{port}"
+
+        batcher = asyncio.create_task(self._batch_loop())
+        print(f"✅ Analysis server listening on {where}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+            if socket_path and os.path.exists(socket_path):
+                os.remove(socket_path)
+
+
+def main():
+    """Main function to run the analysis server."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve gardening NER analysis with a warm model.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Host to listen on (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="TCP port (default: %(default)s)")
+    parser.add_argument("--socket", default=None, help="Listen on a Unix socket instead of TCP")
+    parser.add_argument("--profile", choices=list(PIPELINE_PROFILES), default=DEFAULT_PROFILE,
+                        help="spaCy pipeline profile (default: %(default)s)")
+    parser.add_argument("--no-ner", action="store_true", help="Only match the gardening lexicon")
+    parser.add_argument("--no-reload", action="store_true",
+                        help="Keep the lexicon loaded at startup even if gardening_terms.py changes")
+    parser.add_argument("--batch-window", type=float, default=DEFAULT_BATCH_WINDOW_MS,
+                        help="Milliseconds to wait for more requests to batch (default: %(default)s)")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH,
+                        help="Maximum requests per batch (default: %(default)s)")
+    parser.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE,
+                        help="Maximum waiting requests before rejecting with 503 (default: %(default)s)")
+    args = parser.parse_args()
+
+    analyser = GardeningNERAnalyser(profile=args.profile, use_ner=not args.no_ner)
+    server = AnalysisServer(analyser, batch_window=args.batch_window / 1000, max_batch=args.max_batch,
+                            max_queue=args.max_queue, reload_lexicon=not args.no_reload)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.socket))
+    except KeyboardInterrupt:
+        print("\nServer stopped.")
+
+
+if __name__ == "__main__":
+    main()
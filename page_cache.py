@@ -0,0 +1,275 @@
+"""
+On-disk, content-addressed cache of extracted PDF page text.
+
+Each page's text is stored under a key derived from the page object, its
+content streams, the fonts, images and form XObjects it uses, its index and
+the PyMuPDF version, so a revised PDF only re-extracts the pages that
+actually changed. A small manifest per
+file hash lists the page keys of a whole document, which lets a re-run on
+an unchanged PDF skip opening it at all.
+
+Least recently used entries are evicted once the cache exceeds its size cap.
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+from contextlib import contextmanager
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'gardening_mvp', 'pages')
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+# The process umask, read once (os.umask can only be read by setting it)
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
+
+# Indirect references in PDF object source, and the /Parent entries not to follow
+_REF_RE = re.compile(r'(\d+) \d+ R\b')
+_PARENT_RE = re.compile(r'/(?:Parent|P) \d+ \d+ R\b')
+
+
+def file_hash(path):
+    """
+    Compute the SHA-256 hash of a file's contents.
+
+    Args:
+        path (str): Path to the file
+
+    Returns:
+        str: Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _page_resources(doc, xref):
+    """Return the source of a page's /Resources, looking up the page tree if it is inherited."""
+    seen = set()
+    while xref and xref not in seen:
+        seen.add(xref)
+        kind, value = doc.xref_get_key(xref, 'Resources')
+        if kind == 'xref':
+            return doc.xref_object(int(value.split()[0]), compressed=True)
+        if kind == 'dict':
+            return value
+        kind, value = doc.xref_get_key(xref, 'Parent')
+        xref = int(value.split()[0]) if kind == 'xref' else 0
+    return ''
+
+
+def _object_digest(doc, xref, memo):
+    """Hash one PDF object's definition and raw stream, remembering the result in memo."""
+    if xref not in memo:
+        digest = hashlib.sha256(doc.xref_object(xref, compressed=True).encode())
+        if doc.xref_is_stream(xref):
+            digest.update(doc.xref_stream_raw(xref) or b'')
+        memo[xref] = digest.digest()
+    return memo[xref]
+
+
+def page_key(doc, page_num, version, memo=None):
+    """
+    Compute the cache key for one page of an open PDF.
+
+    The key covers the page object, its content streams and every object
+    reachable from its resources: fonts and their font files, images and
+    form XObjects with their own resources. An incremental save that
+    changes any of them changes the key.
+
+    Args:
+        doc (fitz.Document): Open document
+        page_num (int): Zero-based page index
+        version (str): PyMuPDF version string
+        memo (dict, optional): Object digests shared between pages of doc,
+            so fonts and images used on many pages are hashed once
+
+    Returns:
+        str: Hex digest identifying the page's content
+    """
+    memo = {} if memo is None else memo
+    page = doc.load_page(page_num)
+    digest = hashlib.sha256(f"{version}:{page_num}:".encode())
+    digest.update(doc.xref_object(page.xref, compressed=True).encode())
+    for xref in page.get_contents():
+        digest.update(doc.xref_stream_raw(xref) or b'')
+
+    # Objects reachable from the resources; /Parent links lead back into the page tree
+    xref_count = doc.xref_length()
+    resources = _page_resources(doc, page.xref)
+    digest.update(resources.encode())
+    pending = [int(ref) for ref in _REF_RE.findall(_PARENT_RE.sub('', resources))]
+    seen = set()
+    while pending:
+        xref = pending.pop()
+        if xref in seen or not 0 < xref < xref_count:
+            continue
+        seen.add(xref)
+        digest.update(f"{xref}:".encode() + _object_digest(doc, xref, memo))
+        source = doc.xref_object(xref, compressed=True)
+        pending.extend(int(ref) for ref in _REF_RE.findall(_PARENT_RE.sub('', source)))
+    return digest.hexdigest()
+
+
+def write_atomic(path, data):
+    """Write bytes to path via a temporary file so readers never see partial entries."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+@contextmanager
+def open_atomic(path, encoding='utf-8'):
+    """
+    Open a text file for writing that only replaces path once the block completes.
+
+    The text goes to a temporary file next to path, which is renamed over
+    path on success and removed if the block raises, so an interrupted
+    write never leaves a truncated file that looks complete.
+
+    Args:
+        path (str): File to write
+        encoding (str): Text encoding
+
+    Yields:
+        file: The temporary file, open for writing text
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        # mkstemp creates the file private; give it the permissions open() would
+        os.chmod(tmp_path, 0o666 & ~_UMASK)
+        with os.fdopen(fd, 'w', encoding=encoding) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class PageCache:
+    """
+    Size-capped LRU cache of page text stored as files in a directory.
+
+    Recency is tracked with file modification times, so the cache can be
+    shared by several processes.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Args:
+            cache_dir (str): Directory holding the cache
+            max_bytes (int): Size cap in bytes, enforced by trim()
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _page_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + '.txt')
+
+    def _manifest_path(self, digest, version):
+        return os.path.join(self.cache_dir, 'manifests', f"{digest}-{version}.json")
+
+    def contains(self, key):
+        """Return True if a page with this key is cached."""
+        return os.path.exists(self._page_path(key))
+
+    def get(self, key):
+        """
+        Return cached page text, or None on a miss.
+
+        Args:
+            key (str): Page key
+
+        Returns:
+            str: Cached text, or None
+        """
+        path = self._page_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return text
+
+    def put(self, key, text):
+        """Store page text under key."""
+        write_atomic(self._page_path(key), text.encode('utf-8'))
+
+    def get_manifest(self, digest, version):
+        """
+        Return the manifest for a file hash, or None if there is none.
+
+        Args:
+            digest (str): File hash
+            version (str): PyMuPDF version string
+
+        Returns:
+            dict: {'page_count': int, 'pages': {page index (str): key}}
+        """
+        path = self._manifest_path(digest, version)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            os.utime(path)
+            return manifest
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def put_manifest(self, digest, version, manifest):
+        """Store the manifest for a file hash."""
+        write_atomic(self._manifest_path(digest, version), json.dumps(manifest).encode('utf-8'))
+
+    def trim(self):
+        """
+        Evict least recently used entries until the cache fits its size cap.
+
+        Returns:
+            int: Number of entries removed
+        """
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        removed = 0
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+    def stats(self):
+        """Return hit and miss counts as a dict."""
+        return {'hits': self.hits, 'misses': self.misses}
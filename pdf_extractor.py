@@ -1,38 +1,205 @@
 import fitz  # PyMuPDF
 import os
-import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from page_cache import PageCache, DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, file_hash, open_atomic, page_key
+from sharding import parse_shard, select_shard
 
-def extract_text_from_pdf(pdf_path):
+# Number of pages each worker extracts per task
+PAGES_PER_TASK = 16
+
+def page_separator(page_num):
+    """
+    Return the separator written before a page's text.
+    
+    Args:
+        page_num (int): Zero-based page index
+    
+    Returns:
+        str: Separator line, e.g. '\\n--- Page 1 ---\\n'
+    """
+    return f"\n--- Page {page_num + 1} ---\n"
+
+def parse_page_ranges(spec):
+    """
+    Parse a page range specification such as '1-10,15,20-'.
+    
+    Page numbers are one-based and ranges are inclusive. An open-ended
+    range ('20-') runs to the last page and is returned as (start, None).
+    
+    Args:
+        spec (str): Comma-separated page numbers and ranges
+    
+    Returns:
+        list: (first, last) zero-based index pairs; last may be None
+    """
+    ranges = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            first, last = part.split('-', 1)
+            first = int(first) if first else 1
+            last = int(last) if last else None
+        else:
+            first = last = int(part)
+        if first < 1 or (last is not None and last < first):
+            raise ValueError(f"Invalid page range: '{part}'")
+        ranges.append((first - 1, None if last is None else last - 1))
+    return ranges
+
+def resolve_pages(pages, page_count):
+    """
+    Turn a page selection into a list of zero-based page indexes.
+    
+    Args:
+        pages: None for all pages, a range specification string
+            (see parse_page_ranges) or an iterable of zero-based indexes
+        page_count (int): Number of pages in the document
+    
+    Returns:
+        list: Zero-based page indexes within the document
+    """
+    if pages is None:
+        return list(range(page_count))
+    if isinstance(pages, str):
+        selected = []
+        for first, last in parse_page_ranges(pages):
+            last = page_count - 1 if last is None else min(last, page_count - 1)
+            selected.extend(range(first, last + 1))
+        return selected
+    return [p for p in pages if 0 <= p < page_count]
+
+def _extract_pages(pdf_path, page_nums):
+    """Extract text for a batch of pages; runs in a worker process with its own document."""
+    doc = fitz.open(pdf_path)
+    try:
+        return [(page_num, doc.load_page(page_num).get_text()) for page_num in page_nums]
+    finally:
+        doc.close()
+
+def _iter_extracted(pdf_path, page_nums, workers):
+    """Yield (page index, text) for page_nums in order, using a process pool if workers > 1."""
+    if workers <= 1:
+        doc = fitz.open(pdf_path)
+        try:
+            for page_num in page_nums:
+                yield page_num, doc.load_page(page_num).get_text()
+        finally:
+            doc.close()
+        return
+    
+    batches = [page_nums[i:i + PAGES_PER_TASK] for i in range(0, len(page_nums), PAGES_PER_TASK)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        next_batch = 0
+        while pending or next_batch < len(batches):
+            # Keep a bounded number of batches in flight
+            while next_batch < len(batches) and len(pending) < workers * 2:
+                pending.append(executor.submit(_extract_pages, pdf_path, batches[next_batch]))
+                next_batch += 1
+            yield from pending.popleft().result()
+
+def _page_keys(pdf_path, cache):
+    """Return {page index: cache key} for every page, reusing the file's manifest when present."""
+    digest = file_hash(pdf_path)
+    manifest = cache.get_manifest(digest, fitz.VersionBind)
+    if manifest is not None:
+        return manifest['page_count'], {int(k): v for k, v in manifest['pages'].items()}
+    
+    doc = fitz.open(pdf_path)
+    try:
+        page_count = len(doc)
+        memo = {}
+        keys = {page_num: page_key(doc, page_num, fitz.VersionBind, memo) for page_num in range(page_count)}
+    finally:
+        doc.close()
+    cache.put_manifest(digest, fitz.VersionBind, {'page_count': page_count, 'pages': keys})
+    return page_count, keys
+
+def _iter_cached(pdf_path, pages, workers, cache):
+    """Yield pages from the cache, extracting (and storing) only the pages that are missing."""
+    page_count, keys = _page_keys(pdf_path, cache)
+    page_nums = resolve_pages(pages, page_count)
+    missing = [p for p in page_nums if not cache.contains(keys[p])]
+    extracted = _iter_extracted(pdf_path, missing, workers)
+    missing = set(missing)
+    
+    for page_num in page_nums:
+        text = None if page_num in missing else cache.get(keys[page_num])
+        if text is None:
+            if page_num in missing:
+                cache.misses += 1
+                _, text = next(extracted)
+            else:
+                # Evicted by another process since the check above
+                _, text = _extract_pages(pdf_path, [page_num])[0]
+            cache.put(keys[page_num], text)
+        yield page_num, text
+
+def iter_pages(pdf_path, pages=None, workers=1, cache=None):
+    """
+    Extract text from a PDF page by page, in page order.
+    
+    With more than one worker the pages are split into batches that are
+    extracted in a process pool, each worker opening its own document.
+    Only a few batches are in flight at once, so memory stays bounded
+    regardless of the size of the PDF.
+    
+    Args:
+        pdf_path (str): Path to the PDF file
+        pages: Page selection (see resolve_pages), default all pages
+        workers (int): Number of worker processes
+        cache (PageCache, optional): Cache of previously extracted pages
+    
+    Yields:
+        tuple: (zero-based page index, page text)
+    """
+    if cache is not None:
+        yield from _iter_cached(pdf_path, pages, workers, cache)
+        return
+    
+    doc = fitz.open(pdf_path)
+    try:
+        page_nums = resolve_pages(pages, len(doc))
+    finally:
+        doc.close()
+    yield from _iter_extracted(pdf_path, page_nums, workers)
+
+def iter_page_text(pdf_path, pages=None, workers=1, cache=None):
+    """
+    Yield the extracted text in output form: a separator followed by each page's text.
+    
+    Args:
+        pdf_path (str): Path to the PDF file
+        pages: Page selection (see resolve_pages), default all pages
+        workers (int): Number of worker processes
+        cache (PageCache, optional): Cache of previously extracted pages
+    
+    Yields:
+        str: Separator and page text pieces, in order
+    """
+    for page_num, page_text in iter_pages(pdf_path, pages=pages, workers=workers, cache=cache):
+        yield page_separator(page_num)
+        yield page_text
+
+def extract_text_from_pdf(pdf_path, pages=None, workers=1, cache=None):
     """
     Extract text from a PDF file using PyMuPDF (fitz).
     
     Args:
         pdf_path (str): Path to the PDF file
-        
+        pages: Page selection (see resolve_pages), default all pages
+        workers (int): Number of worker processes
+        cache (PageCache, optional): Cache of previously extracted pages
+    
     Returns:
         str: Extracted text from the PDF
     """
     try:
-        # Open the PDF document
-        doc = fitz.open(pdf_path)
-        
-        # Initialize text variable
-        full_text = ""
-        
-        # Iterate through each page
-        for page_num in range(len(doc)):
-            page = doc.load_page(page_num)
-            
-            # Extract text from the page
-            page_text = page.get_text()
-            full_text += f"\n--- Page {page_num + 1} ---\n"
-            full_text += page_text
-            
-        # Close the document
-        doc.close()
-        
-        return full_text
-        
+        return "".join(iter_page_text(pdf_path, pages=pages, workers=workers, cache=cache))
+    
     except Exception as e:
         print(f"Error extracting text from PDF: {e}")
         return None
@@ -41,29 +208,41 @@ def save_text_to_file(text, output_path):
     """
     Save extracted text to a file.
     
+    The file is written atomically: if extraction fails part way, any
+    previous file is left as it was and no truncated text is saved.
+    
     Args:
-        text (str): Text to save
+        text (str or iterable): Text to save, or an iterable of text pieces
+            (e.g. from iter_page_text) that are written as they arrive
         output_path (str): Path where to save the text file
+    
+    Returns:
+        bool: True if the text was saved
     """
     try:
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(text)
+        with open_atomic(output_path) as f:
+            if isinstance(text, str):
+                f.write(text)
+            else:
+                for piece in text:
+                    f.write(piece)
         print(f"Text saved to: {output_path}")
+        return True
     except Exception as e:
         print(f"Error saving text to file: {e}")
+        return False
 
-def main():
-    """
-    Main function to run the PDF text extraction.
-    """
-    # Check if PDF path is provided as command line argument
-    if len(sys.argv) < 2:
-        print("Usage: python pdf_extractor.py <path_to_pdf>")
-        print("Example: python pdf_extractor.py gardening_guide.pdf")
-        return
-    
-    pdf_path = sys.argv[1]
-    
+def _capture_preview(pieces, preview, limit):
+    """Pass text pieces through, keeping the first `limit` characters in `preview`."""
+    captured = 0
+    for piece in pieces:
+        if captured < limit:
+            preview.append(piece[:limit - captured])
+            captured += len(preview[-1])
+        yield piece
+
+def _extract_file(pdf_path, pages, workers, cache, preview_chars=500):
+    """Extract one PDF to <name>_extracted.txt in the current directory, printing a preview."""
     # Check if file exists
     if not os.path.exists(pdf_path):
         print(f"Error: File '{pdf_path}' not found.")
@@ -71,23 +250,67 @@ def main():
     
     print(f"Extracting text from: {pdf_path}")
     
-    # Extract text from PDF
-    extracted_text = extract_text_from_pdf(pdf_path)
-    
-    if extracted_text:
-        # Create output filename
-        base_name = os.path.splitext(os.path.basename(pdf_path))[0]
-        output_path = f"{base_name}_extracted.txt"
-        
-        # Save extracted text to file
-        save_text_to_file(extracted_text, output_path)
-        
-        # Print first 500 characters as preview
-        print("\n--- Text Preview (first 500 characters) ---")
-        print(extracted_text[:500] + "..." if len(extracted_text) > 500 else extracted_text)
-        
-    else:
+    # Create output filename
+    base_name = os.path.splitext(os.path.basename(pdf_path))[0]
+    output_path = f"{base_name}_extracted.txt"
+    
+    # Stream pages to the output file as they are extracted
+    preview = []
+    try:
+        pieces = iter_page_text(pdf_path, pages=pages, workers=workers, cache=cache)
+        saved = save_text_to_file(_capture_preview(pieces, preview, preview_chars + 1), output_path)
+    except Exception as e:
+        print(f"Error extracting text from PDF: {e}")
+        saved = False
+    
+    if saved and preview_chars:
+        # Print the first characters as a preview
+        extracted_text = "".join(preview)
+        print(f"\n--- Text Preview (first {preview_chars} characters) ---")
+        print(extracted_text[:preview_chars] + "..." if len(extracted_text) > preview_chars else extracted_text)
+    
+    elif not saved:
         print("Failed to extract text from PDF.")
 
+def main():
+    """
+    Main function to run the PDF text extraction.
+    """
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        description="Extract text from a PDF file.",
+        epilog="Example: python pdf_extractor.py gardening_guide.pdf --pages 1-50 --workers 4"
+    )
+    parser.add_argument("pdf_path", nargs="+", help="Path to the PDF file (or several)")
+    parser.add_argument("--pages", default=None,
+                        help="Pages to extract, e.g. '1-10,15,20-' (default: all pages)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of worker processes (default: 1)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help="Directory for the per-page text cache (default: %(default)s)")
+    parser.add_argument("--cache-size-mb", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help="Page cache size cap in MB (default: %(default)s)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Always extract pages instead of using the page cache")
+    parser.add_argument("--shard", type=parse_shard, default=None, metavar="I/N",
+                        help="Only extract the PDFs in shard I of N (see sharding.py)")
+    args = parser.parse_args()
+    
+    pdf_paths = select_shard(args.pdf_path, args.shard)
+    if args.shard is not None:
+        print(f"Shard {args.shard[0]}/{args.shard[1]}: {len(pdf_paths)} of {len(args.pdf_path)} PDFs")
+    
+    cache = None
+    if not args.no_cache:
+        cache = PageCache(args.cache_dir, max_bytes=args.cache_size_mb * 1024 * 1024)
+    
+    for pdf_path in pdf_paths:
+        _extract_file(pdf_path, args.pages, args.workers, cache, preview_chars=500 if len(pdf_paths) == 1 else 0)
+    
+    if cache is not None:
+        cache.trim()
+        print(f"\nPage cache: {cache.hits} hits, {cache.misses} misses ({args.cache_dir})")
+
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+"""
+One-command extraction and analysis with concurrent stages.
+
+The stages run in their own threads and pass pages along bounded queues:
+
+    extract    PDF pages (pdf_extractor.iter_pages, optionally in worker
+               processes), or page-sized pieces of an extracted text file
+    normalise  assembles pages into the output text and assigns offsets;
+               with --normalise also cleans each page (text_normaliser.py)
+    lexicon    gardening terms, plant names and techniques (TermMatcher)
+    ner        spaCy entities (nlp.pipe, optionally in worker processes)
+    write      streams the text file and spills hits to disk
+
+A full queue blocks the stage feeding it, so at most a few pages per stage
+are in memory whatever the size of the document. Once every page is
+written, the hits are streamed from the spill files into the usual
+<name>_ner_analysis.json, so no stage ever holds a document's hits. The
+output matches ner_analyzer.py run on the extracted text with NER over
+page-sized chunks (lexicon-only runs are identical). With --normalise,
+running headers are learned as pages stream past, so the first pages
+that carry one keep it, and the 'normalisation' block counts what was
+actually removed.
+
+Threads overlap I/O, PyMuPDF and the spaCy worker processes; CPU-bound
+Python in different stages still shares one interpreter. At the end the
+run reports each stage's utilisation (time busy, waiting for input and
+blocked on a full output queue) and the end-to-end latency of pages.
+
+Usage:
+    python pipeline.py your_gardening_guide.pdf --workers 4 --processes 2
+    python pipeline.py your_gardening_guide_extracted.txt --no-ner
+"""
+
+import contextlib
+import os
+import queue
+import threading
+import time
+
+from hit_spill import HitSpill, write_results
+from instrumentation import max_rss_bytes
+from ner_analyzer import ENTITY_LABELS, GardeningNERAnalyser, output_path_for
+from page_cache import PageCache, DEFAULT_CACHE_DIR, open_atomic
+from pdf_extractor import iter_pages, page_separator
+from spacy_profiles import PIPELINE_PROFILES, DEFAULT_PROFILE, describe_pipeline
+from text_chunks import PAGE_MARKER_RE, DEFAULT_CHUNK_CHARS
+from text_normaliser import TextNormaliser
+
+DEFAULT_QUEUE_SIZE = 8
+
+# Marks the end of a stage's output
+_DONE = object()
+
+# How often blocked stages check whether the pipeline has failed
+_POLL_SECONDS = 0.1
+
+
+class _Stopped(Exception):
+    """Raised inside a stage when another stage has failed."""
+
+
+class StageStats:
+    """Item count and time split of one pipeline stage."""
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.waiting = 0.0
+        self.blocked = 0.0
+        self.started = None
+        self.finished = None
+
+    def report(self):
+        """Return the stage's metrics, with busy time and utilisation."""
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        busy = max(elapsed - self.waiting - self.blocked, 0.0)
+        return {
+            'items': self.items,
+            'seconds': elapsed,
+            'busy_seconds': busy,
+            'waiting_seconds': self.waiting,
+            'blocked_seconds': self.blocked,
+            'utilisation': busy / elapsed if elapsed > 0 else 0.0
+        }
+
+
+class _StageThread(threading.Thread):
+    """Runs one stage function between an input and an output queue."""
+
+    def __init__(self, pipeline, name, func, inbox, outbox):
+        super().__init__(name=f"pipeline-{name}", daemon=True)
+        self.pipeline = pipeline
+        self.func = func
+        self.inbox = inbox
+        self.outbox = outbox
+        self.stats = StageStats(name)
+
+    def run(self):
+        self.stats.started = time.perf_counter()
+        try:
+            outputs = self.func() if self.inbox is None else self.func(self._inputs())
+            for item in outputs:
+                self._put(item)
+                if self.inbox is None:
+                    self.stats.items += 1
+            self._put(_DONE)
+        except _Stopped:
+            pass
+        except BaseException as e:
+            self.pipeline.fail(e)
+        finally:
+            self.stats.finished = time.perf_counter()
+
+    def _inputs(self):
+        while True:
+            start = time.perf_counter()
+            item = self._get()
+            self.stats.waiting += time.perf_counter() - start
+            if item is _DONE:
+                return
+            self.stats.items += 1
+            yield item
+
+    def _get(self):
+        while True:
+            try:
+                return self.inbox.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                if self.pipeline.stopped.is_set():
+                    raise _Stopped()
+
+    def _put(self, item):
+        if self.outbox is None:
+            return
+        start = time.perf_counter()
+        while True:
+            try:
+                self.outbox.put(item, timeout=_POLL_SECONDS)
+                break
+            except queue.Full:
+                if self.pipeline.stopped.is_set():
+                    raise _Stopped()
+        self.stats.blocked += time.perf_counter() - start
+
+
+def iter_text_pieces(text_path, max_chars=DEFAULT_CHUNK_CHARS):
+    """
+    Stream an extracted text file in page-sized pieces.
+
+    Pieces start at '--- Page N ---' lines. Pages longer than max_chars
+    are also split after blank lines. The pieces concatenate to the text
+    as ner_analyzer.py reads it.
+
+    Args:
+        text_path (str): Extracted text file
+        max_chars (int): Split pages longer than this at paragraph breaks
+
+    Yields:
+        tuple: (page number, or 0 before the first page marker; piece)
+    """
+    page = 0
+    lines = []
+    size = 0
+    with open(text_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            marker = PAGE_MARKER_RE.match(line)
+            if marker:
+                if lines:
+                    yield page, ''.join(lines)
+                page = int(marker.group(1))
+                lines, size = [], 0
+            lines.append(line)
+            size += len(line)
+            if size >= max_chars and not line.strip():
+                yield page, ''.join(lines)
+                lines, size = [], 0
+    if lines:
+        yield page, ''.join(lines)
+
+
+class AnalysisPipeline:
+    """Extraction, normalisation, lexicon, NER and output stages connected by bounded queues."""
+
+    def __init__(self, analyser, queue_size=DEFAULT_QUEUE_SIZE, extract_workers=1, pages=None,
+                 page_cache=None, spill_dir=None):
+        """
+        Args:
+            analyser (GardeningNERAnalyser): Provides the lexicon matcher and
+                spaCy pipeline, and its use_ner, normalise, n_process and
+                batch_size settings
+            queue_size (int): Pages each queue holds before its producer blocks
+            extract_workers (int): Worker processes for PDF page extraction
+            pages: PDF page selection (see pdf_extractor.resolve_pages)
+            page_cache (PageCache, optional): Cache of extracted PDF pages
+            spill_dir (str, optional): Directory for the temporary hit files
+        """
+        self.analyser = analyser
+        self.queue_size = queue_size
+        self.extract_workers = extract_workers
+        self.pages = pages
+        self.page_cache = page_cache
+        self.spill_dir = spill_dir
+        self.stopped = threading.Event()
+        self.error = None
+        self._lock = threading.Lock()
+        self._ranks = {group: rank for rank, group in enumerate(analyser.matcher.groups)}
+
+    def fail(self, error):
+        """Record a stage's error and stop the other stages."""
+        with self._lock:
+            if self.error is None:
+                self.error = error
+        self.stopped.set()
+
+    def run(self, input_path, text_path=None, output_path=None):
+        """
+        Extract (for PDFs) and analyse a document.
+
+        Args:
+            input_path (str): PDF or extracted text file
+            text_path (str, optional): Where to write the extracted text of a
+                PDF; defaults to <name>_extracted.txt next to the PDF
+            output_path (str, optional): Analysis results file; defaults to
+                <name>_ner_analysis.json next to the text
+
+        Returns:
+            dict: 'summary', 'output', 'text', and the run metrics ('stages',
+                'wall_seconds', 'pages', 'chars', 'latency', 'max_rss_bytes')
+        """
+        is_pdf = input_path.lower().endswith('.pdf')
+        if text_path is None:
+            text_path = os.path.splitext(input_path)[0] + '_extracted.txt' if is_pdf else input_path
+        output_path = output_path or output_path_for(text_path)
+        self.stopped.clear()
+        self.error = None
+        self._latencies = []
+        self._chars = 0
+        self._normalised_chars = 0
+        self._normaliser = TextNormaliser(vocabulary=self.analyser.matcher.canonical) if self.analyser.normalise else None
+
+        use_ner = self.analyser.use_ner
+        stages = [('extract', lambda: self._extract(input_path, is_pdf)),
+                  ('normalise', lambda items: self._normalise(items, is_pdf)),
+                  ('lexicon', self._lexicon)]
+        if use_ner:
+            self.analyser.nlp  # load the model before timing starts
+            stages.append(('ner', self._ner))
+
+        start = time.perf_counter()
+        with HitSpill(self.spill_dir) as spill:
+            # The text file only appears once the whole PDF has been extracted
+            with open_atomic(text_path) if is_pdf else contextlib.nullcontext() as text_file:
+                stages.append(('write', lambda items: self._write(items, spill, text_file)))
+                threads = []
+                inbox = None
+                for i, (name, func) in enumerate(stages):
+                    outbox = queue.Queue(self.queue_size) if i < len(stages) - 1 else None
+                    threads.append(_StageThread(self, name, func, inbox, outbox))
+                    inbox = outbox
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                if self.error is not None:
+                    raise self.error
+
+            pipeline = describe_pipeline(self.analyser.nlp, self.analyser.profile) if use_ner else None
+            extra = {'lexicon_hash': self.analyser.matcher.hash,
+                     'settings_hash': self.analyser.settings_hash}
+            if self._normaliser is not None:
+                extra['normalisation'] = dict(self._normaliser.report(), original_chars=self._chars,
+                                              normalised_chars=self._normalised_chars)
+            write_start = time.perf_counter()
+            summary = write_results(spill, output_path, self._ranks, pipeline, extra)
+            finish_seconds = time.perf_counter() - write_start
+
+        wall = time.perf_counter() - start
+        latencies = sorted(self._latencies)
+        return {
+            'summary': summary,
+            'output': output_path,
+            'text': text_path,
+            'stages': {thread.stats.name: thread.stats.report() for thread in threads},
+            'results_seconds': finish_seconds,
+            'wall_seconds': wall,
+            'pages': len(latencies),
+            'chars': self._chars,
+            'latency': {
+                'mean': sum(latencies) / len(latencies) if latencies else 0.0,
+                'p50': _percentile(latencies, 0.5),
+                'p95': _percentile(latencies, 0.95),
+                'max': latencies[-1] if latencies else 0.0
+            },
+            'max_rss_bytes': max_rss_bytes()
+        }
+
+    def _extract(self, input_path, is_pdf):
+        """Yield raw pages, timing each from the moment it is requested."""
+        if is_pdf:
+            pieces = ((page_num + 1, text) for page_num, text in
+                      iter_pages(input_path, self.pages, self.extract_workers, self.page_cache))
+        else:
+            pieces = iter_text_pieces(input_path, self.analyser.chunk_chars or DEFAULT_CHUNK_CHARS)
+        while True:
+            requested = time.perf_counter()
+            try:
+                page, raw = next(pieces)
+            except StopIteration:
+                return
+            yield {'page': page, 'raw': raw, 'created': requested}
+
+    def _normalise(self, items, is_pdf):
+        """
+        Turn raw pages into pieces of the output text, with their offsets in it.
+        
+        The text to analyse goes in 'analysed': the piece itself or, when
+        normalising, its clean form with an OffsetMap back to the piece.
+        """
+        offset = 0
+        for item in items:
+            raw = item.pop('raw')
+            item['text'] = page_separator(item['page'] - 1) + raw if is_pdf else raw
+            item['offset'] = offset
+            offset += len(item['text'])
+            if self._normaliser is None:
+                item['analysed'], item['map'] = item['text'], None
+            else:
+                item['analysed'], item['map'] = self._normaliser.normalise(item['text'])
+                self._normalised_chars += len(item['analysed'])
+            yield item
+
+    def _lexicon(self, items):
+        for item in items:
+            item['lexicon'] = self.analyser.matcher.find_tables(item['analysed'])
+            yield item
+
+    def _ner(self, items):
+        labels = set(ENTITY_LABELS)
+        docs = self.analyser.nlp.pipe(((item['analysed'], item) for item in items), as_tuples=True,
+                                      n_process=self.analyser.n_process, batch_size=self.analyser.batch_size)
+        for doc, item in docs:
+            item['entities'] = [(ent.text, ent.start_char, ent.end_char, ent.label_)
+                                for ent in doc.ents if ent.label_ in labels]
+            yield item
+
+    def _write(self, items, spill, text_file):
+        """
+        Write each piece's text and spill its hits, with offsets in the full text.
+        
+        Hits found in normalised text are spilled with their original offsets
+        and text, plus the normalised text the summary counts.
+        """
+        for item in items:
+            if text_file is not None:
+                text_file.write(item['text'])
+
+            hits = [(label, label, text, start, end) for text, start, end, label in item.get('entities', ())]
+            for section, table in item['lexicon'].items():
+                hits.extend(((section, self._ranks[section, category]), category, text, start, end)
+                            for text, start, end, category in table.rows())
+            by_key = {}
+            offset, offsets, piece = item['offset'], item['map'], item['text']
+            for key, value, text, start, end in hits:
+                if offsets is None:
+                    row = (text, start + offset, end + offset, value)
+                else:
+                    start, end = offsets.span(start, end)
+                    row = (piece[start:end], start + offset, end + offset, value, text)
+                by_key.setdefault(key, []).append(row)
+            for key, rows in by_key.items():
+                spill.append(key, rows)
+
+            self._chars += len(item['text'])
+            self._latencies.append(time.perf_counter() - item['created'])
+        return ()
+
+
+def _percentile(values, fraction):
+    """Return a percentile of sorted values (nearest rank), or 0.0 if there are none."""
+    if not values:
+        return 0.0
+    return values[min(int(fraction * len(values)), len(values) - 1)]
+
+
+def print_report(report):
+    """Print per-stage utilisation and end-to-end latency."""
+    print("\n" + "="*78)
+    print("🚰 PIPELINE STAGES")
+    print("="*78)
+    print(f"{'Stage':<12}{'Items':>8}{'Busy (s)':>11}{'Util %':>9}{'Waiting in %':>15}{'Blocked out %':>16}")
+    for name, stats in report['stages'].items():
+        seconds = stats['seconds'] or 1e-9
+        print(f"{name:<12}{stats['items']:>8}{stats['busy_seconds']:>11.2f}{stats['utilisation'] * 100:>9.1f}"
+              f"{stats['waiting_seconds'] / seconds * 100:>15.1f}{stats['blocked_seconds'] / seconds * 100:>16.1f}")
+    print("-"*78)
+    latency = report['latency']
+    wall = report['wall_seconds']
+    print(f"Pages: {report['pages']}, characters: {report['chars']}, wall time: {wall:.2f}s "
+          f"({report['chars'] / max(wall, 1e-9) / 1e6:.2f} M chars/s)")
+    print(f"Page latency (s): mean {latency['mean']:.3f}, p50 {latency['p50']:.3f}, "
+          f"p95 {latency['p95']:.3f}, max {latency['max']:.3f}")
+    print(f"Results file written in {report['results_seconds']:.2f}s")
+    if report['max_rss_bytes'] is not None:
+        print(f"Peak RSS: {report['max_rss_bytes'] / (1024 * 1024):.1f} MB")
+    print("="*78)
+
+
+def main():
+    """Main function to extract and analyse a document in one pipelined run."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Extract and analyse a gardening guide with concurrent pipeline stages.",
+        epilog="Example: python pipeline.py gardening_guide.pdf --workers 4 --processes 2"
+    )
+    parser.add_argument("input", help="PDF or extracted text file")
+    parser.add_argument("--output", default=None, help="Results file (default: <name>_ner_analysis.json)")
+    parser.add_argument("--pages", default=None, help="PDF pages to extract, e.g. '1-10,15,20-' (default: all)")
+    parser.add_argument("--workers", type=int, default=1, help="Processes for PDF page extraction (default: 1)")
+    parser.add_argument("--processes", type=int, default=1, help="Processes for spaCy NER (default: 1)")
+    parser.add_argument("--batch-size", type=int, default=4, help="Pages per nlp.pipe batch (default: 4)")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help="Pages held between two stages before the earlier one waits (default: %(default)s)")
+    parser.add_argument("--profile", choices=list(PIPELINE_PROFILES), default=DEFAULT_PROFILE,
+                        help="spaCy pipeline profile (default: %(default)s)")
+    parser.add_argument("--model", default=None, help="spaCy model name, overriding the profile's model")
+    parser.add_argument("--no-ner", action="store_true", help="Only match the gardening lexicon; skip spaCy entirely")
+    parser.add_argument("--normalise", action="store_true",
+                        help="Analyse cleaned page text; offsets still refer to the extracted text")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help="Directory for the per-page PDF text cache (default: %(default)s)")
+    parser.add_argument("--no-cache", action="store_true", help="Always extract PDF pages instead of using the cache")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"❌ Error: File '{args.input}' not found.")
+        return
+
+    analyser = GardeningNERAnalyser(profile=args.profile, model=args.model, n_process=args.processes,
+                                    batch_size=args.batch_size, use_ner=not args.no_ner, normalise=args.normalise)
+    page_cache = None if args.no_cache else PageCache(args.cache_dir)
+    pipeline = AnalysisPipeline(analyser, queue_size=args.queue_size, extract_workers=args.workers,
+                                pages=args.pages, page_cache=page_cache)
+    try:
+        report = pipeline.run(args.input, output_path=args.output)
+    except Exception as e:
+        print(f"❌ Error running pipeline: {e}")
+        return
+
+    if report['text'] != args.input:
+        print(f"Text saved to: {report['text']}")
+    print(f"✅ Analysis complete! Results saved to: {report['output']}")
+    analyser._print_summary(report['summary'])
+    print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Deterministic sharding of corpus runs across nodes, and merging the shards.
+
+`--shard i/N` (shards numbered 1 to N) keeps the inputs whose file name
+hashes to shard i. The hash is SHA-256 of the base name, so every node
+picks the same partition from the same input list, however the shared
+filesystem is mounted.
+
+A sharded batch_runner.py run writes, next to the per-document outputs:
+
+    shard-i-of-N.manifest.json  inputs, outputs and SHA-256 checksums
+    shard-i-of-N.counts.json    summary counts for each document
+    shard-i-of-N.summary.json   the shard's own summary
+
+The merge command checks that all N shards are present and that the
+checksummed files are intact. It then merges the per-document counts in
+input order, as a single-node run does, so corpus_summary.json and
+corpus_counts.json are identical to a single-node run's:
+
+    python batch_runner.py guides/ --output-dir results --shard 1/2 &
+    python batch_runner.py guides/ --output-dir results --shard 2/2 &
+    wait
+    python sharding.py merge results
+"""
+
+import glob
+import hashlib
+import json
+import os
+import re
+
+from page_cache import file_hash, write_atomic
+from streaming_summary import SummaryAggregator, save_counts
+
+MANIFEST_FORMAT = 'gardening-shard-manifest'
+COUNTS_FORMAT = 'gardening-shard-counts'
+SHARD_VERSION = 1
+
+MANIFEST_SUFFIX = '.manifest.json'
+COUNTS_SUFFIX = '.counts.json'
+SUMMARY_SUFFIX = '.summary.json'
+COOCCURRENCE_SUFFIX = '.cooccurrence.npz'
+
+SHARD_RE = re.compile(r'^\s*(\d+)\s*/\s*(\d+)\s*$')
+
+
+def parse_shard(spec):
+    """
+    Parse a shard specification such as '2/4'.
+
+    Args:
+        spec (str): 'i/N' with 1 <= i <= N
+
+    Returns:
+        tuple: (i, N)
+
+    Raises:
+        ValueError: If the specification is malformed or out of range
+    """
+    match = SHARD_RE.match(spec)
+    if not match:
+        raise ValueError(f"Invalid shard '{spec}': expected i/N, e.g. 1/4")
+    index, count = int(match.group(1)), int(match.group(2))
+    if not 1 <= index <= count:
+        raise ValueError(f"Invalid shard '{spec}': i must be between 1 and N")
+    return index, count
+
+
+def shard_of(path, count):
+    """Return the shard (1 to count) an input file belongs to."""
+    digest = hashlib.sha256(os.path.basename(path).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % count + 1
+
+
+def select_shard(paths, shard):
+    """
+    Keep the inputs that belong to a shard.
+
+    Args:
+        paths (list): Input paths, e.g. from batch_runner.collect_inputs
+        shard (tuple): (i, N) from parse_shard, or None for all inputs
+
+    Returns:
+        list: The shard's paths, in their original order
+    """
+    if shard is None:
+        return list(paths)
+    index, count = shard
+    return [path for path in paths if shard_of(path, count) == index]
+
+
+def shard_name(shard):
+    """Return the file name prefix of a shard's files, e.g. 'shard-2-of-4'."""
+    return f"shard-{shard[0]}-of-{shard[1]}"
+
+
+def _checksummed(path, base_dir):
+    """Return a manifest entry for a file: its path relative to base_dir and its checksum."""
+    return {'path': os.path.relpath(path, base_dir), 'sha256': file_hash(path)}
+
+
+def write_shard(output_dir, shard, statuses, capacity=None, cooccurrence=None):
+    """
+    Write a shard's per-document counts, summary and manifest.
+
+    Args:
+        output_dir (str): Output directory shared by the shards
+        shard (tuple): (i, N)
+        statuses (list): Document statuses from batch_runner.run_batch, in input order
+        capacity (int, optional): Counter capacity the shard was run with
+        cooccurrence (CooccurrenceMatrix, optional): The shard's co-occurrence counts
+
+    Returns:
+        str: Path of the manifest
+    """
+    prefix = os.path.join(output_dir, shard_name(shard))
+
+    documents = [{'path': status['path'], 'counts': status['counts'].to_dict()}
+                 for status in statuses if 'counts' in status]
+    counts_data = {'format': COUNTS_FORMAT, 'version': SHARD_VERSION, 'documents': documents}
+    write_atomic(prefix + COUNTS_SUFFIX, json.dumps(counts_data, ensure_ascii=False).encode('utf-8'))
+
+    aggregator = SummaryAggregator(capacity)
+    for status in statuses:
+        if 'counts' in status:
+            aggregator.merge(status['counts'])
+    summary = json.dumps(aggregator.summary(documents=True), indent=2, ensure_ascii=False)
+    write_atomic(prefix + SUMMARY_SUFFIX, summary.encode('utf-8'))
+
+    files = {'counts': _checksummed(prefix + COUNTS_SUFFIX, output_dir),
+             'summary': _checksummed(prefix + SUMMARY_SUFFIX, output_dir)}
+    if cooccurrence is not None:
+        cooccurrence.save(prefix + COOCCURRENCE_SUFFIX)
+        files['cooccurrence'] = _checksummed(prefix + COOCCURRENCE_SUFFIX, output_dir)
+
+    manifest = {
+        'format': MANIFEST_FORMAT,
+        'version': SHARD_VERSION,
+        'shard': shard[0],
+        'shards': shard[1],
+        'capacity': capacity,
+        'documents': [
+            {
+                'input': status['path'],
+                'status': status['status'],
+                'outputs': [_checksummed(path, output_dir) for path in status.get('outputs', [])
+                            if os.path.exists(path)]
+            }
+            for status in statuses
+        ],
+        'files': files
+    }
+    write_atomic(prefix + MANIFEST_SUFFIX, json.dumps(manifest, indent=2, ensure_ascii=False).encode('utf-8'))
+    return prefix + MANIFEST_SUFFIX
+
+
+def load_manifests(directories):
+    """
+    Load and check the shard manifests in one or more output directories.
+
+    Args:
+        directories (list): Directories holding shard-*.manifest.json files
+
+    Returns:
+        list: (directory, manifest) pairs, ordered by shard
+
+    Raises:
+        ValueError: If shards are missing, duplicated or from different runs
+    """
+    found = []
+    for directory in directories:
+        for path in sorted(glob.glob(os.path.join(directory, 'shard-*' + MANIFEST_SUFFIX))):
+            with open(path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('format') != MANIFEST_FORMAT:
+                raise ValueError(f"Not a {MANIFEST_FORMAT} file: {path}")
+            if manifest.get('version') != SHARD_VERSION:
+                raise ValueError(f"Unsupported {MANIFEST_FORMAT} version in {path}: {manifest.get('version')}")
+            found.append((directory, manifest))
+    if not found:
+        raise ValueError(f"No shard manifests found in: {', '.join(directories)}")
+
+    counts = {manifest['shards'] for _, manifest in found}
+    if len(counts) != 1:
+        raise ValueError(f"Manifests come from runs with different shard counts: {sorted(counts)}")
+    count = counts.pop()
+    shards = sorted(manifest['shard'] for _, manifest in found)
+    if shards != list(range(1, count + 1)):
+        missing = sorted(set(range(1, count + 1)) - set(shards))
+        duplicated = sorted({shard for shard in shards if shards.count(shard) > 1})
+        raise ValueError(f"Incomplete set of {count} shards (missing: {missing or 'none'}, "
+                         f"duplicated: {duplicated or 'none'})")
+    capacities = {manifest['capacity'] for _, manifest in found}
+    if len(capacities) != 1:
+        raise ValueError(f"Shards were run with different capacities: {sorted(capacities, key=str)}")
+    return sorted(found, key=lambda item: item[1]['shard'])
+
+
+def verify_file(directory, entry):
+    """Raise ValueError if a checksummed file is missing or has changed."""
+    path = os.path.join(directory, entry['path'])
+    if not os.path.exists(path):
+        raise ValueError(f"Missing shard file: {path}")
+    if file_hash(path) != entry['sha256']:
+        raise ValueError(f"Checksum mismatch: {path}")
+    return path
+
+
+def merge_shards(directories, output_dir=None, verify_outputs=False):
+    """
+    Merge complete shard outputs into a corpus summary identical to a single-node run.
+
+    Args:
+        directories (list): Output directories holding the shard files
+        output_dir (str, optional): Where to write corpus_summary.json and
+            corpus_counts.json; defaults to the first directory
+        verify_outputs (bool): Also check the checksums of every per-document output
+
+    Returns:
+        dict: Corpus summary
+    """
+    from batch_runner import CORPUS_SUMMARY_FILE, CORPUS_COUNTS_FILE, CORPUS_COOCCURRENCE_FILE
+
+    manifests = load_manifests(directories)
+    output_dir = output_dir or directories[0]
+
+    documents = []
+    matrices = []
+    for directory, manifest in manifests:
+        files = manifest['files']
+        with open(verify_file(directory, files['counts']), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('format') != COUNTS_FORMAT:
+            raise ValueError(f"Not a {COUNTS_FORMAT} file: {files['counts']['path']}")
+        documents.extend(data['documents'])
+        if 'cooccurrence' in files:
+            from cooccurrence import CooccurrenceMatrix
+            matrices.append(CooccurrenceMatrix.load(verify_file(directory, files['cooccurrence'])))
+        if verify_outputs:
+            for document in manifest['documents']:
+                for entry in document['outputs']:
+                    verify_file(directory, entry)
+
+    # Merge in input order, as run_batch does, so top-k ties break the same way
+    aggregator = SummaryAggregator(manifests[0][1]['capacity'])
+    for document in sorted(documents, key=lambda document: document['path']):
+        aggregator.merge(SummaryAggregator.from_dict(document['counts']))
+
+    os.makedirs(output_dir, exist_ok=True)
+    summary = aggregator.summary(documents=True)
+    with open(os.path.join(output_dir, CORPUS_SUMMARY_FILE), 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+    save_counts(aggregator, os.path.join(output_dir, CORPUS_COUNTS_FILE))
+    if matrices:
+        for matrix in matrices[1:]:
+            matrices[0].merge(matrix)
+        matrices[0].save(os.path.join(output_dir, CORPUS_COOCCURRENCE_FILE))
+    return summary
+
+
+def main():
+    """Main function to plan shards or merge shard outputs."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Plan sharded corpus runs and merge their outputs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    plan = commands.add_parser("plan", help="Show which shard each input belongs to")
+    plan.add_argument("inputs", nargs="+", help="Directories, files or glob patterns of PDFs/text files")
+    plan.add_argument("--shards", type=int, required=True, help="Number of shards")
+
+    merge = commands.add_parser("merge", help="Merge shard outputs into a corpus summary")
+    merge.add_argument("directories", nargs="+", help="Output directories holding shard files")
+    merge.add_argument("--output-dir", default=None, help="Where to write the corpus files (default: first directory)")
+    merge.add_argument("--verify-outputs", action="store_true",
+                       help="Also check the checksum of every per-document output")
+    args = parser.parse_args()
+
+    if args.command == "plan":
+        from batch_runner import collect_inputs
+        for path in collect_inputs(args.inputs):
+            print(f"{shard_of(path, args.shards)}/{args.shards}\t{path}")
+        return
+
+    try:
+        summary = merge_shards(args.directories, args.output_dir, args.verify_outputs)
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+        raise SystemExit(1)
+    print(f"✅ Merged shards: {summary['documents']} documents, written to {args.output_dir or args.directories[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Mergeable frequency summaries for counting over large corpora.
+
+HeavyHitters keeps exact counts until it holds more than twice its
+capacity, then compresses with a Misra-Gries step: the capacity-th largest
+count is subtracted from every entry and entries that drop to zero are
+removed. Reported counts are then lower bounds, off by at most `error`,
+and any item occurring more than `error` times is guaranteed to be kept.
+Two summaries merge by adding counts (and errors) and compressing again,
+so partial summaries from chunks, files or machines can be combined in
+any order.
+"""
+
+from collections import Counter
+
+
+class HeavyHitters:
+    """Bounded-memory, mergeable top-k counter (Misra-Gries summary)."""
+
+    def __init__(self, capacity=100000):
+        """
+        Args:
+            capacity (int): Number of items kept after compression; memory is
+                bounded by about twice this many entries. None keeps every
+                item, i.e. exact counting.
+        """
+        self.capacity = capacity
+        self.counts = Counter()
+        self.error = 0
+
+    def add(self, item, count=1):
+        """Count an item."""
+        self.counts[item] += count
+        if self.capacity is not None and len(self.counts) > 2 * self.capacity:
+            self._compress()
+
+    def update(self, items):
+        """Count every item in an iterable (or add the counts of a mapping)."""
+        self.counts.update(items)
+        if self.capacity is not None and len(self.counts) > 2 * self.capacity:
+            self._compress()
+
+    def merge(self, other):
+        """
+        Merge another summary into this one.
+
+        Args:
+            other (HeavyHitters): Summary built over different data
+
+        Returns:
+            HeavyHitters: self
+        """
+        self.counts.update(other.counts)
+        self.error += other.error
+        if self.capacity is not None and len(self.counts) > 2 * self.capacity:
+            self._compress()
+        return self
+
+    def _compress(self):
+        ranked = sorted(self.counts.values(), reverse=True)
+        cut = ranked[self.capacity] if len(ranked) > self.capacity else 0
+        if cut <= 0:
+            return
+        self.counts = Counter({item: count - cut for item, count in self.counts.items() if count > cut})
+        self.error += cut
+
+    @property
+    def exact(self):
+        """True if no compression has happened, i.e. all counts are exact."""
+        return self.error == 0
+
+    def most_common(self, n=None):
+        """
+        Return the n most frequent items and their (lower bound) counts.
+
+        Args:
+            n (int, optional): Number of items, default all
+
+        Returns:
+            list: (item, count) pairs
+        """
+        return self.counts.most_common(n)
+
+    def __len__(self):
+        return len(self.counts)
+
+    def to_dict(self):
+        """Return the summary as a JSON-serialisable dict."""
+        return {'capacity': self.capacity, 'error': self.error, 'counts': dict(self.counts)}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a summary from to_dict() output."""
+        summary = cls(data['capacity'])
+        summary.counts = Counter(data['counts'])
+        summary.error = data['error']
+        return summary
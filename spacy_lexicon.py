@@ -0,0 +1,154 @@
+"""
+Gardening lexicon matching as a spaCy pipeline component.
+
+The 'gardening_lexicon' component compiles the lexicon in gardening_terms.py
+into a spaCy PhraseMatcher, so the tokens produced for NER are reused for
+term matching instead of scanning the raw text again. Matching is on the
+lowercase form of each token ('lower') or on its lemma ('lemma'), which
+folds plurals without relying on the optional trailing characters in the
+lexicon fragments. Lemma matching needs the tagger, attribute ruler and
+lemmatizer, so it can't be used with the 'fast' profile.
+
+Hits are stored as span groups, doc.spans['gardening_terms'],
+doc.spans['plant_names'] and doc.spans['gardening_techniques'], with the
+category as the span label. Within each lexicon group, overlapping matches
+are resolved like the regex alternation in TermMatcher: leftmost match
+first, and the first listed alternative when several start at one token.
+
+spaCy is only imported when the component is added to a pipeline.
+"""
+
+from term_matcher import expand_pattern, get_default_matcher
+
+LEXICON_COMPONENT = 'gardening_lexicon'
+
+# Analyser lexicon modes: 'trie' matches the raw text with TermMatcher, the
+# others run this component inside the spaCy pass on the given token attribute
+LEXICON_MODES = {
+    'trie': None,
+    'lower': 'LOWER',
+    'lemma': 'LEMMA'
+}
+
+
+class LexiconComponent:
+    """spaCy component that adds lexicon hits to doc.spans, one span group per result key."""
+
+    def __init__(self, nlp, attr='LOWER', matcher=None):
+        """
+        Args:
+            nlp (spacy.language.Language): Pipeline the component is added to
+            attr (str): Token attribute to match on: 'LOWER' or 'LEMMA'
+            matcher (TermMatcher, optional): Lexicon to compile; defaults to
+                the shared gardening_terms.py matcher
+        """
+        from spacy.matcher import PhraseMatcher
+
+        self.term_matcher = matcher or get_default_matcher()
+        self.phrase_matcher = PhraseMatcher(nlp.vocab, attr=attr)
+        # Match id -> (group id, alternative index)
+        self.alternatives = {}
+
+        entries = []
+        for group_id, patterns in enumerate(self.term_matcher.patterns):
+            for alt_index, fragment in enumerate(patterns):
+                key = f"{LEXICON_COMPONENT}:{group_id}:{alt_index}"
+                self.alternatives[nlp.vocab.strings.add(key)] = (group_id, alt_index)
+                entries.append((key, expand_pattern(fragment)))
+
+        # Lemma patterns must go through the pipeline to get their lemmas
+        variants = [variant for _, group in entries for variant in group]
+        if attr == 'LEMMA':
+            docs = iter(nlp.pipe(variants))
+        else:
+            docs = iter([nlp.make_doc(variant) for variant in variants])
+        for key, group in entries:
+            self.phrase_matcher.add(key, [next(docs) for _ in group])
+
+    def __call__(self, doc):
+        from spacy.tokens import Span
+
+        groups = self.term_matcher.groups
+        group_spans = [[] for _ in groups]
+        next_free = [0] * len(groups)
+
+        matches = [(start, self.alternatives[match_id], end) for match_id, start, end in self.phrase_matcher(doc)]
+        for start, (group_id, _), end in sorted(matches, key=lambda m: (m[0], m[1][1])):
+            if start < next_free[group_id]:
+                continue
+            group_spans[group_id].append(Span(doc, start, end, label=groups[group_id][1]))
+            next_free[group_id] = end
+
+        spans = {key: [] for key in self.term_matcher.keys}
+        for (key, _), hits in zip(groups, group_spans):
+            spans[key].extend(hits)
+        for key, hits in spans.items():
+            doc.spans[key] = hits
+        return doc
+
+
+def _make_lexicon_component(nlp, name, attr):
+    return LexiconComponent(nlp, attr)
+
+
+def add_lexicon_component(nlp, mode):
+    """
+    Add the gardening lexicon component to the end of a pipeline.
+
+    Args:
+        nlp (spacy.language.Language): Loaded pipeline
+        mode (str): Lexicon mode, 'lower' or 'lemma'
+
+    Raises:
+        ValueError: If lemma matching is requested for a pipeline without a lemmatizer
+    """
+    from spacy.language import Language
+
+    attr = LEXICON_MODES[mode]
+    if attr == 'LEMMA' and 'lemmatizer' not in nlp.pipe_names:
+        raise ValueError("Lemma matching needs a pipeline with a lemmatizer; use the 'default' or "
+                         "'accurate' profile, or lexicon mode 'lower'")
+    if not Language.has_factory(LEXICON_COMPONENT):
+        Language.factory(LEXICON_COMPONENT, default_config={'attr': 'LOWER'}, func=_make_lexicon_component)
+    nlp.add_pipe(LEXICON_COMPONENT, last=True, config={'attr': attr})
+
+
+def collect_spans(doc, offset, collected):
+    """
+    Add a doc's lexicon hits to a per-text collection.
+
+    Args:
+        doc (spacy.tokens.Doc): Doc (or chunk) processed by the lexicon component
+        offset (int): Character offset of the doc in the full text
+        collected (dict): Result key -> list, filled with (group rank, start, end, category)
+    """
+    ranks = _group_ranks()
+    for key, hits in collected.items():
+        for span in doc.spans.get(key, []):
+            hits.append((ranks[key, span.label_], span.start_char + offset, span.end_char + offset, span.label_))
+
+
+def build_tables(source, collected):
+    """
+    Turn collected hits into MatchTables, ordered like TermMatcher.find_tables.
+
+    Args:
+        source (str): Full text the offsets refer to
+        collected (dict): Output of collect_spans
+
+    Returns:
+        dict: Result key -> MatchTable
+    """
+    from match_table import MatchTable
+
+    tables = {}
+    for key, hits in collected.items():
+        table = tables[key] = MatchTable(source)
+        for _, start, end, category in sorted(hits):
+            table.append(start, end, category)
+    return tables
+
+
+def _group_ranks():
+    """Return (key, category) -> group position, to order hits group by group."""
+    return {group: rank for rank, group in enumerate(get_default_matcher().groups)}
@@ -0,0 +1,132 @@
+"""
+Named spaCy pipeline profiles for the NER analysers.
+
+The analysers only read doc.ents, so the tagger, parser, attribute ruler
+and lemmatizer can be left out of the pipeline to save time and memory.
+spaCy itself is only imported when a pipeline is actually loaded, so
+lexicon-only runs don't pay for it.
+"""
+
+# Components not needed for named entities. The shared tok2vec is kept
+# because in some models the NER component listens to it.
+NON_NER_COMPONENTS = ['tagger', 'morphologizer', 'parser', 'senter', 'attribute_ruler', 'lemmatizer']
+
+PIPELINE_PROFILES = {
+    'fast': {
+        'model': 'en_core_web_sm',
+        'exclude': NON_NER_COMPONENTS
+    },
+    'default': {
+        'model': 'en_core_web_sm',
+        'exclude': []
+    },
+    'accurate': {
+        'model': 'en_core_web_lg',
+        'exclude': []
+    }
+}
+
+DEFAULT_PROFILE = 'default'
+
+
+def get_profile(profile):
+    """
+    Look up a pipeline profile by name.
+
+    Args:
+        profile (str): Profile name ('fast', 'default' or 'accurate')
+
+    Returns:
+        dict: Profile settings with 'model' and 'exclude' keys
+    """
+    try:
+        return PIPELINE_PROFILES[profile]
+    except KeyError:
+        raise ValueError(
+            f"Unknown pipeline profile '{profile}'. Choose from: {', '.join(PIPELINE_PROFILES)}"
+        ) from None
+
+
+def load_pipeline(profile=DEFAULT_PROFILE, model=None):
+    """
+    Load the spaCy pipeline for a profile.
+
+    Args:
+        profile (str): Profile name
+        model (str, optional): Model name overriding the profile's model
+
+    Returns:
+        spacy.language.Language: Loaded pipeline
+
+    Raises:
+        RuntimeError: If spaCy or the model is not installed. Models are
+            never downloaded automatically.
+    """
+    settings = get_profile(profile)
+    model_name = model or settings['model']
+    try:
+        import spacy
+    except ImportError:
+        raise RuntimeError("spaCy is not installed. Install it with: pip install spacy") from None
+    
+    try:
+        return spacy.load(model_name, exclude=settings['exclude'])
+    except OSError as e:
+        raise RuntimeError(
+            f"spaCy model '{model_name}' is not installed. "
+            f"Install it with: python -m spacy download {model_name}"
+        ) from e
+
+
+def _installed_version(package):
+    """Return the installed version of a package, or None if it isn't installed as one."""
+    from importlib import metadata
+    try:
+        return metadata.version(package)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def pipeline_fingerprint(profile=DEFAULT_PROFILE, model=None):
+    """
+    Identify the pipeline a profile would load, without loading it.
+
+    Args:
+        profile (str): Profile name
+        model (str, optional): Model name overriding the profile's model
+
+    Returns:
+        dict: Profile, model, versions and excluded components, or None if
+            the model version can't be determined (e.g. a model path)
+    """
+    settings = get_profile(profile)
+    model_name = model or settings['model']
+    model_version = _installed_version(model_name)
+    if model_version is None:
+        return None
+    return {
+        'profile': profile,
+        'model': model_name,
+        'model_version': model_version,
+        'spacy_version': _installed_version('spacy'),
+        'exclude': settings['exclude']
+    }
+
+
+def describe_pipeline(nlp, profile):
+    """
+    Describe a loaded pipeline for recording in analysis output.
+
+    Args:
+        nlp (spacy.language.Language): Loaded pipeline
+        profile (str): Profile name used to load it
+
+    Returns:
+        dict: Profile, model name and version, and active components
+    """
+    return {
+        'profile': profile,
+        'model': f"{nlp.meta.get('lang', 'en')}_{nlp.meta.get('name', '')}",
+        'model_version': nlp.meta.get('version'),
+        'components': list(nlp.pipe_names)
+    }
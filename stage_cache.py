@@ -0,0 +1,63 @@
+"""
+On-disk cache of per-stage analysis results.
+
+Each stage of GardeningNERAnalyser.extract_gardening_entities (standard
+entities, gardening terms, plant names, techniques) is cached separately,
+keyed by a hash of the text and a fingerprint of whatever produced the
+stage: the spaCy model, version and profile for NER, and the lexicon for
+the term stages. Editing gardening_terms.py therefore only invalidates the
+term stages, and a re-run does not wait on spaCy.
+"""
+
+import hashlib
+import json
+import os
+
+from page_cache import PageCache, write_atomic
+
+DEFAULT_STAGE_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'gardening_mvp', 'stages')
+
+
+def text_hash(text):
+    """Return the SHA-256 hex digest of a text."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def stage_key(stage, text_digest, fingerprint):
+    """
+    Build the cache key for one stage of one text.
+
+    Args:
+        stage (str): Stage name, e.g. 'plant_names'
+        text_digest (str): Hash of the analysed text
+        fingerprint: JSON-serialisable description of the stage's inputs
+
+    Returns:
+        str: Hex digest
+    """
+    payload = json.dumps([stage, text_digest, fingerprint], sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class StageCache(PageCache):
+    """Size-capped LRU cache of JSON stage results, sharing PageCache's storage and eviction."""
+
+    def _page_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + '.json')
+
+    def get(self, key):
+        """
+        Return a cached stage result, or None on a miss.
+
+        Args:
+            key (str): Stage key from stage_key()
+
+        Returns:
+            Cached result, or None
+        """
+        text = super().get(key)
+        return None if text is None else json.loads(text)
+
+    def put(self, key, result):
+        """Store a stage result under key."""
+        write_atomic(self._page_path(key), json.dumps(result, ensure_ascii=False).encode('utf-8'))
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Incremental, mergeable analysis summaries.
+
+A SummaryAggregator is fed hit texts as they come out of the extractors
+(per chunk, page or document) and produces the same summary as
+GardeningNERAnalyser._create_summary without keeping the hit lists.
+Aggregators merge in any order, so partial summaries from chunks,
+documents, worker processes or separate machines combine into one corpus
+report. They are saved as JSON with to_dict() and merged with:
+
+    python streaming_summary.py node1/corpus_counts.json node2/corpus_counts.json -o corpus_summary.json
+
+Counts are exact by default. With a capacity, each counter is a bounded
+HeavyHitters summary (see sketches.py), so memory stays fixed however
+many distinct texts a corpus has; top-k counts are then lower bounds.
+"""
+
+import json
+
+from match_table import hit_texts
+from sketches import HeavyHitters
+
+COUNTS_FORMAT = 'gardening-summary-counts'
+COUNTS_VERSION = 1
+
+TOP_ENTITIES = 5
+TOP_PLANTS = 10
+TOP_TECHNIQUES = 10
+
+
+class SummaryAggregator:
+    """Streaming totals and top-k counts for one or more analysed texts."""
+
+    def __init__(self, capacity=None):
+        """
+        Args:
+            capacity (int, optional): Bound each counter to this many items
+                (approximate top-k). None counts exactly.
+        """
+        self.capacity = capacity
+        self.documents = 0
+        self.total_entities = 0
+        self.total_gardening_terms = 0
+        self.total_plant_names = 0
+        self.total_techniques = 0
+        self.entity_counts = {}
+        self.plant_counts = HeavyHitters(capacity)
+        self.technique_counts = HeavyHitters(capacity)
+
+    def add_entities(self, label, texts):
+        """Count spaCy entity texts with one label."""
+        texts = list(texts)
+        if texts:
+            self.entity_counts.setdefault(label, HeavyHitters(self.capacity)).update(texts)
+            self.total_entities += len(texts)
+
+    def add_gardening_terms(self, texts):
+        """Count gardening term hits (only their total is summarised)."""
+        self.total_gardening_terms += sum(1 for _ in texts)
+
+    def add_plant_names(self, texts):
+        """Count plant name texts, case-insensitively."""
+        texts = [text.lower() for text in texts]
+        self.plant_counts.update(texts)
+        self.total_plant_names += len(texts)
+
+    def add_techniques(self, texts):
+        """Count technique texts, case-insensitively."""
+        texts = [text.lower() for text in texts]
+        self.technique_counts.update(texts)
+        self.total_techniques += len(texts)
+
+    def add_results(self, results, document=True):
+        """
+        Add the hits of one set of analysis results.
+
+        Args:
+            results (dict): Results from extract_gardening_entities (or a columnar view)
+            document (bool): Count the results as a document
+        """
+        for label, hits in results['standard_entities'].items():
+            self.add_entities(label, hit_texts(hits))
+        self.add_gardening_terms(hit_texts(results['gardening_terms']))
+        self.add_plant_names(hit_texts(results['plant_names']))
+        self.add_techniques(hit_texts(results['gardening_techniques']))
+        if document:
+            self.documents += 1
+
+    @classmethod
+    def from_results(cls, results, capacity=None):
+        """Return an aggregator holding one document's results."""
+        aggregator = cls(capacity)
+        aggregator.add_results(results)
+        return aggregator
+
+    def merge(self, other):
+        """
+        Merge another aggregator into this one.
+
+        Args:
+            other (SummaryAggregator): Aggregator over different texts
+
+        Returns:
+            SummaryAggregator: self
+        """
+        self.documents += other.documents
+        self.total_entities += other.total_entities
+        self.total_gardening_terms += other.total_gardening_terms
+        self.total_plant_names += other.total_plant_names
+        self.total_techniques += other.total_techniques
+        for label, counts in other.entity_counts.items():
+            self.entity_counts.setdefault(label, HeavyHitters(self.capacity)).merge(counts)
+        self.plant_counts.merge(other.plant_counts)
+        self.technique_counts.merge(other.technique_counts)
+        return self
+
+    @property
+    def exact(self):
+        """True if every count is exact."""
+        counters = [self.plant_counts, self.technique_counts, *self.entity_counts.values()]
+        return all(counts.exact for counts in counters)
+
+    def summary(self, documents=False):
+        """
+        Return the summary in the shape of GardeningNERAnalyser._create_summary.
+
+        Args:
+            documents (bool): Include the 'documents' count (corpus summaries)
+
+        Returns:
+            dict: Totals and most common entities, plants and techniques
+        """
+        summary = {'documents': self.documents} if documents else {}
+        summary.update({
+            'total_entities': self.total_entities,
+            'total_gardening_terms': self.total_gardening_terms,
+            'total_plant_names': self.total_plant_names,
+            'total_techniques': self.total_techniques,
+            'most_common_entities': {label: counts.most_common(TOP_ENTITIES)
+                                     for label, counts in self.entity_counts.items()},
+            'most_common_plants': self.plant_counts.most_common(TOP_PLANTS),
+            'most_common_techniques': self.technique_counts.most_common(TOP_TECHNIQUES)
+        })
+        if not self.exact:
+            summary['approximate'] = True
+        return summary
+
+    def to_dict(self):
+        """Return the aggregator's state as a JSON-serialisable dict."""
+        return {
+            'format': COUNTS_FORMAT,
+            'version': COUNTS_VERSION,
+            'capacity': self.capacity,
+            'documents': self.documents,
+            'total_entities': self.total_entities,
+            'total_gardening_terms': self.total_gardening_terms,
+            'total_plant_names': self.total_plant_names,
+            'total_techniques': self.total_techniques,
+            'entity_counts': {label: counts.to_dict() for label, counts in self.entity_counts.items()},
+            'plant_counts': self.plant_counts.to_dict(),
+            'technique_counts': self.technique_counts.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild an aggregator from to_dict() output."""
+        if data.get('format') != COUNTS_FORMAT:
+            raise ValueError(f"Not a {COUNTS_FORMAT} file")
+        if data.get('version') != COUNTS_VERSION:
+            raise ValueError(f"Unsupported {COUNTS_FORMAT} version: {data.get('version')}")
+        aggregator = cls(data['capacity'])
+        for key in ('documents', 'total_entities', 'total_gardening_terms', 'total_plant_names', 'total_techniques'):
+            setattr(aggregator, key, data[key])
+        aggregator.entity_counts = {label: HeavyHitters.from_dict(counts)
+                                    for label, counts in data['entity_counts'].items()}
+        aggregator.plant_counts = HeavyHitters.from_dict(data['plant_counts'])
+        aggregator.technique_counts = HeavyHitters.from_dict(data['technique_counts'])
+        return aggregator
+
+
+def save_counts(aggregator, path):
+    """Write an aggregator's state to a JSON file."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(aggregator.to_dict(), f, ensure_ascii=False)
+
+
+def load_counts(path):
+    """Read an aggregator saved with save_counts."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return SummaryAggregator.from_dict(json.load(f))
+
+
+def main():
+    """Main function to merge partial summary counts into one corpus summary."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Merge partial summary counts into one corpus summary.")
+    parser.add_argument("counts_files", nargs="+", help="Counts files (e.g. corpus_counts.json from batch_runner.py)")
+    parser.add_argument("-o", "--output", default="corpus_summary.json", help="Summary file (default: %(default)s)")
+    parser.add_argument("--counts-output", default=None, help="Also write the merged counts to this file")
+    args = parser.parse_args()
+
+    merged = load_counts(args.counts_files[0])
+    for path in args.counts_files[1:]:
+        merged.merge(load_counts(path))
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(merged.summary(documents=True), f, indent=2, ensure_ascii=False)
+    if args.counts_output:
+        save_counts(merged, args.counts_output)
+    print(f"✅ Merged {len(args.counts_files)} counts files ({merged.documents} documents) into: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Positional inverted index over analysis hits for fast corpus queries.
+
+The index is built from extract_gardening_entities output (gardening terms,
+plant names, techniques and spaCy entities) plus the analysed text, which
+is only needed at build time to turn character offsets into page and word
+positions. Each hit is indexed under its normalised text (lowercase, plural
+variants folded via the lexicon) and under its category or label prefixed
+with '@' (e.g. '@vegetable', '@gardening_technique', '@PERSON').
+
+On disk an index is two files:
+
+    <name>.postings   int32 (document, page, word position) triples, grouped by term
+    <name>.vocab.json term -> [first triple, count], plus the document list
+
+The postings file is memory-mapped, so opening an index costs only the
+vocabulary load and a lookup is a dict access plus a slice of the mapping.
+
+Usage:
+    python term_index.py build corpus_index guides/*_extracted.txt
+    python term_index.py query corpus_index tomatoes --near mulching --window 20
+    python term_index.py query corpus_index @vegetable --pages 1-40
+"""
+
+import json
+import mmap
+import os
+import re
+import sys
+from array import array
+from bisect import bisect_right
+
+from term_matcher import WORD_RE, get_default_matcher
+from text_chunks import PAGE_MARKER_RE
+
+INDEX_VERSION = 1
+POSTINGS_SUFFIX = '.postings'
+VOCAB_SUFFIX = '.vocab.json'
+
+HIT_SECTIONS = {
+    'gardening_terms': 'category',
+    'plant_names': 'category',
+    'gardening_techniques': 'category'
+}
+
+
+def normalise_term(term):
+    """Normalise a query or hit text the way the index does."""
+    if term.startswith('@'):
+        return term
+    return get_default_matcher().normalise(term)
+
+
+def _iter_hits(results):
+    """Yield (text, start, group) for every hit in analysis results."""
+    for label, hits in results.get('standard_entities', {}).items():
+        for hit in hits:
+            yield hit['text'], hit['start'], label
+    for section, field in HIT_SECTIONS.items():
+        for hit in results.get(section, []):
+            yield hit['text'], hit['start'], hit[field]
+
+
+class IndexBuilder:
+    """Accumulates postings for documents and writes the index files."""
+
+    def __init__(self):
+        self.documents = []
+        self.postings = {}
+
+    def add_document(self, name, text, results):
+        """
+        Add one analysed document to the index.
+
+        Args:
+            name (str): Document name reported by queries
+            text (str): The analysed text (used for page and word positions)
+            results (dict): Output of extract_gardening_entities for text
+        """
+        doc_id = len(self.documents)
+        page_starts = [m.start() for m in PAGE_MARKER_RE.finditer(text)]
+        page_numbers = [int(m.group(1)) for m in PAGE_MARKER_RE.finditer(text)]
+        word_starts = array('l', (m.start() for m in WORD_RE.finditer(text)))
+
+        for hit_text, start, group in _iter_hits(results):
+            page_index = bisect_right(page_starts, start) - 1
+            page = page_numbers[page_index] if page_index >= 0 else 0
+            position = max(bisect_right(word_starts, start) - 1, 0)
+            entry = (doc_id, page, position)
+            for term in (normalise_term(hit_text), '@' + group):
+                self.postings.setdefault(term, array('i')).extend(entry)
+
+        self.documents.append({'name': name, 'pages': max(page_numbers, default=0),
+                               'words': len(word_starts)})
+
+    def write(self, path):
+        """
+        Write the index files.
+
+        Args:
+            path (str): Index path without suffix
+        """
+        vocabulary = {}
+        offset = 0
+        with open(path + POSTINGS_SUFFIX, 'wb') as f:
+            for term in sorted(self.postings):
+                triples = self.postings[term]
+                # Sort by (document, word position) so proximity queries can merge lists
+                entries = sorted(zip(triples[0::3], triples[1::3], triples[2::3]), key=lambda e: (e[0], e[2]))
+                flat = array('i', (value for entry in entries for value in entry))
+                flat.tofile(f)
+                vocabulary[term] = [offset, len(entries)]
+                offset += len(entries)
+
+        with open(path + VOCAB_SUFFIX, 'w', encoding='utf-8') as f:
+            json.dump({'version': INDEX_VERSION, 'documents': self.documents, 'terms': vocabulary},
+                      f, ensure_ascii=False)
+
+
+class TermIndex:
+    """Read-only, memory-mapped positional index."""
+
+    def __init__(self, path):
+        """
+        Open an index written by IndexBuilder.
+
+        Args:
+            path (str): Index path without suffix
+        """
+        with open(path + VOCAB_SUFFIX, 'r', encoding='utf-8') as f:
+            vocab = json.load(f)
+        if vocab.get('version') != INDEX_VERSION:
+            raise ValueError(f"Unsupported index version: {vocab.get('version')}")
+        self.documents = vocab['documents']
+        self.terms = vocab['terms']
+
+        self._file = open(path + POSTINGS_SUFFIX, 'rb')
+        if os.fstat(self._file.fileno()).st_size:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._postings = memoryview(self._mmap).cast('i')
+        else:
+            self._mmap = None
+            self._postings = memoryview(b'').cast('i')
+
+    def close(self):
+        """Release the memory mapping."""
+        self._postings.release()
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def postings(self, term):
+        """
+        Return a copy of a term's postings as flat (document, page, position) triples.
+
+        A copy, so it stays valid after the index is closed.
+
+        Args:
+            term (str): Term, or '@category' / '@LABEL'
+
+        Returns:
+            array: int32 triples, sorted by document then position
+        """
+        return array('i', self._view(term))
+
+    def _view(self, term):
+        """Return a term's postings as a view of the mapping; it must be dropped before close()."""
+        entry = self.terms.get(normalise_term(term))
+        if entry is None:
+            return self._postings[0:0]
+        offset, count = entry
+        return self._postings[offset * 3:(offset + count) * 3]
+
+    def find(self, term, documents=None, pages=None):
+        """
+        Find occurrences of a term.
+
+        Args:
+            term (str): Term, or '@category' / '@LABEL'
+            documents (set, optional): Only these document names
+            pages (tuple, optional): (first, last) inclusive page range
+
+        Returns:
+            list: (document name, page, word position) tuples
+        """
+        flat = self._view(term)
+        doc_filter = self._document_ids(documents)
+        hits = []
+        for i in range(0, len(flat), 3):
+            doc_id, page, position = flat[i], flat[i + 1], flat[i + 2]
+            if doc_filter is not None and doc_id not in doc_filter:
+                continue
+            if pages is not None and not pages[0] <= page <= pages[1]:
+                continue
+            hits.append((self.documents[doc_id]['name'], page, position))
+        return hits
+
+    def pages(self, term, documents=None, pages=None):
+        """Return the sorted (document name, page) pairs that mention a term."""
+        return sorted({(name, page) for name, page, _ in self.find(term, documents, pages)})
+
+    def count(self, term):
+        """Return the number of occurrences of a term without reading its postings."""
+        entry = self.terms.get(normalise_term(term))
+        return entry[1] if entry else 0
+
+    def near(self, term_a, term_b, window=20, documents=None, pages=None):
+        """
+        Find places where two terms occur within `window` words of each other.
+
+        A hit indexed under both terms (e.g. 'tomatoes' and '@vegetable') is
+        not paired with itself: occurrences at the same word position are
+        skipped.
+
+        Args:
+            term_a (str): First term or '@category'
+            term_b (str): Second term or '@category'
+            window (int): Maximum distance in words
+            documents (set, optional): Only these document names
+            pages (tuple, optional): (first, last) inclusive page range of term_a
+
+        Returns:
+            list: (document name, page of term_a, position of term_a, position of term_b)
+        """
+        a = self._view(term_a)
+        b = self._view(term_b)
+        doc_filter = self._document_ids(documents)
+        matches = []
+        j = 0
+        len_b = len(b)
+        for i in range(0, len(a), 3):
+            doc_id, page, position = a[i], a[i + 1], a[i + 2]
+            if doc_filter is not None and doc_id not in doc_filter:
+                continue
+            if pages is not None and not pages[0] <= page <= pages[1]:
+                continue
+            # Advance b past entries that are before this window
+            while j < len_b and (b[j] < doc_id or (b[j] == doc_id and b[j + 2] < position - window)):
+                j += 3
+            k = j
+            while k < len_b and b[k] == doc_id and b[k + 2] <= position + window:
+                if b[k + 2] != position:
+                    matches.append((self.documents[doc_id]['name'], page, position, b[k + 2]))
+                k += 3
+        return matches
+
+    def _document_ids(self, documents):
+        if documents is None:
+            return None
+        return {i for i, doc in enumerate(self.documents) if doc['name'] in documents}
+
+
+def _load_or_analyse(text_path, text, use_ner):
+    """Load saved results for a text file, or analyse it if there are none."""
+    from ner_analyzer import GardeningNERAnalyser, OUTPUT_SUFFIXES, output_path_for
+
+    for output_format in OUTPUT_SUFFIXES:
+        output_path = output_path_for(text_path, output_format)
+        if output_path != text_path and os.path.exists(output_path):
+            if output_format == 'columnar':
+                from columnar_output import load_columnar
+                return load_columnar(output_path)
+            with open(output_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+    return GardeningNERAnalyser(use_ner=use_ner).extract_gardening_entities(text)
+
+
+def build_index(text_paths, index_path, use_ner=False):
+    """
+    Build an index from text files and their saved analysis results.
+
+    Results are read from the *_ner_analysis.json/.ndjson file next to each
+    text file; texts without saved results are analysed (lexicon only
+    unless use_ner is True).
+
+    Args:
+        text_paths (list): Extracted text files
+        index_path (str): Index path without suffix
+        use_ner (bool): Run spaCy for texts without saved results
+    """
+    builder = IndexBuilder()
+    for text_path in text_paths:
+        with open(text_path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        builder.add_document(os.path.basename(text_path), text, _load_or_analyse(text_path, text, use_ner))
+        print(f"   indexed: {text_path}")
+    builder.write(index_path)
+    print(f"✅ Index written to: {index_path}{POSTINGS_SUFFIX}, {index_path}{VOCAB_SUFFIX}")
+
+
+def _parse_page_range(spec):
+    match = re.fullmatch(r'(\d+)(?:-(\d+))?', spec.strip())
+    if not match:
+        raise ValueError(f"Invalid page range: '{spec}'")
+    first = int(match.group(1))
+    return first, int(match.group(2) or first)
+
+
+def main():
+    """Main function to build or query a term index."""
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Build and query a positional index of gardening terms.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="Build an index from extracted text files")
+    build.add_argument("index", help="Index path (without suffix)")
+    build.add_argument("text_files", nargs="+", help="Extracted text files")
+    build.add_argument("--ner", action="store_true", help="Run spaCy for texts without saved results")
+
+    query = commands.add_parser("query", help="Query an index")
+    query.add_argument("index", help="Index path (without suffix)")
+    query.add_argument("term", help="Term, or @category / @LABEL (e.g. @vegetable, @PERSON)")
+    query.add_argument("--near", help="Second term that must occur within --window words")
+    query.add_argument("--window", type=int, default=20, help="Proximity window in words (default: 20)")
+    query.add_argument("--pages", help="Page range, e.g. '1-40'")
+    query.add_argument("--doc", action="append", help="Restrict to a document name (repeatable)")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build_index(args.text_files, args.index, use_ner=args.ner)
+        return
+
+    pages = _parse_page_range(args.pages) if args.pages else None
+    documents = set(args.doc) if args.doc else None
+    with TermIndex(args.index) as index:
+        start = time.perf_counter()
+        if args.near:
+            matches = index.near(args.term, args.near, args.window, documents, pages)
+            found = sorted({(name, page) for name, page, _, _ in matches})
+        else:
+            found = index.pages(args.term, documents, pages)
+        elapsed = time.perf_counter() - start
+
+    for name, page in found:
+        print(f"{name}\tpage {page}")
+    print(f"{len(found)} page(s) in {elapsed * 1000:.3f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Single-pass lexicon matcher for gardening terms.
+
+The lexicon in gardening_terms.py is a set of simple regex fragments
+(literal words with an optional trailing character for plurals, e.g.
+'tomatoes?'). Instead of running one regex per category over the whole
+text, the fragments are expanded into literal word sequences and stored in
+a word trie, so every term and category is found in one walk over the text.
+The default matcher is compiled and cached on disk by lexicon.py.
+"""
+
+import hashlib
+import json
+import re
+from array import array
+from functools import lru_cache
+
+from match_table import MatchTable
+
+# Bump when matching behaviour changes, to invalidate cached results
+MATCHER_VERSION = 1
+
+WORD_RE = re.compile(r'\w+')
+_FRAGMENT_RE = re.compile(r'^\w+( \w+)*(\?|\(\w+(\|\w+)*\)\??)?$')
+
+
+def expand_pattern(fragment):
+    """
+    Expand a lexicon regex fragment into the literal strings it matches.
+
+    Only the forms used in gardening_terms.py are supported: plain words or
+    phrases, optionally ending in a single optional character ('peas?') or
+    a group of alternative endings, itself optional or not ('tomato(es)?',
+    'cherr(ies|y)').
+
+    Args:
+        fragment (str): Regex fragment from the lexicon
+
+    Returns:
+        list: Literal lowercase variants, longest first
+    """
+    if not _FRAGMENT_RE.match(fragment):
+        raise ValueError(f"Unsupported lexicon pattern: {fragment!r}")
+    fragment = fragment.lower()
+    if '(' in fragment:
+        stem, endings = fragment.split('(')
+        endings, optional = endings.split(')')
+        variants = [stem + ending for ending in endings.split('|')] + ([stem] if optional else [])
+        return sorted(variants, key=len, reverse=True)
+    if fragment.endswith('?'):
+        full = fragment[:-1]
+        return [full, full[:-1]]
+    return [fragment]
+
+
+class TermMatcher:
+    """
+    Word-trie matcher that finds all lexicon groups in one pass.
+
+    Each group behaves like the alternation regex it replaces,
+    r'\\b(alt1|alt2|...)\\b' with re.IGNORECASE: matches within a group never
+    overlap and, when several alternatives match at the same position, the
+    one listed first wins. Matches from different groups may overlap.
+    """
+
+    def __init__(self, groups):
+        """
+        Build the trie.
+
+        Args:
+            groups (list): (key, category, patterns) tuples. Hits are collected
+                per key in the order the groups are given, so several groups
+                can share a key (e.g. one per plant category).
+        """
+        self.groups = [(key, category) for key, category, _ in groups]
+        self.patterns = [list(patterns) for _, _, patterns in groups]
+        self.keys = list(dict.fromkeys(key for key, _ in self.groups))
+        self.root = {}
+        # Lowercase variant -> canonical form (the fragment's longest variant)
+        self.canonical = {}
+
+        for group_id, (_, _, patterns) in enumerate(groups):
+            for alt_index, fragment in enumerate(patterns):
+                variants = expand_pattern(fragment)
+                for variant in variants:
+                    self._insert(variant.split(' '), group_id, alt_index)
+                    self.canonical.setdefault(variant, variants[0])
+        # Hash of the whole lexicon, reported with analysis results
+        self.hash = self.fingerprint()
+
+    def _insert(self, words, group_id, alt_index):
+        # Each trie entry is [children, {group_id: alternative index}]
+        children = self.root
+        for word in words:
+            entry = children.setdefault(word, [{}, {}])
+            children = entry[0]
+        terminals = entry[1]
+        if group_id not in terminals:
+            terminals[group_id] = alt_index
+
+    def normalise(self, term):
+        """
+        Normalise a term: lowercase, single spaces, plural variants folded to one form.
+
+        Args:
+            term (str): Term or hit text
+
+        Returns:
+            str: Normalised term, e.g. 'Tomato' -> 'tomatoes'
+        """
+        term = ' '.join(term.lower().split())
+        return self.canonical.get(term, term)
+
+    def fingerprint(self, key=None):
+        """
+        Return a hash of the lexicon groups that produce one result key.
+
+        Args:
+            key (str, optional): Result key, e.g. 'plant_names'; None hashes
+                every group
+
+        Returns:
+            str: Hex digest that changes whenever those groups change
+        """
+        spec = [MATCHER_VERSION]
+        for (group_key, category), patterns in zip(self.groups, self.patterns):
+            if key is None:
+                spec.append([group_key, category, patterns])
+            elif group_key == key:
+                spec.append([category, patterns])
+        return hashlib.sha256(json.dumps(spec).encode('utf-8')).hexdigest()
+
+    def find_all(self, text, keys=None):
+        """
+        Find lexicon matches in text.
+
+        Args:
+            text (str): Text to scan
+            keys (iterable, optional): Only return these result keys
+
+        Returns:
+            dict: Result key -> list of {'text', 'start', 'end', 'category'}
+        """
+        return {key: table.to_list() for key, table in self.find_tables(text, keys).items()}
+
+    def find_tables(self, text, keys=None):
+        """
+        Find lexicon matches in text, stored compactly.
+
+        Args:
+            text (str): Text to scan
+            keys (iterable, optional): Only return these result keys
+
+        Returns:
+            dict: Result key -> MatchTable over text, in the same order as find_all
+        """
+        wanted = None if keys is None else set(keys)
+        active = [wanted is None or key in wanted for key, _ in self.groups]
+        group_spans = self._scan(text, active)
+
+        results = {key: MatchTable(text) for key in self.keys if wanted is None or key in wanted}
+        for group_id, (key, category) in enumerate(self.groups):
+            if active[group_id]:
+                table = results[key]
+                spans = group_spans[group_id]
+                for i in range(0, len(spans), 2):
+                    table.append(spans[i], spans[i + 1], category)
+        return results
+
+    def _scan(self, text, active):
+        """Return, for each group, its matches as flat (start, end) offsets."""
+        group_spans = [array('i') for _ in self.groups]
+        next_free = [0] * len(self.groups)
+
+        root = self.root
+        match_word = WORD_RE.match
+        for token in WORD_RE.finditer(text):
+            entry = root.get(token.group().lower())
+            if entry is None:
+                continue
+
+            start = token.start()
+            # (end, {group_id: alt_index}) for every complete term starting here
+            candidates = []
+            end = token.end()
+            while True:
+                children, terminals = entry
+                if terminals:
+                    candidates.append((end, terminals))
+                if not children or text[end:end + 1] != ' ':
+                    break
+                following = match_word(text, end + 1)
+                if following is None:
+                    break
+                entry = children.get(following.group().lower())
+                if entry is None:
+                    break
+                end = following.end()
+
+            best = {}
+            for cand_end, terminals in candidates:
+                for group_id, alt_index in terminals.items():
+                    if not active[group_id] or start < next_free[group_id]:
+                        continue
+                    current = best.get(group_id)
+                    if current is None or alt_index < current[1]:
+                        best[group_id] = (cand_end, alt_index)
+
+            for group_id, (cand_end, _) in best.items():
+                group_spans[group_id].extend((start, cand_end))
+                next_free[group_id] = cand_end
+
+        return group_spans
+
+
+@lru_cache(maxsize=32)
+def get_matcher(groups):
+    """
+    Return a cached TermMatcher for a hashable group specification.
+
+    Args:
+        groups (tuple): (key, category, tuple_of_patterns) tuples
+
+    Returns:
+        TermMatcher: Compiled matcher, shared across calls
+    """
+    return TermMatcher(groups)
+
+
+def get_default_matcher():
+    """Return the matcher of the process-wide lexicon, built from gardening_terms.py (see lexicon.py)."""
+    from lexicon import default_lexicon
+    return default_lexicon().matcher
@@ -0,0 +1,76 @@
+"""
+Helpers for splitting extracted text into chunks at page or paragraph boundaries.
+
+Text produced by pdf_extractor.extract_text_from_pdf contains a
+'--- Page N ---' line before every page. Splitting there (or at blank
+lines when a page is too long) keeps entities inside a single chunk, so
+results from the chunks can be mapped back to offsets in the full text.
+"""
+
+import re
+
+PAGE_MARKER_RE = re.compile(r'^--- Page (\d+) ---$', re.MULTILINE)
+PARAGRAPH_RE = re.compile(r'\n[ \t]*\n')
+
+DEFAULT_CHUNK_CHARS = 100000
+
+
+def _segments(text, start, end, max_chars):
+    """Yield (start, end) spans no longer than max_chars, preferring paragraph breaks."""
+    if end - start <= max_chars:
+        yield start, end
+        return
+
+    seg_start = start
+    last_break = start
+    breaks = [m.end() for m in PARAGRAPH_RE.finditer(text, start, end)]
+    for point in breaks + [end]:
+        if point - seg_start > max_chars and last_break > seg_start:
+            yield from _hard_split(text, seg_start, last_break, max_chars)
+            seg_start = last_break
+        last_break = point
+    yield from _hard_split(text, seg_start, end, max_chars)
+
+
+def _hard_split(text, start, end, max_chars):
+    """Split a span without paragraph breaks at line breaks, or at max_chars as a last resort."""
+    while end - start > max_chars:
+        cut = text.rfind('\n', start + 1, start + max_chars)
+        if cut == -1:
+            cut = text.rfind(' ', start + 1, start + max_chars)
+        cut = start + max_chars if cut == -1 else cut + 1
+        yield start, cut
+        start = cut
+    if end > start:
+        yield start, end
+
+
+def iter_chunks(text, max_chars=DEFAULT_CHUNK_CHARS):
+    """
+    Split text into chunks at page separators, falling back to paragraphs.
+
+    Consecutive pages are packed into the same chunk while it stays under
+    max_chars. Chunks are contiguous and cover the whole text.
+
+    Args:
+        text (str): Full text to split
+        max_chars (int): Maximum chunk length in characters
+
+    Yields:
+        tuple: (offset, chunk_text) where offset is the chunk start in text
+    """
+    boundaries = [m.start() for m in PAGE_MARKER_RE.finditer(text)]
+    if not boundaries or boundaries[0] != 0:
+        boundaries.insert(0, 0)
+    boundaries.append(len(text))
+
+    chunk_start = 0
+    chunk_end = 0
+    for page_start, page_end in zip(boundaries, boundaries[1:]):
+        for seg_start, seg_end in _segments(text, page_start, page_end, max_chars):
+            if seg_end - chunk_start > max_chars and chunk_end > chunk_start:
+                yield chunk_start, text[chunk_start:chunk_end]
+                chunk_start = chunk_end
+            chunk_end = seg_end
+    if chunk_end > chunk_start:
+        yield chunk_start, text[chunk_start:chunk_end]
@@ -0,0 +1,298 @@
+"""
+Cleaning extracted PDF text before analysis, with offsets mapped back.
+
+page.get_text() output keeps the printed layout: words hyphenated across
+line breaks ('pos-\\nsible', or with a soft hyphen), running headers,
+footers and page numbers on every page, and a line break at the end of
+every printed line. spaCy then sees more tokens than the prose has, and
+finds junk entities such as the PERSON 'Juliet\\nW'. TextNormaliser turns
+the text into plain paragraphs:
+
+- '--- Page N ---' separators are dropped (pages become paragraph breaks)
+- lines repeated at the top or bottom of many pages (digits ignored, so
+  page numbers count as repeats) are removed
+- words split by a soft hyphen at a line end are joined; a hard hyphen
+  is only dropped if the joined word is known, i.e. appears elsewhere in
+  the text or in the vocabulary (e.g. the lexicon) given to TextNormaliser,
+  so 'pos-\nsible' becomes 'possible' but 'apple-\nmint' becomes
+  'apple-mint' rather than 'applemint'
+- lines within a paragraph are joined with single spaces, and runs of
+  spaces and tabs are collapsed
+
+Along with the clean text it returns an OffsetMap, a few integers per
+copied run of text, that maps clean offsets back to the original text and
+its page numbers, so hits found in the clean text are reported at their
+original start/end.
+"""
+
+import re
+from array import array
+from bisect import bisect_right
+from collections import Counter
+
+from match_table import MatchTable
+from text_chunks import PAGE_MARKER_RE
+
+SOFT_HYPHEN = '\u00ad'
+
+LINE_RE = re.compile(r'[^\n]*\n?')
+DIGITS_RE = re.compile(r'\d+')
+# Runs of non-blank characters on a line; soft hyphens are removed from inside words
+WORD_RUN_RE = re.compile(r'[^\s\u00ad]+')
+# A word broken at the line end: letter, hyphen or soft hyphen, then only spaces
+BROKEN_WORD_RE = re.compile(r'[^\W\d_](?:-|[ \t]*\u00ad)[ \t]*$')
+# Words, for deciding whether a word broken at a hard hyphen is known
+LETTERS_RE = re.compile(r'[^\W\d_]+')
+
+# Lines within this many non-blank lines of the top or bottom of a page can be headers or footers
+EDGE_LINES = 2
+# A line is a header or footer once it has been seen at page edges on this many pages
+MIN_REPEATS = 3
+
+
+class OffsetMap:
+    """Maps offsets in normalised text back to the original text and its pages."""
+
+    def __init__(self):
+        # Runs of text copied in order: clean offset -> original offset at the run start
+        self.clean_starts = array('l')
+        self.original_starts = array('l')
+        # Original offsets of the '--- Page N ---' separators, and their page numbers
+        self.page_starts = array('l')
+        self.page_numbers = array('l')
+        self._clean_end = 0
+        self._original_end = 0
+
+    def add(self, clean_start, original_start, length):
+        """Record that clean[clean_start:+length] came from original[original_start:+length]."""
+        if clean_start != self._clean_end or original_start != self._original_end or not self.clean_starts:
+            self.clean_starts.append(clean_start)
+            self.original_starts.append(original_start)
+        self._clean_end = clean_start + length
+        self._original_end = original_start + length
+
+    def to_original(self, offset):
+        """Return the original offset of a character in the clean text."""
+        run = max(bisect_right(self.clean_starts, offset) - 1, 0)
+        return self.original_starts[run] + offset - self.clean_starts[run]
+
+    def span(self, start, end):
+        """Return the original (start, end) of a clean [start, end) span."""
+        if end <= start:
+            original = self.to_original(start)
+            return original, original
+        return self.to_original(start), self.to_original(end - 1) + 1
+
+    def page(self, original_offset):
+        """Return the page number of an original offset (0 before the first page separator)."""
+        index = bisect_right(self.page_starts, original_offset) - 1
+        return self.page_numbers[index] if index >= 0 else 0
+
+    def remap_table(self, table, source):
+        """
+        Return a MatchTable over the original text with a clean table's hits.
+
+        Args:
+            table (MatchTable): Hits found in the clean text
+            source (str): The original text
+
+        Returns:
+            MatchTable: Same hits, at their original offsets
+        """
+        remapped = MatchTable(source, table.field)
+        for _, start, end, value in table.rows():
+            remapped.append(*self.span(start, end), value)
+        return remapped
+
+    def remap_hits(self, hits, source):
+        """Return copies of hit dicts found in the clean text, at their original offsets."""
+        remapped = []
+        for hit in hits:
+            start, end = self.span(hit['start'], hit['end'])
+            remapped.append(dict(hit, text=source[start:end], start=start, end=end))
+        return remapped
+
+
+def _header_key(line):
+    """Return the key under which a header or footer line is counted."""
+    return DIGITS_RE.sub('#', ' '.join(line.replace(SOFT_HYPHEN, '').split())).lower()
+
+
+class TextNormaliser:
+    """Cleans extracted text, learning repeated headers and footers as it goes."""
+
+    def __init__(self, strip_headers=True, dehyphenate=True, min_repeats=MIN_REPEATS, vocabulary=()):
+        """
+        Args:
+            strip_headers (bool): Remove lines repeated at page edges
+            dehyphenate (bool): Join words broken across lines
+            min_repeats (int): Pages a line must be seen at the edge of to count as a header
+            vocabulary (iterable): Words or phrases (e.g. lexicon variants) whose
+                words are joined across a hard hyphen even if the text doesn't
+                contain them elsewhere
+        """
+        self.strip_headers = strip_headers
+        self.dehyphenate = dehyphenate
+        self.min_repeats = min_repeats
+        # Lowercase words seen so far or given as vocabulary
+        self.known_words = {word.lower() for phrase in vocabulary for word in LETTERS_RE.findall(phrase)}
+        # Header key -> number of pages it was seen at the edge of
+        self.edge_counts = Counter()
+        self.stats = Counter()
+
+    def normalise(self, text):
+        """
+        Normalise a text.
+
+        Headers are learned from all of the text's pages before any are
+        removed. Counts carry over between calls, so pages streamed one
+        piece at a time (see pipeline.py) use the headers learned from
+        earlier pieces; a header is then removed from the min_repeats-th
+        page it appears on. Likewise the words that decide whether a hard
+        hyphen at a line end is dropped are those of this and earlier
+        pieces.
+
+        Args:
+            text (str): Extracted text, or the next piece of it
+
+        Returns:
+            tuple: (clean text, OffsetMap with offsets within text)
+        """
+        pages = _split_pages(text)
+        if self.dehyphenate:
+            self.known_words.update(word.lower() for word in LETTERS_RE.findall(text))
+        if self.strip_headers:
+            for _, _, lines in pages:
+                self.edge_counts.update({_header_key(lines[i][1]) for i in set(_edge_indexes(lines))})
+        return self._build(pages)
+
+    def report(self):
+        """Return what has been removed or joined so far."""
+        return {
+            'headers': sorted(key for key, count in self.edge_counts.items() if count >= self.min_repeats),
+            'lines_removed': self.stats['lines_removed'],
+            'words_joined': self.stats['words_joined'],
+            'hyphens_kept': self.stats['hyphens_kept']
+        }
+
+    def _is_known(self, head, tail):
+        """Return whether the word broken into head- and tail is known."""
+        head = LETTERS_RE.findall(head)
+        tail = LETTERS_RE.match(tail)
+        return bool(head and tail) and (head[-1] + tail.group()).lower() in self.known_words
+
+    def _is_header(self, line):
+        return self.strip_headers and self.edge_counts[_header_key(line)] >= self.min_repeats
+
+    def _build(self, pages):
+        offsets = OffsetMap()
+        out = []
+        size = 0
+
+        def emit(piece, original_start):
+            nonlocal size
+            out.append(piece)
+            offsets.add(size, original_start, len(piece))
+            size += len(piece)
+
+        # Separator emitted before the next line: (text, original offset), or None for none yet
+        pending = None
+        # Hyphen removed from a broken word, put back if the next line doesn't continue it
+        hyphen = None
+        broken_word = ''
+        joined = False
+        for page_number, marker_start, lines in pages:
+            if marker_start is not None:
+                offsets.page_starts.append(marker_start)
+                offsets.page_numbers.append(page_number)
+            edges = set(_edge_indexes(lines))
+            for index, (start, line) in enumerate(lines):
+                if not line.strip():
+                    if hyphen is not None:
+                        emit(*hyphen)
+                    hyphen, joined = None, False
+                    if size:
+                        pending = ('\n\n', start)
+                    continue
+                if index in edges and self._is_header(line):
+                    self.stats['lines_removed'] += 1
+                    continue
+
+                broken = BROKEN_WORD_RE.search(line) if self.dehyphenate else None
+                body_end = broken.start() + 1 if broken else len(line)
+                body = line[:body_end].strip()
+                if not body.strip(SOFT_HYPHEN):
+                    continue
+                if '  ' in body or '\t' in body or SOFT_HYPHEN in body:
+                    runs = [(run.group(), run.start(), run.end()) for run in WORD_RUN_RE.finditer(line, 0, body_end)]
+                else:
+                    body_start = line.index(body)
+                    runs = [(body, body_start, body_start + len(body))]
+
+                if joined and runs[0][0][0].islower():
+                    self.stats['words_joined'] += 1
+                    # A hard hyphen stays unless the joined word is known
+                    if hyphen is not None and not self._is_known(broken_word, runs[0][0]):
+                        emit(*hyphen)
+                        self.stats['hyphens_kept'] += 1
+                else:
+                    if hyphen is not None:
+                        emit(*hyphen)
+                    if size:
+                        emit(*(pending or (' ', start - 1)))
+                pending = hyphen = None
+
+                previous_end = None
+                for run, run_start, run_end in runs:
+                    # Soft hyphens inside a word are dropped; other gaps become one space
+                    if previous_end is not None and line[previous_end:run_start].strip(SOFT_HYPHEN):
+                        emit(' ', start + previous_end)
+                    emit(run, start + run_start)
+                    previous_end = run_end
+
+                joined = broken is not None
+                if joined and line[body_end] == '-':
+                    hyphen = ('-', start + body_end)
+                    broken_word = runs[-1][0]
+            # A page ends a paragraph unless it ends in a broken word
+            if size and not joined:
+                pending = ('\n\n', marker_start or 0)
+
+        if hyphen is not None:
+            emit(*hyphen)
+        return ''.join(out), offsets
+
+
+def _split_pages(text):
+    """
+    Split text into pages of lines.
+
+    Returns:
+        list: (page number, separator offset, [(line offset, line text)]) per page.
+            Text before the first separator is page 0 with offset None.
+            Separator lines are not included.
+    """
+    pages = []
+    page_number, marker_start = 0, None
+    lines = []
+    for match in LINE_RE.finditer(text):
+        line = match.group()
+        if not line:
+            break
+        marker = PAGE_MARKER_RE.match(line)
+        if marker:
+            if lines or marker_start is not None:
+                pages.append((page_number, marker_start, lines))
+            page_number, marker_start = int(marker.group(1)), match.start()
+            lines = []
+        else:
+            lines.append((match.start(), line.rstrip('\n')))
+    if lines or marker_start is not None:
+        pages.append((page_number, marker_start, lines))
+    return pages
+
+
+def _edge_indexes(lines):
+    """Return the indexes of the first and last EDGE_LINES non-blank lines of a page."""
+    filled = [i for i, (_, line) in enumerate(lines) if line.strip()]
+    return filled[:EDGE_LINES] + filled[-EDGE_LINES:]
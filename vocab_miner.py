@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Streaming, parallel miner for candidate gardening terms.
+
+Counts unigrams and bigrams that are not already in the shared lexicon
+(gardening_terms.py) across any number of text files. Files are split into
+byte ranges that are read in chunks, counted in a process pool and merged
+(map-reduce). Counts are kept in mergeable HeavyHitters summaries, so memory
+stays bounded even when the corpus vocabulary doesn't fit in RAM; counts
+are exact until a summary exceeds its capacity.
+
+Usage:
+    python vocab_miner.py guides/*_extracted.txt --top 30 --workers 8
+"""
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from sketches import HeavyHitters
+from term_matcher import get_default_matcher
+
+WORD_RE = re.compile(r'\b[a-z]{3,}\b')
+
+# Common English stopwords to ignore
+STOPWORDS = {
+    'the', 'and', 'for', 'with', 'from', 'into', 'over', 'when', 'where', 'you', 'your', 'they', 'their', 'these',
+    'those', 'will', 'have', 'has', 'are', 'was', 'not', 'can', 'may', 'all', 'one', 'two', 'three', 'four', 'five',
+    'six', 'seven', 'eight', 'nine', 'ten', 'it', 'in', 'on', 'at', 'by', 'to', 'of', 'as', 'be', 'is', 'or', 'an',
+    'a', 'we', 'if', 'so', 'do', 'no', 'up', 'out', 'some', 'more', 'most', 'any', 'each', 'many', 'much', 'such',
+    'only', 'own', 'same', 'than', 'too', 'very', 'just', 'even', 'still', 'also', 'after', 'before', 'again',
+    'once', 'about', 'because', 'how', 'while', 'during', 'without', 'within', 'between', 'through', 'since',
+    'until', 'although', 'though', 'nor', 'yet', 'both', 'either', 'neither', 'whether', 'why', 'which', 'what',
+    'who', 'whose', 'whom', 'here', 'there', 'every', 'another', 'few', 'less', 'least', 'great', 'greater',
+    'greatest', 'best', 'better', 'worst', 'bad', 'worse', 'good', 'new', 'old', 'young', 'first', 'last', 'next',
+    'previous', 'other', 'none'
+}
+
+CHUNK_BYTES = 1024 * 1024
+SPLIT_BYTES = 64 * 1024 * 1024
+DEFAULT_CAPACITY = 100000
+
+_WHITESPACE = b' \t\r\n'
+
+
+def known_terms():
+    """
+    Return the lexicon's terms, including every plural variant.
+
+    Returns:
+        set: Lowercase terms (single words and phrases)
+    """
+    return set(get_default_matcher().canonical)
+
+
+def split_work(paths, split_bytes=SPLIT_BYTES):
+    """
+    Split files into byte ranges that can be counted independently.
+
+    Args:
+        paths (list): Text files
+        split_bytes (int): Approximate size of each range
+
+    Returns:
+        list: (path, start, end) ranges
+    """
+    units = []
+    for path in paths:
+        size = os.path.getsize(path)
+        for start in range(0, max(size, 1), split_bytes):
+            units.append((path, start, min(start + split_bytes, size)))
+    return units
+
+
+def _iter_text(path, start, end, chunk_bytes=CHUNK_BYTES):
+    """
+    Yield lowercase text for the words that start in [start, end) of a file.
+
+    Ranges are aligned to whitespace, which never occurs inside a UTF-8
+    multi-byte sequence, so each chunk decodes cleanly.
+    """
+    with open(path, 'rb') as f:
+        f.seek(start)
+        if start > 0:
+            # Skip the word straddling the range start; the previous range owns it
+            f.seek(start - 1)
+            while True:
+                byte = f.read(1)
+                if not byte or byte in _WHITESPACE:
+                    break
+            if f.tell() >= end:
+                return
+        position = f.tell()
+        carry = b''
+        while True:
+            block = f.read(chunk_bytes)
+            position += len(block)
+            data = carry + block
+            if not block:
+                if data:
+                    yield data.decode('utf-8', errors='ignore').lower()
+                return
+            if position >= end:
+                # Finish the word that straddles the range end
+                cut = next((i for i in range(max(end - 1 - (position - len(data)), 0), len(data))
+                            if data[i:i + 1] in _WHITESPACE), None)
+                if cut is not None:
+                    yield data[:cut].decode('utf-8', errors='ignore').lower()
+                    return
+                carry = data
+                continue
+            cut = max(data.rfind(b' '), data.rfind(b'\n'), data.rfind(b'\t'), data.rfind(b'\r'))
+            if cut == -1:
+                carry = data
+                continue
+            yield data[:cut].decode('utf-8', errors='ignore').lower()
+            carry = data[cut:]
+
+
+def count_range(path, start, end, capacity=DEFAULT_CAPACITY, bigrams=True):
+    """
+    Count candidate unigrams and bigrams in one byte range of a file.
+
+    Words shorter than three letters, stopwords and known lexicon terms are
+    skipped. A bigram is two adjacent candidate words separated only by
+    whitespace, and is skipped if it is a known lexicon phrase. The bigram
+    formed by the range's last word and the next range's first word is
+    counted here, so ranges of a file add up to the whole file.
+
+    Args:
+        path (str): Text file
+        start (int): First byte of the range
+        end (int): End of the range
+        capacity (int): HeavyHitters capacity
+        bigrams (bool): Also count bigrams
+
+    Returns:
+        tuple: (unigram HeavyHitters, bigram HeavyHitters)
+    """
+    known = known_terms()
+    unigrams = HeavyHitters(capacity)
+    pairs = HeavyHitters(capacity)
+    previous = None
+
+    for text in _iter_text(path, start, end):
+        words = []
+        gap_start = 0
+        for match in WORD_RE.finditer(text):
+            word = match.group()
+            if word in STOPWORDS or word in known:
+                previous = None
+                continue
+            words.append(word)
+            if bigrams:
+                if previous is not None and not text[gap_start:match.start()].strip():
+                    pair = previous + ' ' + word
+                    if pair not in known:
+                        pairs.add(pair)
+                previous, gap_start = word, match.end()
+        unigrams.update(words)
+        # Chunks are cut at whitespace, so a pair can continue into the next chunk
+        if previous is not None and text[gap_start:].strip():
+            previous = None
+
+    # Read one word past the range for the pair that straddles its end
+    if previous is not None and end < os.path.getsize(path):
+        word = _first_word(path, end, known)
+        if word is not None and previous + ' ' + word not in known:
+            pairs.add(previous + ' ' + word)
+
+    return unigrams, pairs
+
+
+def _first_word(path, start, known):
+    """Return the first word of the range starting at start if it is a candidate preceded only by whitespace."""
+    for text in _iter_text(path, start, os.path.getsize(path), chunk_bytes=4096):
+        match = WORD_RE.search(text)
+        if match is None or text[:match.start()].strip():
+            if text.strip():
+                return None
+            continue
+        word = match.group()
+        return None if word in STOPWORDS or word in known else word
+    return None
+
+
+def mine(paths, workers=1, capacity=DEFAULT_CAPACITY, bigrams=True, split_bytes=SPLIT_BYTES):
+    """
+    Count candidate terms across files, in parallel when workers > 1.
+
+    Args:
+        paths (list): Text files
+        workers (int): Number of worker processes
+        capacity (int): HeavyHitters capacity per summary
+        bigrams (bool): Also count bigrams
+        split_bytes (int): Size of the byte ranges counted independently
+
+    Returns:
+        tuple: (unigram HeavyHitters, bigram HeavyHitters)
+    """
+    units = split_work(paths, split_bytes)
+    unigrams = HeavyHitters(capacity)
+    pairs = HeavyHitters(capacity)
+
+    if workers <= 1:
+        partials = (count_range(path, start, end, capacity, bigrams) for path, start, end in units)
+        for partial_unigrams, partial_pairs in partials:
+            unigrams.merge(partial_unigrams)
+            pairs.merge(partial_pairs)
+        return unigrams, pairs
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(count_range, path, start, end, capacity, bigrams) for path, start, end in units]
+        for future in futures:
+            partial_unigrams, partial_pairs = future.result()
+            unigrams.merge(partial_unigrams)
+            pairs.merge(partial_pairs)
+    return unigrams, pairs
+
+
+def print_candidates(unigrams, pairs, top=30):
+    """Print the top candidate unigrams and bigrams."""
+    print("Most common potential gardening terms not in your patterns:")
+    for word, count in unigrams.most_common(top):
+        print(f"{word}: {count}")
+    if not unigrams.exact:
+        print(f"(approximate: counts may be up to {unigrams.error} too low)")
+
+    if len(pairs):
+        print("\nMost common potential two-word terms not in your patterns:")
+        for pair, count in pairs.most_common(top):
+            print(f"{pair}: {count}")
+        if not pairs.exact:
+            print(f"(approximate: counts may be up to {pairs.error} too low)")
+
+
+def main(default_paths=None):
+    """Main function to mine candidate terms from text files."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Find frequent words and phrases missing from the lexicon.")
+    parser.add_argument("text_files", nargs="*" if default_paths else "+", default=default_paths,
+                        help="Extracted text files")
+    parser.add_argument("--top", type=int, default=30, help="Number of candidates to show (default: 30)")
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes (default: 1)")
+    parser.add_argument("--capacity", type=int, default=DEFAULT_CAPACITY,
+                        help="Items kept per counter before approximating (default: %(default)s)")
+    parser.add_argument("--no-bigrams", action="store_true", help="Only count single words")
+    args = parser.parse_args()
+
+    unigrams, pairs = mine(args.text_files, workers=args.workers, capacity=args.capacity,
+                           bigrams=not args.no_bigrams)
+    print_candidates(unigrams, pairs, args.top)
+
+
+if __name__ == "__main__":
+    main()
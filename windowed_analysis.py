@@ -0,0 +1,236 @@
+"""
+Analysing very large text files within a memory budget.
+
+ner_analyzer.py reads the whole text, and the whole text, its lowercase
+copies, the spaCy Doc, every hit and the indented JSON are then in memory
+together. analyse_windowed instead works through an mmapped text file a
+window at a time:
+
+- pages are decoded from the mapping one at a time and packed into the
+  same chunks text_chunks.iter_chunks would cut from the whole text
+- each window of chunks is matched against the lexicon and run through
+  spaCy; the Docs are dropped as soon as their entities are read
+- hits are spilled to disk (hit_spill.py) and streamed into the usual
+  <name>_ner_analysis.json at the end
+
+The window holds as many chunks as fit in what is left of the budget once
+the model is loaded, at an estimated DOC_BYTES_PER_CHAR per chunk
+character. The output is identical to ner_analyzer.py run with the same
+--chunk-chars (documents longer than the model's max_length are always
+chunked); lexicon-only runs are identical to the default run. If even one
+chunk does not fit, chunks are made smaller and the chunk size used is
+reported. A page is always decoded whole, so the budget should leave room
+for the longest page.
+"""
+
+import mmap
+import os
+import re
+
+from hit_spill import HitSpill, write_results
+from instrumentation import max_rss_bytes
+from ner_analyzer import ENTITY_LABELS
+from spacy_profiles import describe_pipeline
+from text_chunks import DEFAULT_CHUNK_CHARS, _segments
+
+# Estimated peak memory per character of text in a spaCy Doc: tokens,
+# whitespace and the tok2vec tensor of the small English models
+DOC_BYTES_PER_CHAR = 200
+# Estimated peak memory per character of a lexicon-only chunk: the text,
+# its lowercase copy and the word offsets
+TEXT_BYTES_PER_CHAR = 40
+# Never cut chunks shorter than this; lower budgets are reported as too small
+MIN_CHUNK_CHARS = 1000
+
+# Page separator lines as bytes; the text is decoded one page at a time
+PAGE_MARKER_BYTES_RE = re.compile(rb'^--- Page \d+ ---\r?$', re.MULTILINE)
+
+
+def iter_mapped_pages(text_path):
+    """
+    Decode a text file one page at a time from a memory mapping.
+
+    Pages start at '--- Page N ---' lines. Line endings are translated as
+    when the file is opened in text mode, so the pages concatenate to the
+    text ner_analyzer.py reads.
+
+    Args:
+        text_path (str): UTF-8 text file
+
+    Yields:
+        str: Text before the first page separator (if any), then each page
+    """
+    with open(text_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            start = 0
+            for marker in PAGE_MARKER_BYTES_RE.finditer(mapped):
+                if marker.start() > start:
+                    yield _decode(mapped[start:marker.start()])
+                start = marker.start()
+            yield _decode(mapped[start:])
+
+
+def _decode(data):
+    """Decode UTF-8 bytes with universal newlines."""
+    text = data.decode('utf-8')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+def iter_mapped_chunks(text_path, max_chars=DEFAULT_CHUNK_CHARS):
+    """
+    Split an mmapped text file into the chunks iter_chunks cuts from its text.
+
+    Only the current page and chunk are decoded at any time.
+
+    Args:
+        text_path (str): UTF-8 text file
+        max_chars (int): Maximum chunk length in characters
+
+    Yields:
+        tuple: (offset, chunk_text) where offset is the chunk start in the text
+    """
+    pieces = []
+    chunk_start = chunk_end = 0
+    page_start = 0
+    for page in iter_mapped_pages(text_path):
+        for seg_start, seg_end in _segments(page, 0, len(page), max_chars):
+            if page_start + seg_end - chunk_start > max_chars and chunk_end > chunk_start:
+                yield chunk_start, ''.join(pieces)
+                pieces = []
+                chunk_start = chunk_end
+            pieces.append(page[seg_start:seg_end])
+            chunk_end = page_start + seg_end
+        page_start += len(page)
+    if chunk_end > chunk_start:
+        yield chunk_start, ''.join(pieces)
+
+
+def _timed_docs(instrumentation, docs):
+    """Yield (offset, Doc) pairs from nlp.pipe, recording the parsing as the 'nlp' stage."""
+    docs = iter(docs)
+    while True:
+        with instrumentation.stage('nlp') as timer:
+            try:
+                doc, offset = next(docs)
+            except StopIteration:
+                return
+            timer.add(chars=len(doc.text), tokens=len(doc), hits=len(doc.ents))
+        yield offset, doc
+
+
+def plan_windows(max_memory, baseline, chunk_chars, bytes_per_char, n_process=1):
+    """
+    Size chunks and windows to a memory budget.
+
+    Args:
+        max_memory (int): Memory budget in bytes for the whole process
+        baseline (int): Memory already in use, e.g. by the loaded model
+        chunk_chars (int): Requested chunk size in characters
+        bytes_per_char (int): Estimated memory per chunk character in flight
+        n_process (int): spaCy processes, each holding a window
+
+    Returns:
+        tuple: (chunk size in characters, chunks per window)
+
+    Raises:
+        ValueError: If the budget cannot hold even a minimal chunk
+    """
+    available = (max_memory - baseline) // max(n_process, 1)
+    fitting = available // bytes_per_char
+    if fitting < MIN_CHUNK_CHARS:
+        raise ValueError(f"A memory budget of {max_memory / (1024 * 1024):.0f} MB is too small: "
+                         f"{baseline / (1024 * 1024):.0f} MB is already in use")
+    chunk_chars = min(chunk_chars, fitting)
+    return chunk_chars, fitting // chunk_chars
+
+
+def analyse_windowed(analyser, text_path, output_path, max_memory):
+    """
+    Analyse a text file in windows sized to a memory budget.
+
+    Args:
+        analyser (GardeningNERAnalyser): Analyser with the default 'trie'
+            lexicon mode, without normalisation, fuzzy matching or
+            co-occurrence counting
+        text_path (str): Extracted text file
+        output_path (str): JSON results file to write
+        max_memory (int): Memory budget in bytes
+
+    Returns:
+        dict: 'summary', 'output', 'chunk_chars', 'window_chunks', 'windows',
+            'chars', 'max_memory' and the measured 'max_rss_bytes'
+    """
+    unsupported = [name for name, used in [('--lexicon-mode', analyser.lexicon_mode != 'trie'),
+                                           ('--normalise', analyser.normalise),
+                                           ('--fuzzy', analyser.fuzzy_distance),
+                                           ('--cooccurrence', analyser.cooccurrence_unit)] if used]
+    if unsupported:
+        raise ValueError(f"Memory-capped runs don't support {', '.join(unsupported)}")
+
+    chunk_chars = analyser.chunk_chars or DEFAULT_CHUNK_CHARS
+    bytes_per_char = TEXT_BYTES_PER_CHAR
+    if analyser.use_ner:
+        chunk_chars = min(chunk_chars, analyser.nlp.max_length)  # loads the model
+        bytes_per_char = DOC_BYTES_PER_CHAR
+    chunk_chars, window_chunks = plan_windows(max_memory, max_rss_bytes() or 0, chunk_chars, bytes_per_char,
+                                              analyser.n_process if analyser.use_ner else 1)
+
+    ranks = {group: rank for rank, group in enumerate(analyser.matcher.groups)}
+    labels = set(ENTITY_LABELS)
+    instrumentation = analyser.instrumentation
+    instrumentation.begin_scope()
+    windows = chars = 0
+    with HitSpill(os.path.dirname(os.path.abspath(output_path))) as spill:
+        chunks = iter_mapped_chunks(text_path, chunk_chars)
+        if analyser.use_ner:
+            docs = analyser.nlp.pipe(((chunk, offset) for offset, chunk in chunks), as_tuples=True,
+                                     n_process=analyser.n_process, batch_size=window_chunks)
+            chunks = _timed_docs(instrumentation, docs)
+
+        for index, (offset, chunk) in enumerate(chunks):
+            if analyser.use_ner:
+                doc, chunk = chunk, chunk.text
+                entities = {}
+                for ent in doc.ents:
+                    if ent.label_ in labels:
+                        entities.setdefault(ent.label_, []).append(
+                            (ent.text, ent.start_char + offset, ent.end_char + offset, ent.label_))
+                # Release the Doc before the next one is parsed
+                del doc
+                for label, rows in entities.items():
+                    spill.append(label, rows)
+
+            lexicon = analyser._match_lexicon(chunk)
+            for section, table in lexicon.items():
+                by_rank = {}
+                for text, start, end, category in table.rows():
+                    by_rank.setdefault(ranks[section, category], []).append(
+                        (text, start + offset, end + offset, category))
+                for rank, rows in by_rank.items():
+                    spill.append((section, rank), rows)
+
+            chars += len(chunk)
+            windows = index // window_chunks + 1
+
+        pipeline = describe_pipeline(analyser.nlp, analyser.profile) if analyser.use_ner else None
+        extra = {'lexicon_hash': analyser.matcher.hash, 'settings_hash': analyser.settings_hash}
+        if instrumentation.enabled:
+            # Reported as the file is written, so the timings cover every stage but the write
+            extra['timings'] = lambda: instrumentation.report(scoped=True)
+        with instrumentation.stage('write'):
+            summary = write_results(spill, output_path, ranks, pipeline, extra)
+
+    return {
+        'summary': summary,
+        'output': output_path,
+        'chunk_chars': chunk_chars,
+        'window_chunks': window_chunks,
+        'windows': windows,
+        'chars': chars,
+        'max_memory': max_memory,
+        'max_rss_bytes': max_rss_bytes()
+    }